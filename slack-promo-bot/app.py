@@ -2,48 +2,320 @@
 Promo Smith - Slack Bot for Promo Code Generation
 Main application entry point.
 """
+import importlib
+import os
+import sys
+import threading
+from src.utils import startup  # first, so the timeline starts at process start
 from slack_bolt import App
-from slack_bolt.adapter.socket_mode import SocketModeHandler
-from src.config import SLACK_BOT_TOKEN, SLACK_APP_TOKEN
-from src.slack_ui.handlers import handle_open_modal, handle_promo_submit, handle_promo_confirm
+from src.config import (
+    SLACK_BOT_TOKEN,
+    SLACK_APP_TOKEN,
+    SLACK_SIGNING_SECRET,
+    PROMO_SERVE_MODE,
+    PORT,
+    PROMO_HTTP_WORKERS,
+    PROMO_HTTP_THREADS,
+    PROMO_METRICS_LOG_SECONDS,
+    PROMO_PREWARM,
+    PROMO_PREWARM_CONNECTIONS,
+    PROMO_CAPACITY_ALERT_HOURS,
+)
+from src import live_config
+from src.utils.membership import get_membership_index, apply_settings as apply_membership_settings
+from src.utils.metrics import measure_ack, start_periodic_log
+from src.core.parse_api import prewarm as prewarm_parse
+from src.slack_ui.modal_views import prime_templates
+from src.slack_ui.handlers import (
+    ack_open_modal,
+    open_modal,
+    ack_promo_submit,
+    process_promo_submit,
+    ack_promo_confirm,
+    process_promo_confirm,
+    start_deferred_jobs,
+)
+from src.slack_ui.job_handlers import handle_job_action, handle_job_command, start_job_controls
 
+startup.mark("imports")
 
-# Initialize Slack app
-app = App(token=SLACK_BOT_TOKEN)
+# Initialize Slack app (the signing secret is only used to verify HTTP requests)
+app = App(token=SLACK_BOT_TOKEN, signing_secret=SLACK_SIGNING_SECRET)
+startup.mark("app_init")
 
 
-@app.shortcut("promo_global_shortcut")
-def open_promo_modal(ack, body, client):
-    """Handle global shortcut to open promo generation modal."""
-    handle_open_modal(ack, body, client)
+# The core promo flow uses lazy listeners: the ack function answers Slack within
+# milliseconds and the lazy function does the slow work (views_open, validation of
+# large inputs, code generation) afterwards in Bolt's thread pool.
 
+@measure_ack("promo_global_shortcut")
+def promo_shortcut_ack(ack, body):
+    """Acknowledge the global shortcut."""
+    ack_open_modal(ack, body)
 
-@app.command("/generate-promo")
-def open_from_cmd(ack, body, client):
-    """Handle slash command to open promo generation modal."""
+
+def promo_shortcut_open(body, client):
+    """Open the promo generation modal from the global shortcut."""
+    open_modal(body, client)
+
+
+@measure_ack("generate_promo_command")
+def promo_command_ack(ack, body):
+    """Acknowledge the slash command."""
+    ack_open_modal(ack, body)
+
+
+def promo_command_open(body, client):
+    """Open the promo generation modal from the slash command."""
     # Pass channel_id as private_metadata for result routing
     channel_id = body.get("channel_id", "")
-    handle_open_modal(ack, body, client, private_metadata=channel_id)
+    open_modal(body, client, private_metadata=channel_id)
+
+
+@measure_ack("promo_gui_submit")
+def promo_submit_ack(ack, body, view):
+    """Validate (small) or defer (large) the promo form and show confirmation."""
+    ack_promo_submit(ack, body, view)
+
+
+def promo_submit_process(body, client, view):
+    """Finish validating large promo form submissions."""
+    process_promo_submit(body, client, view)
+
+
+@measure_ack("promo_gui_confirm")
+def promo_confirm_ack(ack, body):
+    """Close the modal stack as soon as the user confirms."""
+    ack_promo_confirm(ack, body)
+
+
+def promo_confirm_process(body, client, view):
+    """Generate promo codes and post results."""
+    process_promo_confirm(body, client, view)
+
+
+app.shortcut("promo_global_shortcut")(ack=promo_shortcut_ack, lazy=[promo_shortcut_open])
+app.command("/generate-promo")(ack=promo_command_ack, lazy=[promo_command_open])
+app.view("promo_gui_submit")(ack=promo_submit_ack, lazy=[promo_submit_process])
+app.view("promo_gui_confirm")(ack=promo_confirm_ack, lazy=[promo_confirm_process])
+
+
+# The other commands import their handlers on first use (or in warm_up()), so
+# only the promo flow and job controls are loaded before a worker is ready.
+
+@app.shortcut("promo_lookup_shortcut")
+@measure_ack("promo_lookup_shortcut")
+def open_lookup_modal(ack, body, client):
+    """Handle global shortcut to open the promo lookup modal."""
+    from src.slack_ui.lookup_handlers import handle_open_lookup
+
+    handle_open_lookup(ack, body, client)
+
+
+@app.command("/promo-lookup")
+@measure_ack("promo_lookup_command")
+def lookup_from_cmd(ack, body, client):
+    """Handle `/promo-lookup [email|phone|code]`."""
+    from src.slack_ui.lookup_handlers import handle_open_lookup
+
+    handle_open_lookup(ack, body, client)
+
+
+@app.view("promo_lookup_submit")
+@measure_ack("promo_lookup_submit")
+def lookup_submit(ack, body, client, view):
+    """Handle promo lookup form submission."""
+    from src.slack_ui.lookup_handlers import handle_lookup_submit
+
+    handle_lookup_submit(ack, body, client, view)
+
+
+@app.action("promo_lookup_prev")
+@app.action("promo_lookup_next")
+@measure_ack("promo_lookup_page")
+def lookup_page(ack, body, client):
+    """Handle lookup result pagination."""
+    from src.slack_ui.lookup_handlers import handle_lookup_page
+
+    handle_lookup_page(ack, body, client)
+
+
+@app.command("/promo-extend")
+@measure_ack("promo_extend_command")
+def open_extend_from_cmd(ack, body, client):
+    """Handle slash command to open the bulk validity extension modal."""
+    from src.slack_ui.extend_handlers import handle_open_extend
+
+    handle_open_extend(ack, body, client)
+
 
+@app.view("promo_extend_submit")
+@measure_ack("promo_extend_submit")
+def extend_submit(ack, body, client, view):
+    """Handle extension form submission and run the extension."""
+    from src.slack_ui.extend_handlers import handle_extend_submit
 
-@app.view("promo_gui_submit")
-def promo_submit(ack, body, client, view):
-    """Handle promo form submission and show confirmation modal."""
-    handle_promo_submit(ack, body, client, view)
+    handle_extend_submit(ack, body, client, view)
 
 
-@app.view("promo_gui_confirm")
-def promo_confirm(ack, body, client, view):
-    """Handle confirmation and generate promo codes."""
-    handle_promo_confirm(ack, body, client, view)
+@app.command("/promo-revoke")
+@measure_ack("promo_revoke_command")
+def open_revoke_from_cmd(ack, body, client):
+    """Handle slash command to open the bulk revoke modal."""
+    from src.slack_ui.revoke_handlers import handle_open_revoke
+
+    handle_open_revoke(ack, body, client)
+
+
+@app.view("promo_revoke_submit")
+@measure_ack("promo_revoke_submit")
+def revoke_submit(ack, body, client, view):
+    """Handle revoke form submission and run the revoke."""
+    from src.slack_ui.revoke_handlers import handle_revoke_submit
+
+    handle_revoke_submit(ack, body, client, view)
+
+
+@app.action("promo_job_pause")
+@app.action("promo_job_resume")
+@app.action("promo_job_cancel")
+@measure_ack("promo_job_action")
+def job_action(ack, body, client):
+    """Handle Pause/Resume/Cancel buttons on a job status message."""
+    handle_job_action(ack, body, client)
+
+
+@app.command("/promo-job")
+@measure_ack("promo_job_command")
+def job_command(ack, body, client):
+    """Handle `/promo-job [list|pause|resume|cancel] <id>`."""
+    handle_job_command(ack, body, client)
+
+
+@app.command("/promo-capacity")
+@measure_ack("promo_capacity_command")
+def capacity_command(ack, body, client):
+    """Handle `/promo-capacity [full | PREFIX ...]`."""
+    from src.slack_ui.capacity_handlers import handle_capacity_command
+
+    handle_capacity_command(ack, body, client)
+
+
+@app.command("/promo-audit")
+@measure_ack("promo_audit_command")
+def audit_command(ack, body, client):
+    """Handle `/promo-audit [code:X] [user:X] [by:@U] [since:DATE] [until:DATE]`."""
+    from src.slack_ui.audit_handlers import handle_audit_command
+
+    handle_audit_command(ack, body, client)
+
+
+@app.command("/promo-stats")
+@measure_ack("promo_stats_command")
+def stats_command(ack, body, client):
+    """Handle `/promo-stats [24h | today | 7d | 30d | month | YYYY-MM | YYYY-MM-DD]`."""
+    from src.slack_ui.stats_handlers import handle_stats_command
+
+    handle_stats_command(ack, body, client)
+
+
+def _post_capacity_alert(text):
+    """Post a capacity alert to the notify channel, if one is configured."""
+    from src.slack_ui.conversations import check_stale
+
+    channel = live_config.current().notify_channel
+    if not channel:
+        print(f"[capacity] {text}")
+        return
+    try:
+        app.client.chat_postMessage(channel=channel, text=text)
+    except Exception as e:
+        print(f"[capacity] alert post failed for {channel}: {e}")
+        check_stale(channel, e)
+
+
+_DEFERRED_HANDLERS = (
+    "src.slack_ui.lookup_handlers",
+    "src.slack_ui.extend_handlers",
+    "src.slack_ui.revoke_handlers",
+    "src.slack_ui.capacity_handlers",
+    "src.slack_ui.audit_handlers",
+    "src.slack_ui.stats_handlers",
+)
+
+
+def warm_up():
+    """Import deferred handlers, build view templates and pre-warm the Parse pool (runs in a background thread)."""
+    try:
+        for module in _DEFERRED_HANDLERS:
+            importlib.import_module(module)
+        startup.mark("handlers_imported")
+        prime_templates()
+        startup.mark("templates_primed")
+        prewarm_parse(PROMO_PREWARM_CONNECTIONS)
+        startup.mark("parse_prewarmed")
+    except Exception as e:
+        print(f"[startup] warm-up failed: {e}")
+    startup.log_timeline()
+
+
+def start_background_services():
+    """Start per-process background work (called once per process/worker)."""
+    from src.core.capacity import start_capacity_alerts
+    from src.core.mirror import get_mirror
+    from src.slack_ui.digest import get_digest
+
+    if PROMO_PREWARM:
+        threading.Thread(target=warm_up, name="promo-warm-up", daemon=True).start()
+    live_config.on_change(apply_membership_settings)
+    live_config.start_watcher()
+    get_membership_index().start_background_refresh(app.client)
+    mirror = get_mirror()
+    if mirror:
+        mirror.start_background_sync()
+    start_periodic_log(PROMO_METRICS_LOG_SECONDS)
+    start_capacity_alerts(_post_capacity_alert, PROMO_CAPACITY_ALERT_HOURS)
+    get_digest().start(app.client)
+    start_deferred_jobs(app.client)
+    start_job_controls(app.client)
+
+
+def serve_http():
+    """Replace this process with a multi-worker gunicorn serving wsgi.py."""
+    if not SLACK_SIGNING_SECRET:
+        sys.exit("SLACK_SIGNING_SECRET is required when PROMO_SERVE_MODE=http")
+    argv = [
+        "gunicorn",
+        "--bind", f"0.0.0.0:{PORT}",
+        "--workers", str(PROMO_HTTP_WORKERS),
+        "--threads", str(PROMO_HTTP_THREADS),
+        "--chdir", os.path.dirname(os.path.abspath(__file__)),
+        "wsgi:application",
+    ]
+    print(f"✅ Promo Smith bot serving HTTP on :{PORT} with {PROMO_HTTP_WORKERS} workers")
+    os.execvp(argv[0], argv)
 
 
 def main():
-    """Start the Slack bot in Socket Mode."""
+    """Start the Slack bot in Socket Mode or HTTP mode (PROMO_SERVE_MODE)."""
     print("⚡️ Promo Smith bot is starting...")
+    if PROMO_SERVE_MODE == "http":
+        serve_http()
+        return
+    if PROMO_SERVE_MODE != "socket":
+        sys.exit(f"Unknown PROMO_SERVE_MODE={PROMO_SERVE_MODE!r} (use 'socket' or 'http')")
+    if not SLACK_APP_TOKEN:
+        sys.exit("SLACK_APP_TOKEN is required when PROMO_SERVE_MODE=socket")
+
+    from slack_bolt.adapter.socket_mode import SocketModeHandler
+
+    start_background_services()
     handler = SocketModeHandler(app, SLACK_APP_TOKEN)
-    handler.start()
+    handler.connect()
+    startup.mark("ready")
+    startup.log_timeline()
     print("✅ Promo Smith bot is running!")
+    threading.Event().wait()
 
 
 if __name__ == "__main__":
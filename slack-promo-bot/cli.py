@@ -0,0 +1,288 @@
+"""
+Promo Smith - command-line tools for bulk maintenance jobs.
+
+Usage:
+    python cli.py extend extension.csv --extension 30D [--prefix AVZ-2DA-] [--dry-run]
+    python cli.py revoke --prefix AVZ-TRIAL- --reason "Trial ended" [--dry-run] [--notify]
+    python cli.py mirror-sync
+    python cli.py export codes.csv [--prefix ...] [--partner ...] [--since 2025-01-01] [--until ...] [--resume]
+    python cli.py capacity [PREFIX ...] [--full] [--notify]
+    python cli.py stats-backfill
+
+Add --env NAME before the command to run against another Parse environment
+(see PARSE_ENVIRONMENTS), e.g. ``python cli.py --env staging revoke ...``.
+"""
+import argparse
+import csv
+import getpass
+import os
+import sys
+
+
+def _first_column(path: str, normalize=None):
+    """Stream the first CSV column of a file, skipping blanks."""
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if row and row[0].strip():
+                yield normalize(row[0]) if normalize else row[0].strip()
+
+
+def _post_to_notify_channel(text: str) -> None:
+    """Post a message to PROMO_NOTIFY_CHANNEL with the bot token."""
+    from slack_sdk import WebClient
+    from src.config import SLACK_BOT_TOKEN, PROMO_NOTIFY_CHANNEL
+
+    if not PROMO_NOTIFY_CHANNEL:
+        print("[notify] PROMO_NOTIFY_CHANNEL is not set; skipping")
+        return
+    try:
+        WebClient(token=SLACK_BOT_TOKEN).chat_postMessage(channel=PROMO_NOTIFY_CHANNEL, text=text)
+    except Exception as e:
+        print(f"[notify] chat_postMessage failed for {PROMO_NOTIFY_CHANNEL}: {e}")
+
+
+def cmd_extend(args) -> int:
+    """Extend the validity of every code held by the users in a CSV."""
+    from src.core.bulk_extend import extend_validity, read_extension_csv
+    from src.utils.checkpoint import Checkpoint
+
+    checkpoint = Checkpoint(args.checkpoint or f"{args.csv}.checkpoint.json")
+
+    def progress(report):
+        print(f"[extend] {report.meter.summary('rows', 'extended')}", flush=True)
+
+    report = extend_validity(
+        read_extension_csv(args.csv),
+        args.extension.upper(),
+        prefix=args.prefix,
+        dry_run=args.dry_run,
+        checkpoint=checkpoint,
+        chunk_size=args.chunk_size,
+        on_progress=progress,
+    )
+    print(report.format())
+    return 1 if report.aborted else 0
+
+
+def cmd_revoke(args) -> int:
+    """Revoke codes by prefix, partner, user list and/or explicit codes."""
+    from src.core.bulk_revoke import build_selectors, revoke_codes
+    from src.utils.checkpoint import Checkpoint
+    from src.utils.validation import normalize_user_id
+
+    users = _first_column(args.users_file, normalize_user_id) if args.users_file else None
+    codes = _first_column(args.codes_file, str.upper) if args.codes_file else None
+    try:
+        selectors = build_selectors(args.prefix, args.partner, users=users, codes=codes)
+        next_selector = next(selectors)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    def all_selectors():
+        yield next_selector
+        yield from selectors
+
+    checkpoint = Checkpoint(args.checkpoint) if args.checkpoint else None
+    last_batches = [0]
+
+    def progress(report):
+        batches = report.meter.get("batches")
+        if batches - last_batches[0] >= 20:
+            last_batches[0] = batches
+            print(f"[revoke] {report.meter.summary('matched', 'revoked')}", flush=True)
+
+    report = revoke_codes(
+        all_selectors(),
+        reason=args.reason,
+        revoked_by=f"cli:{getpass.getuser()}",
+        dry_run=args.dry_run,
+        concurrency=args.concurrency,
+        checkpoint=checkpoint,
+        on_progress=progress,
+    )
+    text = report.format()
+    print(text)
+    if args.notify and not args.dry_run:
+        _post_to_notify_channel(f"Revoke run from CLI\nReason: {args.reason}\n{text}")
+    return 1 if (report.aborted or report.meter.get("failed_batches")) else 0
+
+
+def cmd_export(args) -> int:
+    """Stream PromoCodeInfo rows into a CSV or Parquet file."""
+    from src.core.export import build_export_where, export_promos, parquet_available
+
+    fmt = args.format
+    if fmt == "auto":
+        fmt = "parquet" if args.output.endswith(".parquet") else "csv"
+    if fmt == "parquet" and not parquet_available():
+        print("error: parquet export needs pyarrow (pip install pyarrow)", file=sys.stderr)
+        return 2
+
+    token = args.resume_token
+    token_path = f"{args.output}.resume"
+    if args.resume and not token and os.path.exists(token_path):
+        with open(token_path, encoding="utf-8") as f:
+            token = f.read().strip()
+        print(f"[export] resuming from {token_path}")
+
+    where = build_export_where(args.prefix, args.partner, args.since, args.until)
+
+    def progress(meter, _token):
+        print(f"[export] {meter.summary('rows')}", flush=True)
+
+    try:
+        meter, _ = export_promos(args.output, where, fmt=fmt, resume_token=token,
+                                 page_size=args.page_size, on_progress=progress)
+    except KeyboardInterrupt:
+        print(f"\n[export] interrupted; re-run with --resume to continue ({token_path})")
+        return 130
+    except Exception as e:
+        print(f"[export] failed: {e}; re-run with --resume to continue ({token_path})", file=sys.stderr)
+        return 1
+    print(f"[export] done → {args.output} · {meter.summary('rows')}")
+    return 0
+
+
+def cmd_capacity(args) -> int:
+    """Print (and optionally post alerts from) the prefix capacity report."""
+    from src.core.capacity import build_capacity_report
+
+    def progress(n):
+        print(f"[capacity] scanned {n:,} codes", flush=True)
+
+    report = build_capacity_report([p.upper() for p in args.prefixes], full_scan=args.full, on_progress=progress)
+    print(report.format())
+    flagged = report.alerts()
+    if flagged and args.notify:
+        _post_to_notify_channel(
+            f":warning: *Promo prefix capacity*: {', '.join(f'`{p.prefix}`' for p in flagged)} need attention\n"
+            + report.format()
+        )
+    return 2 if flagged else 0
+
+
+def _default_environment(command: str) -> bool:
+    """The mirror and the rollups only track the default Parse environment."""
+    from src.core.parse_api import current
+
+    if current().is_default:
+        return True
+    print(f"error: {command} only works on the default Parse environment", file=sys.stderr)
+    return False
+
+
+def cmd_mirror_sync(args) -> int:
+    """Bring the local SQLite mirror up to date with Parse."""
+    from src.core.mirror import get_mirror
+    from src.utils.progress import Throughput
+
+    if not _default_environment("mirror-sync"):
+        return 2
+    mirror = get_mirror()
+    if mirror is None:
+        print("error: PROMO_MIRROR_PATH is not set", file=sys.stderr)
+        return 2
+    meter = Throughput()
+    meter.add("objects", mirror.sync_once())
+    print(f"[mirror] {mirror.path} up to date · {meter.summary('objects')}")
+    if args.reconcile:
+        print(f"[mirror] dropped {mirror.reconcile()} objects deleted in Parse")
+    return 0
+
+
+def cmd_stats_backfill(args) -> int:
+    """Rebuild the /promo-stats rollups for codes created before live counting started."""
+    from src.core.parse_api import iter_promos_by_time, parse_date
+    from src.core.rollups import get_rollups
+    from src.utils.progress import Throughput
+
+    if not _default_environment("stats-backfill"):
+        return 2
+    rollups = get_rollups()
+    if rollups is None:
+        print("error: PROMO_ROLLUPS_PATH is not set", file=sys.stderr)
+        return 2
+    meter = Throughput()
+
+    def progress(n):
+        print(f"[stats] streamed {n:,} codes", flush=True)
+
+    where = {"createdAt": {"$lt": parse_date(rollups.live_since)}}
+    objects = iter_promos_by_time(where, keys=["promoCodeId", "promoCodeDistributionPartner"],
+                                  page_size=args.page_size)
+    meter.add("codes", rollups.backfill(objects, on_progress=progress))
+    print(f"[stats] backfilled codes created before {rollups.live_since} · {meter.summary('codes')}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cli.py", description="Promo Smith maintenance tools")
+    parser.add_argument("--env", default="", help="Parse environment to use (default: PARSE_DEFAULT_ENVIRONMENT)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("extend", help="Bulk-extend promo validity from a CSV (user[,extension])")
+    p.add_argument("csv", help="CSV file: column 1 = email/phone, optional column 2 = extension (e.g., 30D)")
+    p.add_argument("--extension", default="30D", help="Default extension: nD, nM, nY or LIFETIME (default: 30D)")
+    p.add_argument("--prefix", default="", help="Only extend codes with this prefix")
+    p.add_argument("--dry-run", action="store_true", help="Report the changes without saving them")
+    p.add_argument("--checkpoint", default="", help="Checkpoint file (default: <csv>.checkpoint.json)")
+    p.add_argument("--chunk-size", type=int, default=50, help="Users per Parse query (default: 50)")
+    p.set_defaults(func=cmd_extend)
+
+    p = sub.add_parser("revoke", help="Bulk-revoke codes by prefix, partner, users or codes")
+    p.add_argument("--prefix", default="", help="Revoke codes with this prefix")
+    p.add_argument("--partner", default="", help="Revoke codes for this distribution partner")
+    p.add_argument("--users-file", default="", help="CSV/text file of emails/phones (first column)")
+    p.add_argument("--codes-file", default="", help="CSV/text file of promo codes (first column)")
+    p.add_argument("--reason", required=True, help="Why the codes are revoked (stored on each code)")
+    p.add_argument("--dry-run", action="store_true", help="Count matching codes without revoking them")
+    p.add_argument("--concurrency", type=int, default=4, help="Parallel /batch requests (default: 4)")
+    p.add_argument("--checkpoint", default="", help="Checkpoint file to resume from / record progress in")
+    p.add_argument("--notify", action="store_true", help="Post the summary to PROMO_NOTIFY_CHANNEL")
+    p.set_defaults(func=cmd_revoke)
+
+    p = sub.add_parser("capacity", help="Report prefix occupancy and when uniqueness retries get costly")
+    p.add_argument("prefixes", nargs="*", help="Prefixes to report on (default: the form's prefixes)")
+    p.add_argument("--full", action="store_true", help="Scan every code (finds custom prefixes too)")
+    p.add_argument("--notify", action="store_true", help="Post to PROMO_NOTIFY_CHANNEL if any prefix needs attention")
+    p.set_defaults(func=cmd_capacity)
+
+    p = sub.add_parser("mirror-sync", help="Sync the local SQLite mirror (PROMO_MIRROR_PATH) from Parse")
+    p.add_argument("--reconcile", action="store_true", help="Also drop objects that were deleted in Parse")
+    p.set_defaults(func=cmd_mirror_sync)
+
+    p = sub.add_parser("stats-backfill", help="Backfill /promo-stats rollups by streaming existing codes")
+    p.add_argument("--page-size", type=int, default=1000, help="Rows per Parse request (default: 1000)")
+    p.set_defaults(func=cmd_stats_backfill)
+
+    p = sub.add_parser("export", help="Export PromoCodeInfo to CSV/Parquet (cursor-paged, resumable)")
+    p.add_argument("output", help="Output file (.csv or .parquet)")
+    p.add_argument("--format", choices=("auto", "csv", "parquet"), default="auto", help="Output format (default: from extension)")
+    p.add_argument("--prefix", default="", help="Only codes with this prefix")
+    p.add_argument("--partner", default="", help="Only codes for this distribution partner")
+    p.add_argument("--since", default="", help="Only codes created on/after this date (YYYY-MM-DD or ISO timestamp)")
+    p.add_argument("--until", default="", help="Only codes created before this date (YYYY-MM-DD or ISO timestamp)")
+    p.add_argument("--resume", action="store_true", help="Continue an interrupted export from <output>.resume")
+    p.add_argument("--resume-token", default="", help="Continue an interrupted export from this token")
+    p.add_argument("--page-size", type=int, default=1000, help="Rows per Parse request (default: 1000)")
+    p.set_defaults(func=cmd_export)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    from src.core.parse_api import get_client, use_environment
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        get_client(args.env)
+    except ValueError as e:
+        parser.error(str(e))
+    with use_environment(args.env):
+        return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Benchmark: audit log writes and /promo-audit query latency at scale.
+
+Fills a throwaway audit log with --entries codes (jobs of --job-size rows,
+spread over --requesters requesters and a year of timestamps) through the
+same batched write path the bot uses, then times the lookups the command
+runs: by code, by user, by requester, by requester + date range, and by
+date range alone.
+
+    python scripts/bench_audit.py
+    python scripts/bench_audit.py --entries 200000 --path /tmp/audit.sqlite3
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-bench")
+os.environ.setdefault("PARSE_APP_ID", "bench")
+
+from src.core.audit import AuditLog  # noqa: E402
+from src.core.suffix_engine import SuffixEngine  # noqa: E402
+
+
+def fill(audit: AuditLog, entries: int, job_size: int, requesters: int) -> float:
+    """Write ``entries`` codes in jobs of ``job_size``; returns seconds taken."""
+    engine = SuffixEngine("ABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890")
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    jobs = entries // job_size
+    records, n, t0 = [], 0, time.perf_counter()
+    for j in range(jobs):
+        finished = (start + timedelta(seconds=j * 365 * 86400 // jobs)).isoformat()[:19] + ".000Z"
+        suffixes = engine.suffixes(job_size, 8)
+        records.append({
+            "job_id": f"{j:08x}", "requester": f"UREQ{j % requesters:04d}", "notes": "bench",
+            "prefix": "AVZ-", "duration": "30D", "partner": "BENCH", "target": "D1", "status": "done",
+            "total": job_size, "errors": 0, "submitted_at": finished, "finished_at": finished,
+            "wait_ms": 10, "run_ms": 1000,
+            "rows": [(f"user{n + i}@example.com", f"AVZ-{s}") for i, s in enumerate(suffixes)],
+        })
+        n += job_size
+        if len(records) >= audit.batch_jobs:
+            audit.write(records)
+            records = []
+    audit.write(records)
+    return time.perf_counter() - t0
+
+
+def _time_ms(fn, repeat: int = 20) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=1000000)
+    parser.add_argument("--job-size", type=int, default=100)
+    parser.add_argument("--requesters", type=int, default=200)
+    parser.add_argument("--path", default="", help="SQLite file (default: a temp file, deleted afterwards)")
+    args = parser.parse_args()
+
+    path = args.path or os.path.join(tempfile.mkdtemp(), "audit.sqlite3")
+    audit = AuditLog(path)
+    seconds = fill(audit, args.entries, args.job_size, args.requesters)
+    stats = audit.stats()
+    print(f"wrote {stats['entries']:,} entries in {stats['jobs']:,} jobs in {seconds:.1f}s "
+          f"({stats['entries'] / seconds:,.0f}/s) · {os.path.getsize(path) / 1e6:.0f} MB")
+
+    _, sample = audit.query(requester="UREQ0007", limit=1)
+    code, user = sample[0]["code"], sample[0]["user"]
+    queries = {
+        "code": dict(code=code),
+        "user": dict(user=user),
+        "requester": dict(requester="UREQ0007"),
+        "requester + month": dict(requester="UREQ0007", since="2025-06-01", until="2025-07-01"),
+        "one day": dict(since="2025-06-01", until="2025-06-02"),
+    }
+    print(f"{'query':<20} {'matches':>9} {'median':>9}")
+    for label, filters in queries.items():
+        total, _ = audit.query(limit=20, **filters)
+        print(f"{label:<20} {total:>9,} {_time_ms(lambda: audit.query(limit=20, **filters)):>7.2f}ms")
+
+    if not args.path:
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Hot-reload benchmark: reload latency and reader consistency.
+
+Points PROMO_CONFIG_FILE at a temp file, starts the watcher, and rewrites
+the file --versions times while --readers threads call current() in a
+tight loop. Every version sets notify channel and partner to the same
+number, so a reader that ever sees them disagree has hit a torn snapshot.
+
+Reports write→visible latency (dominated by --poll), the time reload()
+itself takes, and hot-path reads per second.
+
+    python scripts/bench_config_reload.py
+    python scripts/bench_config_reload.py --poll 0.01 --versions 200 --readers 8
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--versions", type=int, default=100, help="Config versions to write")
+    parser.add_argument("--readers", type=int, default=4, help="Threads reading current() meanwhile")
+    parser.add_argument("--poll", type=float, default=0.05, help="Watcher poll interval (seconds)")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    with open(path, "w") as f:
+        json.dump({"PROMO_NOTIFY_CHANNEL": "C0", "PROMO_PARTNER": "P0"}, f)
+    os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-bench")
+    os.environ.setdefault("PARSE_APP_ID", "bench")
+    os.environ["PROMO_CONFIG_FILE"] = path
+    os.environ["PROMO_CONFIG_FROM_PARSE"] = "0"
+
+    from src import live_config
+    from src.utils import metrics
+
+    live_config.start_watcher(interval=args.poll)
+
+    stop = threading.Event()
+    reads, torn = [0] * args.readers, [0] * args.readers
+
+    def reader(i):
+        n = bad = 0
+        while not stop.is_set():
+            s = live_config.current()
+            if s.notify_channel[1:] != s.default_partner[1:]:
+                bad += 1
+            n += 1
+        reads[i], torn[i] = n, bad
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    for t in threads:
+        t.start()
+
+    visible_ms = []
+    started = time.perf_counter()
+    for v in range(1, args.versions + 1):
+        written = time.perf_counter()
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"PROMO_NOTIFY_CHANNEL": f"C{v}", "PROMO_PARTNER": f"P{v}"}, f)
+        os.replace(tmp, path)
+        while live_config.current().notify_channel != f"C{v}":
+            time.sleep(0.0005)
+        visible_ms.append((time.perf_counter() - written) * 1000)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for t in threads:
+        t.join()
+    os.remove(path)
+
+    visible_ms.sort()
+    reload_ms = metrics.snapshot().get("config.reload_ms", {})
+    print(f"{args.versions} versions · poll {args.poll * 1000:.0f}ms · {args.readers} readers")
+    print(f"write→visible: p50 {statistics.median(visible_ms):.1f}ms · "
+          f"p99 {visible_ms[int(len(visible_ms) * 0.99) - 1]:.1f}ms · max {visible_ms[-1]:.1f}ms")
+    print(f"reload(): n={reload_ms.get('count', 0)} mean {reload_ms.get('mean', 0):.2f}ms "
+          f"p99≤{reload_ms.get('p99', 0):g}ms · errors {metrics.snapshot().get('config.reload_errors', 0)}")
+    print(f"reads: {sum(reads) / elapsed / 1e6:.2f}M/s across readers · torn snapshots: {sum(torn)}")
+    return 1 if sum(torn) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+Parse read benchmark: bytes and time per call, whole objects vs projected reads.
+
+Seeds a local Parse stand-in with --codes PromoCodeInfo objects shaped like
+production ones, then compares:
+
+  exists   GET limit=1 returning the whole object, vs ParseClient.exists()
+           (count=1&limit=0, no object at all)
+  scan     pages of whole objects, uncompressed, parsed with resp.json(),
+           vs ParseClient.iter_promos() with keys=, gzip and streamed decoding
+
+and prints wire bytes (what crossed the network), decoded bytes per call and
+the peak memory of decoding one page (json.loads of the whole body vs
+object-by-object decoding; the stand-in runs in-process, so the body is
+fetched before measuring).
+
+    python scripts/bench_parse_reads.py
+    python scripts/bench_parse_reads.py --codes 50000 --page-size 1000 --keys promoCodeId
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from parse_standin import ParseStandIn  # noqa: E402
+from src.utils.json_stream import iter_array  # noqa: E402
+
+
+def _seed(standin: ParseStandIn, codes: int) -> list:
+    ids = []
+    for i in range(codes):
+        code = "AVZ-2DA-" + "".join(random.choices(string.ascii_uppercase + string.digits, k=5))
+        status, _ = standin._create("PromoCodeInfo", {
+            "promoCodeId": code,
+            "promoCodeDeviceCountLimit": 1,
+            "promoCodeUser": f"user{i}@example.com",
+            "promoCodeDuration": "30D",
+            "promoCodeDistributionPartner": "AVAZ",
+            "promoCodeStartDate": {"__type": "Date", "iso": "2025-01-01T00:00:00.000Z"},
+            "promoCodeEndDate": {"__type": "Date", "iso": "2025-01-31T00:00:00.000Z"},
+            "promoCodeRedeemedDevices": [],
+            "ACL": {"*": {"read": True}, "role:admin": {"read": True, "write": True}},
+        })
+        if status < 300:
+            ids.append(code)
+    return ids
+
+
+def _wire(resp, decoded: int) -> int:
+    tell = getattr(resp.raw, "tell", None)
+    return tell() if tell else decoded
+
+
+def _get_whole(client, params: dict):
+    """The old read path: whole objects, uncompressed, parsed in one go."""
+    headers = dict(client.headers, **{"Accept-Encoding": "identity"})
+    return client.session().get(f"{client.api_root}/classes/PromoCodeInfo", params=params, headers=headers,
+                                timeout=30)
+
+
+def _exists_before(client, code: str) -> tuple:
+    resp = _get_whole(client, {"where": json.dumps({"promoCodeId": code}), "limit": 1})
+    found = bool(resp.json().get("results"))
+    return found, _wire(resp, len(resp.content)), len(resp.content)
+
+
+def _scan_before(client, page_size: int) -> tuple:
+    """Whole objects with an objectId cursor; returns (objects, wire, decoded, calls)."""
+    last, objects, wire, decoded, calls = "", 0, 0, 0, 0
+    while True:
+        where = {"objectId": {"$gt": last}} if last else {}
+        resp = _get_whole(client, {"where": json.dumps(where), "order": "objectId", "limit": page_size})
+        page = resp.json()["results"]
+        wire += _wire(resp, len(resp.content))
+        decoded += len(resp.content)
+        calls += 1
+        objects += len(page)
+        if len(page) < page_size:
+            return objects, wire, decoded, calls
+        last = page[-1]["objectId"]
+
+
+def _counters(client) -> tuple:
+    from src.utils import metrics
+
+    snap = metrics.snapshot()
+    return snap.get(f"parse.{client.name}.wire_bytes", 0), snap.get(f"parse.{client.name}.decoded_bytes", 0)
+
+
+def _peak_kb(fn) -> float:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def _chunked(body: bytes, size: int = 64 * 1024):
+    return (body[i:i + size] for i in range(0, len(body), size))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--codes", type=int, default=20000, help="PromoCodeInfo objects to seed")
+    parser.add_argument("--page-size", type=int, default=1000, help="Objects per scan page")
+    parser.add_argument("--checks", type=int, default=200, help="Existence checks per mode")
+    parser.add_argument("--keys", default="promoCodeId,promoCodeUser,promoCodeDuration",
+                        help="Comma-separated fields for the projected scan")
+    args = parser.parse_args()
+
+    standin = ParseStandIn().start()
+    os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-bench")
+    os.environ["PARSE_API_ROOT"] = standin.url
+    os.environ["PARSE_APP_ID"] = "bench"
+    from src.core.parse_api import get_client
+
+    client = get_client()
+    codes = _seed(standin, args.codes)
+    keys = [k for k in args.keys.split(",") if k]
+    print(f"seeded {len(codes):,} codes · page size {args.page_size} · keys {','.join(keys)}\n")
+
+    sample = random.choices(codes, k=args.checks)
+    start = time.perf_counter()
+    before = [_exists_before(client, c) for c in sample]
+    before_s = time.perf_counter() - start
+    wire0, decoded0 = _counters(client)
+    start = time.perf_counter()
+    assert all(client.exists("PromoCodeInfo", {"promoCodeId": c}) for c in sample)
+    after_s = time.perf_counter() - start
+    wire1, decoded1 = _counters(client)
+    n = args.checks
+    print(f"{'exists':<8} {'wire B/call':>12} {'decoded B/call':>15} {'ms/call':>8}")
+    print(f"{'before':<8} {sum(b[1] for b in before) / n:>12,.0f} {sum(b[2] for b in before) / n:>15,.0f} "
+          f"{before_s * 1000 / n:>8.2f}")
+    print(f"{'after':<8} {(wire1 - wire0) / n:>12,.0f} {(decoded1 - decoded0) / n:>15,.0f} "
+          f"{after_s * 1000 / n:>8.2f}\n")
+
+    start = time.perf_counter()
+    objects, wire, decoded, calls = _scan_before(client, args.page_size)
+    before_s = time.perf_counter() - start
+    wire0, decoded0 = _counters(client)
+    start = time.perf_counter()
+    scanned = sum(1 for _ in client.iter_promos({}, keys, page_size=args.page_size))
+    after_s = time.perf_counter() - start
+    wire1, decoded1 = _counters(client)
+    assert scanned == objects, (scanned, objects)
+    print(f"{'scan':<8} {'wire B/call':>12} {'decoded B/call':>15} {'total s':>8} {'peak KB/page':>13}")
+    whole_body = _get_whole(client, {"limit": args.page_size}).content
+    projected_body = _get_whole(client, {"limit": args.page_size, "keys": ",".join(keys)}).content
+    whole = lambda: len(json.loads(whole_body)["results"])  # noqa: E731
+    streamed = lambda: sum(1 for _ in iter_array(_chunked(projected_body), "results"))  # noqa: E731
+    print(f"{'before':<8} {wire / calls:>12,.0f} {decoded / calls:>15,.0f} {before_s:>8.2f} "
+          f"{_peak_kb(whole):>13,.0f}")
+    print(f"{'after':<8} {(wire1 - wire0) / calls:>12,.0f} {(decoded1 - decoded0) / calls:>15,.0f} "
+          f"{after_s:>8.2f} {_peak_kb(streamed):>13,.0f}")
+    standin.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Cold-start benchmark: time-to-ready and time-to-first-code.
+
+Starts a local Parse stand-in that charges --connect-latency for every new
+connection (standing in for DNS + TLS setup to Back4App) and --latency per
+request, then launches fresh Python processes that import the app, start
+background services, wait --think seconds (a user filling in the modal)
+and mint one code. Each run is repeated with and without pre-warming.
+
+    python scripts/bench_startup.py
+    python scripts/bench_startup.py --runs 10 --connect-latency 0.3 --think 0.5
+
+Slack itself is not contacted: auth.test is stubbed in the child processes.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from parse_standin import ParseStandIn  # noqa: E402
+
+
+# Runs in the child process; prints the startup timeline as JSON
+CHILD = r"""
+import json, sys, time
+sys.path.insert(0, ".")
+from src.utils import startup
+from unittest import mock
+from slack_sdk.web.slack_response import SlackResponse
+
+def auth_test(*args, **kwargs):
+    data = {"ok": True, "user_id": "UBENCH", "bot_id": "BBENCH", "team_id": "TBENCH"}
+    return SlackResponse(client=None, http_verb="POST", api_url="", req_args={}, data=data, headers={}, status_code=200)
+
+with mock.patch("slack_sdk.WebClient.auth_test", auth_test):
+    import app
+app.start_background_services()
+startup.mark("ready")
+
+time.sleep(float(sys.argv[1]))
+startup.mark("confirm")
+from src.core.promo_generator import create_promo_for_user
+create_promo_for_user("bench@example.com", "BENCH-", "30D", "BENCH")
+print("TIMELINE " + json.dumps(dict(startup.timeline())))
+"""
+
+
+def _run_child(env: dict, think: float) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, str(think)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    line = next(l for l in out.splitlines() if l.startswith("TIMELINE "))
+    return json.loads(line[len("TIMELINE "):])
+
+
+def _median(runs: list, key) -> float:
+    return statistics.median(key(r) for r in runs)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Processes per mode")
+    parser.add_argument("--connect-latency", type=float, default=0.15, help="Stand-in delay per new connection (s)")
+    parser.add_argument("--latency", type=float, default=0.02, help="Stand-in delay per request (s)")
+    parser.add_argument("--think", type=float, default=1.0, help="Seconds between ready and the first confirm")
+    args = parser.parse_args()
+
+    standin = ParseStandIn(latency=args.latency, connect_latency=args.connect_latency).start()
+    base_env = dict(
+        os.environ,
+        PARSE_API_ROOT=standin.url,
+        PARSE_APP_ID="bench",
+        SLACK_BOT_TOKEN="xoxb-bench",
+        SLACK_APP_TOKEN="xapp-bench",
+        PROMO_MIRROR_PATH="",
+        PROMO_METRICS_LOG_SECONDS="0",
+        PROMO_RESERVATIONS_ENABLED="0",
+        PROMO_SUFFIX_POLICY_PATH="",
+    )
+
+    print(f"{args.runs} runs per mode · connect {args.connect_latency * 1000:.0f}ms · "
+          f"request {args.latency * 1000:.0f}ms · think {args.think:.1f}s")
+    print(f"{'mode':<12} {'imports':>9} {'ready':>9} {'first code':>11} {'confirm→code':>13}")
+    for label, prewarm in (("cold", "0"), ("prewarmed", "1")):
+        runs = [_run_child(dict(base_env, PROMO_PREWARM=prewarm), args.think) for _ in range(args.runs)]
+        print(f"{label:<12} "
+              f"{_median(runs, lambda r: r['imports']):>7.0f}ms "
+              f"{_median(runs, lambda r: r['ready']):>7.0f}ms "
+              f"{_median(runs, lambda r: r['first_code']):>9.0f}ms "
+              f"{_median(runs, lambda r: r['first_code'] - r['confirm']):>11.0f}ms")
+
+    standin.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
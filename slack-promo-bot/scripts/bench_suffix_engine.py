@@ -0,0 +1,87 @@
+"""
+Benchmark: suffix generation, random.choice loop vs. the batched CSPRNG engine.
+
+For 1k / 100k / 1M four-character suffixes, times:
+
+  * legacy    - the old _gen_suffix body, random.choice per character
+  * next      - SuffixEngine.next_suffix(), one call per suffix (the
+                create_promo_for_user path)
+  * batch     - SuffixEngine.suffixes(n), one call for all of them
+  * stream    - SuffixEngine.stream(), the generator for batched paths
+
+and checks the engine's output is uniform with a chi-square test over the
+symbol counts of the largest run.
+
+    python scripts/bench_suffix_engine.py
+    python scripts/bench_suffix_engine.py --sizes 1000 100000
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-bench")
+os.environ.setdefault("PARSE_APP_ID", "bench")
+
+from src.core.promo_generator import _CHARS  # noqa: E402
+from src.core.suffix_engine import SuffixEngine  # noqa: E402
+
+
+def legacy(n: int, length: int) -> list:
+    return ["".join(random.choice(_CHARS) for _ in range(length)) for _ in range(n)]
+
+
+def chi_square(suffixes: list) -> tuple:
+    """(statistic, degrees of freedom) for symbol counts against uniform."""
+    counts = Counter(itertools.chain.from_iterable(suffixes))
+    total = sum(counts.values())
+    expected = total / len(_CHARS)
+    return sum((counts.get(c, 0) - expected) ** 2 / expected for c in _CHARS), len(_CHARS) - 1
+
+
+def _time(fn) -> tuple:
+    t0 = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t0, out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--length", type=int, default=4)
+    args = parser.parse_args()
+
+    engine = SuffixEngine(_CHARS)
+    modes = {
+        "legacy": lambda n: legacy(n, args.length),
+        "next": lambda n: [engine.next_suffix(args.length) for _ in range(n)],
+        "batch": lambda n: engine.suffixes(n, args.length),
+        "stream": lambda n: list(itertools.islice(engine.stream(args.length), n)),
+    }
+
+    print(f"{'codes':>10} " + " ".join(f"{m:>10}" for m in modes) + f" {'speed-up':>9}")
+    sample = []
+    for n in args.sizes:
+        times = {}
+        for mode, fn in modes.items():
+            times[mode], out = _time(lambda: fn(n))
+            assert len(out) == n and all(len(s) == args.length for s in out)
+            if mode == "batch":
+                sample = out
+        print(f"{n:>10,} " + " ".join(f"{times[m] * 1000:>8.1f}ms" for m in modes)
+              + f" {times['legacy'] / times['batch']:>8.0f}×")
+
+    stat, dof = chi_square(sample)
+    # 99.9th percentile of chi-square with 35 dof is ~66.6
+    verdict = "uniform" if stat < 66.6 or dof != 35 else "NOT uniform"
+    print(f"chi-square over {len(sample) * args.length:,} symbols: {stat:.1f} ({dof} dof) → {verdict}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
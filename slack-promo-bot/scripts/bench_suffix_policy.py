@@ -0,0 +1,86 @@
+"""
+Simulation: uniqueness lookups per code vs. prefix occupancy.
+
+Mints codes into one prefix (in memory, no Parse) until the fixed-length
+suffix space is --fill full, once with the old fixed 4-character suffix
+and once with the adaptive SuffixPolicy, and prints the mean number of
+candidates (= promo_exists lookups) per code for each occupancy band,
+next to the analytic 1 / (1 - occupancy).
+
+A 16-symbol alphabet keeps the run short (65,536 four-character codes);
+collision behaviour depends only on occupancy, so the curves match the
+real 36-symbol space.
+
+    python scripts/bench_suffix_policy.py
+    python scripts/bench_suffix_policy.py --alphabet ABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890 --fill 0.9
+"""
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-bench")
+os.environ.setdefault("PARSE_APP_ID", "bench")
+
+from src.core import promo_generator  # noqa: E402
+from src.core.suffix_policy import SuffixPolicy  # noqa: E402
+
+
+BANDS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99)
+
+
+def simulate(space: int, codes: int, policy=None, base_length: int = 4) -> list:
+    """Mint ``codes`` codes; returns candidates needed for each code, in order."""
+    taken = set()
+    per_code = []
+    for _ in range(codes):
+        length = policy.length_for("SIM-") if policy else base_length
+        seen, candidates = set(), 0
+        while True:
+            candidates += 1
+            code = promo_generator._gen_suffix(seen, length)
+            if code not in taken:
+                break
+        taken.add(code)
+        per_code.append(candidates)
+        if policy:
+            policy.record("SIM-", length, candidates - 1)
+    return per_code
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alphabet", default="ABCDEFGHIJKLMNOP", help="Suffix alphabet")
+    parser.add_argument("--fill", type=float, default=0.95, help="Stop at this fraction of the 4-char space")
+    parser.add_argument("--threshold", type=float, default=1.5, help="Adaptive: max expected attempts per code")
+    args = parser.parse_args()
+
+    promo_generator._CHARS = args.alphabet
+    promo_generator._engine = promo_generator.SuffixEngine(args.alphabet)
+    space = len(args.alphabet) ** 4
+    codes = int(space * args.fill)
+    print(f"{len(args.alphabet)}-symbol alphabet · {space:,} four-character suffixes · minting {codes:,} codes")
+
+    fixed = simulate(space, codes)
+    policy = SuffixPolicy(path="", observe_ttl=0, min_length=4, max_length=6, max_expected_attempts=args.threshold)
+    adaptive = simulate(space, codes, policy=policy)
+
+    print(f"{'occupancy':>12} {'analytic':>9} {'fixed 4':>9} {'adaptive':>9}")
+    lo = 0
+    for band in BANDS:
+        hi = min(codes, int(space * band))
+        if hi <= lo:
+            continue
+        mid = (lo + hi) / 2 / space
+        f = sum(fixed[lo:hi]) / (hi - lo)
+        a = sum(adaptive[lo:hi]) / (hi - lo)
+        print(f"{lo / space:>5.0%}–{hi / space:<5.0%} {1 / (1 - mid):>9.2f} {f:>9.2f} {a:>9.2f}")
+        lo = hi
+    print(f"{'total':>12} {'':>9} {sum(fixed):>9,} {sum(adaptive):>9,}   lookups")
+    print(f"adaptive suffix length at the end: {policy.length_for('SIM-')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""
+Minimal in-memory Parse Server stand-in for local stress tests and benchmarks.
+
+Implements just enough of the REST API for this bot: class queries (equality,
+$in/$nin/$ne/$gt/$gte/$lt/$lte/$regex/$exists/$or, order, keys, limit, skip,
+count), creates with unique-field enforcement (error 137, like a unique
+index), updates (including Delete/Increment ops), /batch, /config and /health.
+Responses of 1 KB or more are gzipped when the client accepts it (set
+``compress = False`` to turn that off). Set ``down = True`` to answer
+everything with 503 (an outage).
+
+Usage as a library:
+    standin = ParseStandIn(latency=0.005).start()
+    os.environ["PARSE_API_ROOT"] = standin.url
+    ...
+    standin.stop()
+
+Or standalone:
+    python scripts/parse_standin.py --port 1337
+"""
+import argparse
+import gzip
+import json
+import random
+import re
+import string
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+DUPLICATE_VALUE = 137
+
+
+def _now_iso() -> str:
+    now = datetime.now(timezone.utc)
+    return now.strftime("%Y-%m-%dT%H:%M:%S.") + f"{now.microsecond // 1000:03d}Z"
+
+
+def _plain(value):
+    """Unwrap Parse Date objects to their ISO string for comparisons."""
+    if isinstance(value, dict) and value.get("__type") == "Date":
+        return value.get("iso")
+    return value
+
+
+def _matches(obj: dict, where: dict) -> bool:
+    for key, cond in where.items():
+        if key == "$or":
+            if not any(_matches(obj, sub) for sub in cond):
+                return False
+            continue
+        value = _plain(obj.get(key))
+        if isinstance(cond, dict) and any(k.startswith("$") for k in cond):
+            for op, arg in cond.items():
+                arg = _plain(arg)
+                if op == "$in" and value not in arg:
+                    return False
+                if op == "$nin" and value in arg:
+                    return False
+                if op == "$ne" and value == arg:
+                    return False
+                if op == "$exists" and (key in obj) != bool(arg):
+                    return False
+                if op == "$regex" and not (isinstance(value, str) and re.search(arg, value)):
+                    return False
+                if op in ("$gt", "$gte", "$lt", "$lte"):
+                    if value is None:
+                        return False
+                    if op == "$gt" and not value > arg:
+                        return False
+                    if op == "$gte" and not value >= arg:
+                        return False
+                    if op == "$lt" and not value < arg:
+                        return False
+                    if op == "$lte" and not value <= arg:
+                        return False
+        elif value != _plain(cond):
+            return False
+    return True
+
+
+class ParseStandIn:
+    """An in-memory Parse Server, served over HTTP from a background thread."""
+
+    def __init__(self, unique=(("PromoCodeReservation", "key"),), latency: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0, connect_latency: float = 0.0):
+        self.unique = set(unique)
+        self.latency = latency
+        self.connect_latency = connect_latency  # per new connection (stands in for TLS setup)
+        self.down = False  # answer every request with 503 (simulated outage)
+        self.compress = True  # gzip responses >= 1 KB if the client accepts gzip
+        self.connections = 0
+        self.classes = {}
+        self.config = {}
+        self.requests = 0
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "ParseStandIn":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def objects(self, class_name: str) -> list:
+        with self.lock:
+            return [dict(o) for o in self.classes.get(class_name, {}).values()]
+
+    # --- operations (called with the lock held) ---
+
+    def _create(self, class_name: str, body: dict):
+        store = self.classes.setdefault(class_name, {})
+        for cls, field in self.unique:
+            if cls == class_name and field in body:
+                if any(o.get(field) == body[field] for o in store.values()):
+                    return 400, {"code": DUPLICATE_VALUE, "error": "A duplicate value for a field with unique values was provided"}
+        oid = body.get("objectId") or "".join(random.choices(string.ascii_letters + string.digits, k=10))
+        if oid in store:
+            return 400, {"code": DUPLICATE_VALUE, "error": "Duplicate objectId"}
+        now = _now_iso()
+        store[oid] = dict(body, objectId=oid, createdAt=now, updatedAt=now)
+        return 201, {"objectId": oid, "createdAt": now}
+
+    def _update(self, class_name: str, oid: str, body: dict):
+        obj = self.classes.get(class_name, {}).get(oid)
+        if obj is None:
+            return 404, {"code": 101, "error": "Object not found."}
+        for key, value in body.items():
+            if isinstance(value, dict) and value.get("__op") == "Delete":
+                obj.pop(key, None)
+            elif isinstance(value, dict) and value.get("__op") == "Increment":
+                obj[key] = obj.get(key, 0) + value.get("amount", 1)
+            else:
+                obj[key] = value
+        obj["updatedAt"] = _now_iso()
+        return 200, {"updatedAt": obj["updatedAt"], **{k: obj[k] for k in body if k in obj}}
+
+    def _query(self, class_name: str, params: dict):
+        where = json.loads(params.get("where", "{}") or "{}")
+        rows = [o for o in self.classes.get(class_name, {}).values() if _matches(o, where)]
+        for field in reversed([f for f in params.get("order", "").split(",") if f]):
+            desc = field.startswith("-")
+            name = field.lstrip("-")
+            rows.sort(key=lambda o: (_plain(o.get(name)) is None, _plain(o.get(name)) or ""), reverse=desc)
+        result = {}
+        if params.get("count") == "1":
+            result["count"] = len(rows)
+        skip, limit = int(params.get("skip", 0)), int(params.get("limit", 100))
+        rows = rows[skip:skip + limit]
+        keys = [k for k in params.get("keys", "").split(",") if k]
+        if keys:
+            always = {"objectId", "createdAt", "updatedAt"}
+            rows = [{k: v for k, v in o.items() if k in always or k in keys} for o in rows]
+        result["results"] = [dict(o) for o in rows]
+        return 200, result
+
+    def _dispatch(self, method: str, path: str, params: dict, body):
+        parts = [p for p in path.split("/") if p]
+        with self.lock:
+            self.requests += 1
+            if parts == ["health"]:
+                return 200, {"status": "ok"}
+            if parts == ["config"] and method == "GET":
+                return 200, {"params": dict(self.config)}
+            if parts == ["batch"] and method == "POST":
+                out = []
+                for req in body.get("requests", []):
+                    sub = [p for p in req["path"].split("/") if p]
+                    sub = sub[sub.index("classes"):]
+                    if req["method"] == "POST":
+                        status, res = self._create(sub[1], req.get("body") or {})
+                    else:
+                        status, res = self._update(sub[1], sub[2], req.get("body") or {})
+                    out.append({"success": res} if status < 300 else {"error": res})
+                return 200, out
+            if len(parts) >= 2 and parts[0] == "classes":
+                if method == "GET" and len(parts) == 2:
+                    return self._query(parts[1], params)
+                if method == "POST" and len(parts) == 2:
+                    return self._create(parts[1], body or {})
+                if method == "PUT" and len(parts) == 3:
+                    return self._update(parts[1], parts[2], body or {})
+        return 404, {"code": 119, "error": f"unsupported: {method} {path}"}
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # headers and body are separate writes
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                with standin.lock:
+                    standin.connections += 1
+                if standin.connect_latency:
+                    time.sleep(standin.connect_latency)
+                super().setup()
+
+            def _serve(self, method):
+                if standin.latency:
+                    time.sleep(standin.latency)
+                url = urlparse(self.path)
+                params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                if standin.down:
+                    status, payload = 503, {"error": "Service Unavailable"}
+                else:
+                    status, payload = standin._dispatch(method, url.path, params, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                if standin.compress and len(data) >= 1024 and "gzip" in self.headers.get("Accept-Encoding", ""):
+                    data = gzip.compress(data, compresslevel=6)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._serve("GET")
+
+            def do_POST(self):
+                self._serve("POST")
+
+            def do_PUT(self):
+                self._serve("PUT")
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-memory Parse Server stand-in")
+    parser.add_argument("--port", type=int, default=1337)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of delay per request")
+    parser.add_argument("--connect-latency", type=float, default=0.0, help="Seconds of delay per new connection")
+    args = parser.parse_args()
+    standin = ParseStandIn(latency=args.latency, port=args.port, connect_latency=args.connect_latency).start()
+    print(f"Parse stand-in listening on {standin.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    main()
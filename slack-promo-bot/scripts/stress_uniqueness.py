@@ -0,0 +1,111 @@
+"""
+Multi-process stress test: many replicas minting codes for one prefix at once.
+
+Starts a local Parse stand-in (with a unique index on the reservation key and
+artificial latency to widen the check-then-create window), then runs
+--processes worker processes with --threads threads each, all calling
+create_promo_for_user() against a deliberately tiny suffix space so that
+almost every attempt collides. Afterwards it counts duplicate promoCodeIds.
+
+    python scripts/stress_uniqueness.py                     # reservations on: expect 0 duplicates
+    python scripts/stress_uniqueness.py --no-reservations   # control run: duplicates expected
+
+Exits non-zero if any duplicate code was created with reservations enabled.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from parse_standin import ParseStandIn  # noqa: E402
+
+
+PREFIX = "STRESS-"
+
+
+def _worker(args):
+    """Runs in a child process: mint codes from several threads."""
+    worker_id, threads, per_thread, alphabet = args
+    os.environ["PROMO_REPLICA_ID"] = f"stress-{worker_id}"
+    from src.core import promo_generator
+
+    # Shrink the suffix space so collisions (and races) are the common case
+    promo_generator._CHARS = alphabet
+    promo_generator._engine = promo_generator.SuffixEngine(alphabet)
+
+    def mint(t):
+        ok, failed = [], 0
+        for i in range(per_thread):
+            try:
+                ok.append(promo_generator.create_promo_for_user(
+                    f"w{worker_id}t{t}n{i}@stress.test", PREFIX, "30D", "STRESS"))
+            except Exception:
+                failed += 1
+        return ok, failed
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(mint, range(threads)))
+    return [c for ok, _ in results for c in ok], sum(f for _, f in results)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--per-thread", type=int, default=6, help="Codes each thread tries to mint")
+    parser.add_argument("--alphabet", default="ABCD", help="Suffix alphabet (4 chars -> 256 codes)")
+    parser.add_argument("--latency", type=float, default=0.003, help="Stand-in delay per request (seconds)")
+    parser.add_argument("--no-reservations", action="store_true", help="Control run without reservations")
+    args = parser.parse_args()
+
+    standin = ParseStandIn(latency=args.latency).start()
+    os.environ.update({
+        "PARSE_API_ROOT": standin.url,
+        "PARSE_APP_ID": "stress",
+        "SLACK_BOT_TOKEN": os.environ.get("SLACK_BOT_TOKEN", "xoxb-stress"),
+        "SLACK_APP_TOKEN": os.environ.get("SLACK_APP_TOKEN", "xapp-stress"),
+        "PROMO_RESERVATIONS_ENABLED": "0" if args.no_reservations else "1",
+        "PROMO_MIRROR_PATH": "",
+        # Keep the suffix space tiny: no adaptive growth, nothing persisted
+        "PROMO_SUFFIX_MAX_LENGTH": "4",
+        "PROMO_SUFFIX_POLICY_PATH": "",
+    })
+
+    space = len(args.alphabet) ** 4
+    attempts = args.processes * args.threads * args.per_thread
+    print(f"{args.processes} processes × {args.threads} threads × {args.per_thread} codes = {attempts} "
+          f"requests for a {space}-code space · reservations {'OFF' if args.no_reservations else 'ON'}")
+
+    started = time.monotonic()
+    ctx = multiprocessing.get_context("spawn")
+    jobs = [(w, args.threads, args.per_thread, args.alphabet) for w in range(args.processes)]
+    with ctx.Pool(args.processes) as pool:
+        results = pool.map(_worker, jobs)
+    elapsed = time.monotonic() - started
+
+    reported = [c for codes, _ in results for c in codes]
+    failed = sum(f for _, f in results)
+    stored = Counter(o["promoCodeId"] for o in standin.objects("PromoCodeInfo"))
+    duplicates = {code: n for code, n in stored.items() if n > 1}
+    standin.stop()
+
+    print(f"minted {len(reported)} codes ({len(set(reported))} distinct) · gave up {failed} · "
+          f"{standin.requests} Parse requests · {elapsed:.1f}s")
+    print(f"duplicate codes in PromoCodeInfo: {len(duplicates)}")
+    for code, n in sorted(duplicates.items())[:10]:
+        print(f"  {code} × {n}")
+
+    if args.no_reservations:
+        return 0
+    return 1 if duplicates or len(reported) != len(set(reported)) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 """Configuration settings for the Promo Bot."""
 import os
+import socket
 from dotenv import load_dotenv
 
 # Load .env for local dev
@@ -7,7 +8,30 @@ load_dotenv()
 
 # --- Slack tokens ---
 SLACK_BOT_TOKEN = os.environ["SLACK_BOT_TOKEN"]    # xoxb-***
-SLACK_APP_TOKEN = os.environ["SLACK_APP_TOKEN"]    # xapp-***
+SLACK_APP_TOKEN = os.environ.get("SLACK_APP_TOKEN", "")            # xapp-*** (Socket Mode only)
+SLACK_SIGNING_SECRET = os.environ.get("SLACK_SIGNING_SECRET", "")  # HTTP mode only
+
+# --- Local state ---
+# Default home of the SQLite/JSON files below (audit log, rollups, parked jobs, ...).
+# Mount a volume here: on an ephemeral filesystem they are lost on every deploy.
+PROMO_DATA_DIR = os.getenv("PROMO_DATA_DIR", "data").strip()
+
+
+def _data_path(name: str) -> str:
+    return os.path.join(PROMO_DATA_DIR, name)
+
+
+# Held by the one worker process that runs periodic tasks (capacity alerts, digest, mirror sync)
+PROMO_LEADER_LOCK_PATH = os.getenv("PROMO_LEADER_LOCK_PATH", _data_path("leader.lock")).strip()
+
+
+# --- Serving mode ---
+# "socket": one Socket Mode websocket (default, no inbound port needed)
+# "http":   Events API over HTTP, served by gunicorn with several workers
+PROMO_SERVE_MODE = os.getenv("PROMO_SERVE_MODE", "socket").strip().lower()
+PORT = int(os.getenv("PORT", "3000"))
+PROMO_HTTP_WORKERS = int(os.getenv("PROMO_HTTP_WORKERS", "2"))
+PROMO_HTTP_THREADS = int(os.getenv("PROMO_HTTP_THREADS", "8"))
 
 # --- Parse/Back4App setup ---
 os.environ.setdefault("PARSE_API_ROOT", os.getenv("PARSE_API_ROOT", "https://parseapi.back4app.com/"))
@@ -15,15 +39,187 @@ os.environ.setdefault("PARSE_API_ROOT", os.getenv("PARSE_API_ROOT", "https://par
 PARSE_APP_ID   = os.environ["PARSE_APP_ID"]
 PARSE_REST_KEY = os.environ.get("PARSE_REST_KEY", "")
 PARSE_MASTER   = os.environ.get("PARSE_MASTER_KEY", "")
+PARSE_POOL_SIZE = int(os.getenv("PARSE_POOL_SIZE", "10"))  # keep-alive connections kept per host
+PARSE_RATE_LIMIT = float(os.getenv("PARSE_RATE_LIMIT", "0"))  # requests/second to Parse; 0 = unlimited
+
+# --- Parse environments ---
+# The app above is the default environment. PARSE_ENVIRONMENTS=staging,... adds more apps,
+# each configured by PARSE_<NAME>_API_ROOT, PARSE_<NAME>_APP_ID, PARSE_<NAME>_MASTER_KEY
+# (or PARSE_<NAME>_REST_KEY) and optionally PARSE_<NAME>_RATE_LIMIT.
+PARSE_DEFAULT_ENVIRONMENT = os.getenv("PARSE_DEFAULT_ENVIRONMENT", "production").strip().lower()
+
+
+def _environment_setting(name: str, key: str) -> str:
+    """Required PARSE_<NAME>_<KEY> of an extra environment, with an error naming what is missing."""
+    var = f"PARSE_{name.upper()}_{key}"
+    value = os.getenv(var, "").strip()
+    if not value:
+        raise RuntimeError(f"PARSE_ENVIRONMENTS lists {name!r}, but {var} is not set")
+    return value
+
+
+PARSE_ENVIRONMENTS = {
+    PARSE_DEFAULT_ENVIRONMENT: {
+        "api_root": os.environ["PARSE_API_ROOT"], "app_id": PARSE_APP_ID,
+        "master_key": PARSE_MASTER, "rest_key": PARSE_REST_KEY, "rate_limit": PARSE_RATE_LIMIT,
+    },
+    **{
+        name: {
+            "api_root": _environment_setting(name, "API_ROOT"),
+            "app_id": _environment_setting(name, "APP_ID"),
+            "master_key": os.getenv(f"PARSE_{name.upper()}_MASTER_KEY", ""),
+            "rest_key": os.getenv(f"PARSE_{name.upper()}_REST_KEY", ""),
+            "rate_limit": float(os.getenv(f"PARSE_{name.upper()}_RATE_LIMIT", "0")),
+        }
+        for name in (n.strip().lower() for n in os.getenv("PARSE_ENVIRONMENTS", "").split(","))
+        if name and name != PARSE_DEFAULT_ENVIRONMENT
+    },
+}
+# Prefixes minted in another environment unless the form picks one, e.g. "AVZ-STG-=staging"
+PARSE_PREFIX_ENVIRONMENTS = {
+    k.strip(): v.strip().lower() for k, _, v in
+    (item.partition("=") for item in os.getenv("PARSE_PREFIX_ENVIRONMENTS", "").split(",") if "=" in item)
+}
+
+# Circuit breaker: once PARSE_BREAKER_FAILURE_RATE of the last PARSE_BREAKER_WINDOW calls
+# (at least PARSE_BREAKER_MIN_CALLS) timed out or got a 5xx/429, Parse calls fail fast.
+# After PARSE_BREAKER_COOLDOWN_SECONDS one probe call is let through (doubling up to 5 min).
+PARSE_BREAKER_WINDOW = int(os.getenv("PARSE_BREAKER_WINDOW", "20"))
+PARSE_BREAKER_MIN_CALLS = int(os.getenv("PARSE_BREAKER_MIN_CALLS", "8"))
+PARSE_BREAKER_FAILURE_RATE = float(os.getenv("PARSE_BREAKER_FAILURE_RATE", "0.5"))
+PARSE_BREAKER_COOLDOWN_SECONDS = float(os.getenv("PARSE_BREAKER_COOLDOWN_SECONDS", "15"))
+# Jobs interrupted by an open breaker wait in this SQLite file (shared by all worker processes)
+# until Parse recovers ("" keeps them in memory only)
+PROMO_DEFERRED_PATH = os.getenv("PROMO_DEFERRED_PATH", _data_path("deferred_jobs.sqlite3")).strip()
+
+# Unfinished jobs of every worker process, so job controls reach the worker running the job
+# ("" keeps them in memory only, i.e. controls only work in the worker running the job)
+PROMO_JOB_REGISTRY_PATH = os.getenv("PROMO_JOB_REGISTRY_PATH", _data_path("jobs.sqlite3")).strip()
 
 # --- Promo defaults ---
 DEFAULT_PREFIX   = os.getenv("PROMO_PREFIX", "AVZ-2DA-")
 DEFAULT_DURATION = os.getenv("PROMO_DURATION", "LIFETIME")
 DEFAULT_PARTNER  = os.getenv("PROMO_PARTNER",  "AVAZ")
 
+# Prefixes offered in the generation form (custom prefixes can still be typed in)
+PROMO_PREFIXES = (
+    "AVZ-2DA-",
+    "AVZ-ACE-",
+    "AVZ-ACE1Y-",
+    "AVZ-ACAP-",
+    "AVZ-ARMB-",
+    "AVZ-ACAPEXT-",
+    "AVZ-SPEXT-",
+    "AVZ-RZPLT-",
+    "AVZ-STRLT-",
+    "AVZ-LOANER-",
+    "AVZ-MGRT-",
+    "AVZ-LEGACY-",
+)
+
+# --- Suffix length ---
+# New codes get longer suffixes once a prefix is so full that a code needs more than
+# PROMO_SUFFIX_MAX_EXPECTED_ATTEMPTS candidates on average. Grown lengths are persisted.
+PROMO_SUFFIX_POLICY_PATH = os.getenv("PROMO_SUFFIX_POLICY_PATH", _data_path("suffix_policy.json")).strip()
+# How often the suffix lengths already in use are re-read from Parse (0 = trust the local file only)
+PROMO_SUFFIX_OBSERVE_SECONDS = float(os.getenv("PROMO_SUFFIX_OBSERVE_SECONDS", "600"))
+PROMO_SUFFIX_MIN_LENGTH = int(os.getenv("PROMO_SUFFIX_MIN_LENGTH", "4"))
+PROMO_SUFFIX_MAX_LENGTH = int(os.getenv("PROMO_SUFFIX_MAX_LENGTH", "6"))
+PROMO_SUFFIX_MAX_EXPECTED_ATTEMPTS = float(os.getenv("PROMO_SUFFIX_MAX_EXPECTED_ATTEMPTS", "1.5"))
+
+# Capacity report: minting rate window, alert horizon, and how often to check (0 = never)
+PROMO_CAPACITY_RATE_DAYS = float(os.getenv("PROMO_CAPACITY_RATE_DAYS", "30"))
+PROMO_CAPACITY_ALERT_DAYS = float(os.getenv("PROMO_CAPACITY_ALERT_DAYS", "30"))
+PROMO_CAPACITY_ALERT_HOURS = float(os.getenv("PROMO_CAPACITY_ALERT_HOURS", "0"))
+
+# --- Multi-replica uniqueness ---
+# When enabled, every code is claimed through a reservation object before it is created.
+# Requires a unique index on PROMO_RESERVATION_CLASS.key (see README).
+PROMO_RESERVATIONS_ENABLED = os.getenv("PROMO_RESERVATIONS_ENABLED", "0") == "1"
+PROMO_RESERVATION_CLASS = os.getenv("PROMO_RESERVATION_CLASS", "PromoCodeReservation")
+PROMO_REPLICA_ID = os.getenv("PROMO_REPLICA_ID", "") or f"{socket.gethostname()}:{os.getpid()}"
+
+# --- Local mirror (optional) ---
+# Path to a SQLite file mirroring PromoCodeInfo; empty disables the mirror.
+PROMO_MIRROR_PATH = os.getenv("PROMO_MIRROR_PATH", "").strip()
+PROMO_MIRROR_SYNC_SECONDS = float(os.getenv("PROMO_MIRROR_SYNC_SECONDS", "60"))
+# The incremental sync cannot see deletes; a full objectId scan drops them this often (0 = never)
+PROMO_MIRROR_RECONCILE_SECONDS = float(os.getenv("PROMO_MIRROR_RECONCILE_SECONDS", "86400"))
+
+# --- Audit log ---
+# SQLite file recording every finished job and code (append-only); empty disables it.
+PROMO_AUDIT_PATH = os.getenv("PROMO_AUDIT_PATH", _data_path("promo_audit.sqlite3")).strip()
+# Queued jobs are committed together: at most every N seconds, or once this many are queued
+PROMO_AUDIT_FLUSH_SECONDS = float(os.getenv("PROMO_AUDIT_FLUSH_SECONDS", "1"))
+PROMO_AUDIT_BATCH_JOBS = int(os.getenv("PROMO_AUDIT_BATCH_JOBS", "100"))
+
+# --- Usage rollups (/promo-stats) ---
+# SQLite file of hour/day/month counters per prefix x partner x requester; empty disables them.
+PROMO_ROLLUPS_PATH = os.getenv("PROMO_ROLLUPS_PATH", _data_path("promo_rollups.sqlite3")).strip()
+
 # --- Notification settings ---
 PROMO_NOTIFY_CHANNEL = os.getenv("PROMO_NOTIFY_CHANNEL", "").strip()  # Slack channel ID (e.g., C0123456789)
 ENABLE_CONVERSATIONS_JOIN = os.getenv("ENABLE_CONVERSATIONS_JOIN", "0") == "1"
+# "immediate" posts one notification per job; "digest" buffers them into periodic summaries
+PROMO_NOTIFY_MODE = os.getenv("PROMO_NOTIFY_MODE", "immediate").strip().lower()
+# "full" repeats every code in the notify post; "permalink" posts a summary linking to the results
+PROMO_NOTIFY_DETAIL = os.getenv("PROMO_NOTIFY_DETAIL", "full").strip().lower()
+# Results with more rows than this are uploaded once as a CSV file instead of a message (0 = never)
+PROMO_RESULTS_FILE_ROWS = int(os.getenv("PROMO_RESULTS_FILE_ROWS", "0"))
+# Digest: flush every N seconds, or as soon as this many codes are buffered
+PROMO_DIGEST_INTERVAL_SECONDS = float(os.getenv("PROMO_DIGEST_INTERVAL_SECONDS", "3600"))
+PROMO_DIGEST_MAX_ROWS = int(os.getenv("PROMO_DIGEST_MAX_ROWS", "5000"))
+# Buffered digest entries are kept in this SQLite file, shared by all worker processes
+# ("" keeps them in memory only)
+PROMO_DIGEST_PATH = os.getenv("PROMO_DIGEST_PATH", _data_path("notify_digest.sqlite3")).strip()
+
+# --- Slack responsiveness ---
+# Submissions with more entries than this are acked first and validated afterwards
+PROMO_INLINE_VALIDATION_MAX_IDS = int(os.getenv("PROMO_INLINE_VALIDATION_MAX_IDS", "200"))
+
+# --- Generation options ---
+# Pre-tick "reuse existing codes" on the form: users who already hold an active code
+# with the chosen prefix get that code back instead of a new one
+PROMO_SKIP_EXISTING = os.getenv("PROMO_SKIP_EXISTING", "0") == "1"
+# Open Parse connections and build view templates in the background at startup
+PROMO_PREWARM = os.getenv("PROMO_PREWARM", "1") == "1"
+PROMO_PREWARM_CONNECTIONS = int(os.getenv("PROMO_PREWARM_CONNECTIONS", "2"))
+# How often to log metrics (ack-latency histograms etc.); 0 disables
+PROMO_METRICS_LOG_SECONDS = float(os.getenv("PROMO_METRICS_LOG_SECONDS", "300"))
+
+# --- Generation scheduling ---
+# Codes minted concurrently by the bot across all jobs (its share of Parse throughput)
+PROMO_PARSE_BUDGET = int(os.getenv("PROMO_PARSE_BUDGET", "4"))
+# Codes one requester may have in flight at once
+PROMO_REQUESTER_MAX_INFLIGHT = int(os.getenv("PROMO_REQUESTER_MAX_INFLIGHT", "2"))
+# Each scheduler is per process, so in HTTP mode the limits above are split evenly between the
+# PROMO_HTTP_WORKERS gunicorn workers (at least 1 each)
+_BUDGET_SHARES = max(1, PROMO_HTTP_WORKERS) if PROMO_SERVE_MODE == "http" else 1
+PROMO_WORKER_PARSE_BUDGET = max(1, PROMO_PARSE_BUDGET // _BUDGET_SHARES)
+PROMO_WORKER_REQUESTER_MAX_INFLIGHT = max(1, PROMO_REQUESTER_MAX_INFLIGHT // _BUDGET_SHARES)
+# Codes a requester may take per scheduling round (multiplied by its weight)
+PROMO_SCHEDULER_QUANTUM = float(os.getenv("PROMO_SCHEDULER_QUANTUM", "1"))
+# Per-requester weights, e.g. "U0123ABC=2,U0456DEF=0.5" (default weight 1)
+PROMO_REQUESTER_WEIGHTS = {
+    k.strip(): float(v) for k, _, v in
+    (item.partition("=") for item in os.getenv("PROMO_REQUESTER_WEIGHTS", "").split(",") if "=" in item)
+}
+
+# --- Hot reload ---
+# Runtime settings (defaults, notify channel, authorization, ...) can be overridden
+# without a restart from a JSON file and/or Parse Config; see src/live_config.py.
+PROMO_CONFIG_FILE = os.getenv("PROMO_CONFIG_FILE", "").strip()
+PROMO_CONFIG_FROM_PARSE = os.getenv("PROMO_CONFIG_FROM_PARSE", "0") == "1"
+PROMO_CONFIG_POLL_SECONDS = float(os.getenv("PROMO_CONFIG_POLL_SECONDS", "10"))
+
+# --- Lookup settings ---
+PROMO_LOOKUP_PAGE_SIZE  = int(os.getenv("PROMO_LOOKUP_PAGE_SIZE", "10"))
+PROMO_LOOKUP_CACHE_SIZE = int(os.getenv("PROMO_LOOKUP_CACHE_SIZE", "2048"))
+PROMO_LOOKUP_CACHE_TTL  = float(os.getenv("PROMO_LOOKUP_CACHE_TTL", "60"))  # seconds
+
+# --- Slack conversation cache (user -> DM channel, joined channels) ---
+PROMO_CONVERSATION_CACHE_SIZE = int(os.getenv("PROMO_CONVERSATION_CACHE_SIZE", "4096"))
+PROMO_CONVERSATION_CACHE_TTL  = float(os.getenv("PROMO_CONVERSATION_CACHE_TTL", "86400"))  # seconds
 
 # --- Authorization / guard rails ---
 # Comma-separated Slack user IDs allowed to generate promos (e.g., "U0123ABC,U0456DEF").
@@ -31,3 +227,14 @@ ENABLE_CONVERSATIONS_JOIN = os.getenv("ENABLE_CONVERSATIONS_JOIN", "0") == "1"
 PROMO_AUTHORIZED_USER_IDS = {
     u.strip() for u in os.getenv("PROMO_AUTHORIZED_USER_IDS", "").split(",") if u.strip()
 }
+# Slack user group IDs (S...) and channel IDs (C...) whose members are also allowed.
+# Membership is resolved in the background (needs usergroups:read / channels:read, groups:read).
+PROMO_AUTHORIZED_USERGROUP_IDS = {
+    g.strip() for g in os.getenv("PROMO_AUTHORIZED_USERGROUP_IDS", "").split(",") if g.strip()
+}
+PROMO_AUTHORIZED_CHANNEL_IDS = {
+    c.strip() for c in os.getenv("PROMO_AUTHORIZED_CHANNEL_IDS", "").split(",") if c.strip()
+}
+PROMO_AUTHZ_REFRESH_SECONDS = float(os.getenv("PROMO_AUTHZ_REFRESH_SECONDS", "300"))
+# Members of a group/channel that has not loaded for this long (refreshes keep failing) are no longer trusted
+PROMO_AUTHZ_TTL_SECONDS = float(os.getenv("PROMO_AUTHZ_TTL_SECONDS", "3600"))
@@ -0,0 +1,259 @@
+"""Append-only local audit log of generation jobs.
+
+Every finished job (who asked, why, prefix/duration/partner, each code or
+error, and how long it queued and ran) is appended to a SQLite file in
+WAL mode. Writes are queued and committed in batches by a background
+thread, so finishing a job never waits on disk. Rows are never updated or
+deleted (triggers enforce it), and indexes on requester, code, user and
+time keep ``/promo-audit`` lookups in the milliseconds with millions of
+entries.
+"""
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from src.config import PROMO_AUDIT_PATH, PROMO_AUDIT_FLUSH_SECONDS, PROMO_AUDIT_BATCH_JOBS
+from src.utils.durations import iso_utc
+from src.utils.sqlite_db import connect
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           INTEGER PRIMARY KEY,
+    job_id       TEXT NOT NULL,
+    requester    TEXT NOT NULL,
+    notes        TEXT,
+    prefix       TEXT,
+    duration     TEXT,
+    partner      TEXT,
+    target       TEXT,
+    status       TEXT,
+    total        INTEGER,
+    errors       INTEGER,
+    submitted_at TEXT,
+    finished_at  TEXT NOT NULL,
+    wait_ms      INTEGER,
+    run_ms       INTEGER,
+    environment  TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_requester ON jobs (requester, finished_at);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at);
+CREATE TABLE IF NOT EXISTS entries (
+    id         INTEGER PRIMARY KEY,
+    job        INTEGER NOT NULL REFERENCES jobs (id),
+    user       TEXT NOT NULL,
+    code       TEXT,
+    error      TEXT,
+    existing   INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_job ON entries (job);
+CREATE INDEX IF NOT EXISTS entries_code ON entries (code) WHERE code IS NOT NULL;
+CREATE INDEX IF NOT EXISTS entries_user ON entries (user, created_at);
+CREATE INDEX IF NOT EXISTS entries_created ON entries (created_at);
+CREATE TRIGGER IF NOT EXISTS jobs_append_only_u BEFORE UPDATE ON jobs
+    BEGIN SELECT RAISE(ABORT, 'audit log is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS jobs_append_only_d BEFORE DELETE ON jobs
+    BEGIN SELECT RAISE(ABORT, 'audit log is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS entries_append_only_u BEFORE UPDATE ON entries
+    BEGIN SELECT RAISE(ABORT, 'audit log is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS entries_append_only_d BEFORE DELETE ON entries
+    BEGIN SELECT RAISE(ABORT, 'audit log is append-only'); END;
+"""
+
+_ENTRY_COLUMNS = ("created_at", "user", "code", "error", "existing", "job_id", "requester", "prefix", "duration",
+                  "partner", "notes", "environment")
+
+# Columns added after the first release: (table, column, definition)
+_ADDED_COLUMNS = (
+    ("entries", "existing", "INTEGER NOT NULL DEFAULT 0"),
+    ("jobs", "environment", "TEXT"),
+)
+
+
+def job_record(job) -> dict:
+    """Audit record for a finished GenerationJob (wall-clock times from its monotonic ones)."""
+    now_wall, now_mono = datetime.now(timezone.utc), time.monotonic()
+    finished = job.finished_at if job.finished_at is not None else now_mono
+    started = job.started_at if job.started_at is not None else finished
+    return {
+        "job_id": job.job_id, "requester": job.requester, "notes": job.notes, "prefix": job.prefix,
+        "duration": job.duration, "partner": job.partner, "target": job.target, "status": job.status,
+        "total": job.total, "errors": job.errors,
+        "submitted_at": iso_utc(now_wall - timedelta(seconds=now_mono - job.submitted_at)),
+        "finished_at": iso_utc(now_wall - timedelta(seconds=now_mono - finished)),
+        "wait_ms": int((started - job.submitted_at) * 1000),
+        "run_ms": int((finished - started) * 1000),
+        "environment": job.environment,
+        "rows": [(r.user_id, r.code_or_error, r.existing) for r in job.rows],
+    }
+
+
+class AuditLog:
+    """
+    SQLite-backed, append-only audit log, safe to share between threads.
+
+    Args:
+        path: SQLite file (":memory:" for a throwaway log)
+        flush_seconds: Longest a queued job waits before being committed
+        batch_jobs: Commit as soon as this many jobs are queued
+    """
+
+    def __init__(self, path: str, flush_seconds: float = PROMO_AUDIT_FLUSH_SECONDS,
+                 batch_jobs: int = PROMO_AUDIT_BATCH_JOBS):
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self.batch_jobs = batch_jobs
+        self._conn = connect(path)
+        for table, column, definition in _ADDED_COLUMNS:
+            columns = [col[1] for col in self._conn.execute(f"PRAGMA table_info({table})")]
+            if columns and column not in columns:  # a log created before the column existed
+                self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = None
+
+    # --- writes ---
+
+    def append(self, record: dict) -> None:
+        """Queue one job record (see job_record()); committed by the writer thread."""
+        self._queue.put(record)
+        if self._thread is None or not self._thread.is_alive():
+            self._start_writer()
+
+    def flush(self) -> int:
+        """Commit everything queued so far, in one transaction; returns the number of jobs."""
+        records = []
+        while True:
+            try:
+                records.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return self.write(records)
+
+    def write(self, records: list) -> int:
+        """Append ``records`` in a single transaction."""
+        if not records:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for r in records:
+                    cur = self._conn.execute(
+                        """INSERT INTO jobs (job_id, requester, notes, prefix, duration, partner, target, status,
+                                             total, errors, submitted_at, finished_at, wait_ms, run_ms, environment)
+                           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                        (r["job_id"], r["requester"], r["notes"], r["prefix"], r["duration"], r["partner"],
+                         r["target"], r["status"], r["total"], r["errors"], r["submitted_at"],
+                         r["finished_at"], r["wait_ms"], r["run_ms"], r.get("environment")),
+                    )
+                    job = cur.lastrowid
+                    entries = []
+                    for uid, c, *flags in r["rows"]:  # flags: [existing], absent in older records
+                        failed = str(c).startswith("ERROR:")
+                        entries.append((job, uid, None if failed else c, c if failed else None,
+                                        1 if flags and flags[0] else 0, r["finished_at"]))
+                    self._conn.executemany(
+                        "INSERT INTO entries (job, user, code, error, existing, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                        entries,
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(records)
+
+    def _start_writer(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+
+            def loop():
+                while True:
+                    batch = [self._queue.get()]
+                    deadline = time.monotonic() + self.flush_seconds
+                    while len(batch) < self.batch_jobs:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        try:
+                            batch.append(self._queue.get(timeout=remaining))
+                        except queue.Empty:
+                            break
+                    try:
+                        self.write(batch)
+                    except Exception as e:
+                        print(f"[audit] write of {len(batch)} job(s) failed, retrying: {e}")
+                        for r in batch:
+                            self._queue.put(r)
+                        time.sleep(self.flush_seconds or 1)
+
+            self._thread = threading.Thread(target=loop, name="promo-audit-writer", daemon=True)
+            self._thread.start()
+
+    # --- reads ---
+
+    def query(self, requester: str = None, code: str = None, user: str = None,
+              since: str = None, until: str = None, limit: int = 20) -> tuple:
+        """
+        Audit entries matching every given filter, newest first.
+
+        Args:
+            requester: Slack user ID of whoever generated the codes
+            code: Exact promo code
+            user: User ID the code was generated for
+            since: ISO date/time, inclusive
+            until: ISO date/time, exclusive
+            limit: Maximum entries returned
+
+        Returns:
+            (total matching entries, list of entry dicts)
+        """
+        where, params = [], []
+        for column, value in (("e.code", code), ("e.user", user), ("j.requester", requester)):
+            if value:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if since:
+            where.append("e.created_at >= ?")
+            params.append(since)
+        if until:
+            where.append("e.created_at < ?")
+            params.append(until)
+        clause = ("WHERE " + " AND ".join(where)) if where else ""
+        sql_from = f"FROM entries e JOIN jobs j ON j.id = e.job {clause}"
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) {sql_from}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"""SELECT e.created_at, e.user, e.code, e.error, e.existing, j.job_id, j.requester, j.prefix, j.duration,
+                           j.partner, j.notes, j.environment {sql_from} ORDER BY e.created_at DESC, e.id DESC LIMIT ?""",
+                params + [limit],
+            ).fetchall()
+        return total, [dict(zip(_ENTRY_COLUMNS, row)) for row in rows]
+
+    def stats(self) -> dict:
+        """Row counts (for logs)."""
+        with self._lock:
+            jobs = self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {"jobs": jobs, "entries": entries, "queued": self._queue.qsize()}
+
+
+_audit = None
+_audit_lock = threading.Lock()
+
+
+def get_audit_log():
+    """Return the process-wide audit log, or None if PROMO_AUDIT_PATH is unset."""
+    global _audit
+    if not PROMO_AUDIT_PATH:
+        return None
+    if _audit is None:
+        with _audit_lock:
+            if _audit is None:
+                _audit = AuditLog(PROMO_AUDIT_PATH)
+                atexit.register(_audit.flush)  # commit what the writer has not yet
+    return _audit
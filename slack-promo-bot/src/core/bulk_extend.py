@@ -0,0 +1,210 @@
+"""Bulk validity extension for existing promo codes."""
+import csv
+import re
+
+from src.core.parse_api import iter_promos, batch_update, BATCH_LIMIT
+from src.utils.durations import LIFETIME, add_durations, extend_end_date, parse_duration
+from src.utils.progress import Throughput
+from src.utils.validation import normalize_user_id, validate_user_id
+
+
+# Only the fields needed to compute the new validity are fetched
+EXTEND_KEYS = ("promoCodeId", "promoCodeUser", "promoCodeDuration", "promoCodeEndDate")
+
+# How many example rows of each kind the report keeps
+_SAMPLE_LIMIT = 20
+
+
+def read_extension_csv(path: str):
+    """
+    Stream (user_id, extension) rows from a CSV file.
+
+    Column 1 is the user's email or phone; an optional column 2 overrides the
+    extension for that row (e.g., "30D"). Rows are yielded one at a time so
+    arbitrarily large files never sit in memory.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip():
+                continue
+            ext = row[1].strip().upper() if len(row) > 1 and row[1].strip() else None
+            yield normalize_user_id(row[0]), ext
+
+
+class ExtensionReport:
+    """Counters, samples and throughput for one extension run."""
+
+    def __init__(self, dry_run: bool):
+        self.dry_run = dry_run
+        self.meter = Throughput()
+        self.resumed_from = 0
+        self.aborted = ""
+        self.changes = []    # (code, user, old_duration, new_duration)
+        self.not_found = []  # user IDs without matching codes
+        self.failures = []   # (code or user, error)
+
+    def _sample(self, bucket: list, item) -> None:
+        if len(bucket) < _SAMPLE_LIMIT:
+            bucket.append(item)
+
+    def format(self) -> str:
+        """Render the report as Slack/terminal-friendly text."""
+        m = self.meter
+        verb = "Would extend" if self.dry_run else "Extended"
+        lines = [
+            f"*Validity extension {'dry run' if self.dry_run else 'report'}*",
+            f"Rows read: {m.get('rows')} · Invalid rows: {m.get('invalid')} · Users without codes: {m.get('not_found')}",
+            f"{verb}: {m.get('extended')} codes · Unchanged (LIFETIME): {m.get('unchanged')} · Errors: {m.get('errors')}",
+            f"Throughput: {m.summary('rows', 'extended')} · Parse batches: {m.get('batches')}",
+        ]
+        if self.resumed_from:
+            lines.append(f"Resumed from checkpoint at row {self.resumed_from}")
+        if self.aborted:
+            lines.append(f"*Aborted:* {self.aborted} (re-run to resume from the last checkpoint)")
+        for code, uid, old, new in self.changes:
+            lines.append(f"• `{code}` (`{uid}`): `{old}` → `{new}`")
+        if m.get("extended") > len(self.changes):
+            lines.append(f"_...and {m.get('extended') - len(self.changes)} more_")
+        if self.not_found:
+            lines.append("No codes found for: " + ", ".join(f"`{u}`" for u in self.not_found))
+        for what, err in self.failures:
+            lines.append(f"• `{what}` → _ERROR: {err}_")
+        return "\n".join(lines)
+
+
+def _extension_fields(obj: dict, extension: str):
+    """Compute the new validity fields for one code, or None if unchanged."""
+    current = obj.get("promoCodeDuration") or LIFETIME
+    if parse_duration(current) is None:
+        return None
+
+    fields = {"promoCodeDuration": add_durations(current, extension)}
+    end_date = obj.get("promoCodeEndDate")
+    if end_date:
+        if parse_duration(extension) is None:
+            fields["promoCodeEndDate"] = {"__op": "Delete"}
+        else:
+            fields["promoCodeEndDate"] = extend_end_date(end_date, extension)
+    return fields
+
+
+def _process_chunk(chunk: dict, prefix: str, dry_run: bool, report: ExtensionReport,
+                   applied: set, on_batch) -> None:
+    """Fetch the codes for one chunk of users and extend them."""
+    where = {"promoCodeUser": {"$in": list(chunk)}}
+    if prefix:
+        where["promoCodeId"] = {"$regex": "^" + re.escape(prefix)}
+
+    found, pending = set(), []
+    for obj in iter_promos(where, keys=EXTEND_KEYS):
+        uid = obj.get("promoCodeUser", "")
+        found.add(uid)
+        if obj["objectId"] in applied:
+            continue  # already extended before a crash/abort
+        try:
+            fields = _extension_fields(obj, chunk[uid])
+        except ValueError as e:
+            report.meter.add("errors")
+            report._sample(report.failures, (obj.get("promoCodeId", obj["objectId"]), e))
+            continue
+        if fields is None:
+            report.meter.add("unchanged")
+            continue
+        pending.append((obj, fields))
+
+    for uid in chunk:
+        if uid not in found:
+            report.meter.add("not_found")
+            report._sample(report.not_found, uid)
+
+    for i in range(0, len(pending), BATCH_LIMIT):
+        batch = pending[i:i + BATCH_LIMIT]
+        results = [{"success": {}}] * len(batch) if dry_run else \
+            batch_update([(obj["objectId"], fields) for obj, fields in batch])
+        report.meter.add("batches")
+        for (obj, fields), result in zip(batch, results):
+            code = obj.get("promoCodeId", obj["objectId"])
+            if "error" in result:
+                report.meter.add("errors")
+                report._sample(report.failures, (code, result["error"].get("error", result["error"])))
+                continue
+            report.meter.add("extended")
+            applied.add(obj["objectId"])
+            report._sample(report.changes, (code, obj.get("promoCodeUser", ""),
+                                            obj.get("promoCodeDuration"), fields["promoCodeDuration"]))
+        on_batch()
+
+
+def extend_validity(rows, extension: str, prefix: str = "", dry_run: bool = False,
+                    checkpoint=None, chunk_size: int = BATCH_LIMIT, on_progress=None) -> ExtensionReport:
+    """
+    Extend the validity of every code held by the given users.
+
+    Users are processed in chunks: each chunk is one (or a few) `$in` queries
+    plus one /batch PUT per BATCH_LIMIT codes, instead of a query and a save
+    per user.
+
+    Args:
+        rows: Iterable of (user_id, extension_or_None) tuples, e.g. from read_extension_csv()
+        extension: Default extension (e.g., "30D", "6M", "LIFETIME")
+        prefix: Only extend codes starting with this prefix (optional)
+        dry_run: Compute and report changes without writing anything
+        checkpoint: Optional Checkpoint; the run resumes from and records progress there
+        chunk_size: Users per `$in` query
+        on_progress: Optional callback(report) invoked after every chunk
+
+    Returns:
+        ExtensionReport (check ``aborted`` for a run that stopped early)
+    """
+    parse_duration(extension)  # fail fast on a bad default
+    report = ExtensionReport(dry_run)
+
+    # Dry runs neither read nor advance the checkpoint
+    state = checkpoint.load() if (checkpoint and not dry_run) else {}
+    start = int(state.get("rows_done", 0))
+    applied = set(state.get("applied", []))
+    report.resumed_from = start
+
+    rows_done = start
+    chunk = {}
+
+    def save(done):
+        if checkpoint and not dry_run:
+            checkpoint.save({"rows_done": done, "applied": sorted(applied)})
+
+    def flush(next_done):
+        _process_chunk(chunk, prefix, dry_run, report, applied, lambda: save(rows_done))
+        applied.clear()
+        chunk.clear()
+        save(next_done)
+        if on_progress:
+            on_progress(report)
+
+    try:
+        for idx, (uid, ext) in enumerate(rows):
+            if idx < start:
+                continue
+            report.meter.add("rows")
+            ext = ext or extension
+            try:
+                parse_duration(ext)
+            except ValueError:
+                ext = None
+            if not validate_user_id(uid) or ext is None:
+                report.meter.add("invalid")
+                continue
+            # The same user twice in one chunk gets both extensions
+            chunk[uid] = add_durations(chunk[uid], ext) if uid in chunk else ext
+            if len(chunk) >= chunk_size:
+                flush(idx + 1)
+                rows_done = idx + 1
+        if chunk:
+            flush(start + report.meter.get("rows"))
+    except Exception as e:
+        report.aborted = str(e)
+        print(f"[extend] aborted: {e}")
+        return report
+
+    if checkpoint and not dry_run:
+        checkpoint.clear()
+    return report
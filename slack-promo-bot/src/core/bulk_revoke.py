@@ -0,0 +1,250 @@
+"""Bulk revocation of promo codes by prefix, partner, user list or explicit codes."""
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from src.core.parse_api import iter_promos, batch_update, BATCH_LIMIT
+from src.utils.progress import Throughput
+
+
+# Only objectId and the code itself are needed to revoke
+REVOKE_KEYS = ("promoCodeId",)
+
+# How many example codes the report keeps
+_SAMPLE_LIMIT = 20
+
+
+def _chunks(items, size: int = BATCH_LIMIT):
+    """Group any iterable into lists of ``size`` without materialising it."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def build_selectors(prefix: str = "", partner: str = "", users=None, codes=None):
+    """
+    Yield Parse ``where`` clauses that together select the codes to revoke.
+
+    ``prefix`` and ``partner`` narrow every clause; ``users`` and ``codes``
+    (iterables, possibly huge) are turned into one `$in` clause per chunk.
+    Already-revoked codes are always excluded, so re-running a revoke is
+    harmless and picks up exactly where it left off.
+
+    Raises:
+        ValueError: If no selector is given at all
+    """
+    if not (prefix or partner or users is not None or codes is not None):
+        raise ValueError("Give at least one of prefix, partner, users or codes.")
+
+    base = {"promoCodeRevoked": {"$ne": True}}
+    prefix_rx = {"$regex": "^" + re.escape(prefix)} if prefix else None
+    if prefix_rx:
+        base["promoCodeId"] = prefix_rx
+    if partner:
+        base["promoCodeDistributionPartner"] = partner
+
+    if users is None and codes is None:
+        yield base
+        return
+
+    for chunk in _chunks(users or ()):
+        yield {**base, "promoCodeUser": {"$in": chunk}}
+    for chunk in _chunks(codes or ()):
+        yield {**base, "promoCodeId": {"$in": chunk, **(prefix_rx or {})}}
+
+
+def revoke_fields(reason: str, revoked_by: str) -> dict:
+    """
+    Fields written to a revoked code.
+
+    ``promoCodeDeviceCountLimit`` is zeroed because that is what the apps
+    already enforce; the ``promoCodeRevoked*`` fields record who/why/when.
+    """
+    now = datetime.now(timezone.utc)
+    return {
+        "promoCodeRevoked": True,
+        "promoCodeRevokedAt": {"__type": "Date", "iso": now.strftime("%Y-%m-%dT%H:%M:%S.") + f"{now.microsecond // 1000:03d}Z"},
+        "promoCodeRevokedBy": revoked_by,
+        "promoCodeRevokeReason": reason,
+        "promoCodeDeviceCountLimit": 0,
+    }
+
+
+class RevokeReport:
+    """Counters, samples and throughput for one revoke run."""
+
+    def __init__(self, dry_run: bool):
+        self.dry_run = dry_run
+        self.meter = Throughput()
+        self.lock = threading.Lock()
+        self.resumed = False
+        self.aborted = ""
+        self.sample = []    # codes revoked (or that would be)
+        self.failures = []  # (code or "batch", error)
+
+    def add(self, name: str, n: int = 1) -> None:
+        with self.lock:
+            self.meter.add(name, n)
+
+    def format(self) -> str:
+        """Render the report as Slack/terminal-friendly text."""
+        m = self.meter
+        verb = "Would revoke" if self.dry_run else "Revoked"
+        lines = [
+            f"*Bulk revoke {'dry run' if self.dry_run else 'summary'}*",
+            f"Matched: {m.get('matched')} · {verb}: {m.get('revoked')} · Errors: {m.get('errors')} · Failed batches: {m.get('failed_batches')}",
+            f"Throughput: {m.summary('matched', 'revoked')} · Parse batches: {m.get('batches')}",
+        ]
+        if self.resumed:
+            lines.append("Resumed from checkpoint")
+        if self.aborted:
+            lines.append(f"*Aborted:* {self.aborted} (re-run to resume from the last checkpoint)")
+        if m.get("failed_batches"):
+            lines.append("*Some batches failed* — re-run the same revoke to retry them.")
+        if self.sample:
+            more = m.get("revoked") - len(self.sample)
+            lines.append("Codes: " + ", ".join(f"`{c}`" for c in self.sample) + (f" _...and {more} more_" if more > 0 else ""))
+        for what, err in self.failures:
+            lines.append(f"• `{what}` → _ERROR: {err}_")
+        return "\n".join(lines)
+
+
+class _Watermark:
+    """
+    Tracks out-of-order batch completion and checkpoints the highest
+    position below which *every* batch has finished.
+    """
+
+    def __init__(self, checkpoint):
+        self.checkpoint = checkpoint
+        self.lock = threading.Lock()
+        self.next_seq = 0
+        self.saved_seq = 0
+        self.positions = {}
+        self.done = set()
+        self.broken = False
+
+    def register(self, position: tuple) -> int:
+        with self.lock:
+            seq = self.next_seq
+            self.next_seq += 1
+            self.positions[seq] = position
+            return seq
+
+    def complete(self, seq: int, ok: bool = True) -> None:
+        with self.lock:
+            if not ok:
+                self.broken = True  # never checkpoint past a failed batch
+            self.done.add(seq)
+            if self.broken:
+                return
+            position = None
+            while self.saved_seq in self.done:
+                self.done.discard(self.saved_seq)
+                position = self.positions.pop(self.saved_seq)
+                self.saved_seq += 1
+            if position and self.checkpoint:
+                self.checkpoint.save({"selector": position[0], "after": position[1]})
+
+
+def revoke_codes(selectors, reason: str, revoked_by: str, dry_run: bool = False,
+                 concurrency: int = 4, checkpoint=None, page_size: int = 500,
+                 on_progress=None) -> RevokeReport:
+    """
+    Revoke every code matched by ``selectors``.
+
+    Matching objectIds are streamed with an objectId cursor and revoked in
+    /batch chunks of BATCH_LIMIT, with at most ``concurrency`` batches in
+    flight and at most twice that many buffered — memory stays flat no
+    matter how many rows match.
+
+    Args:
+        selectors: Iterable of where clauses (see build_selectors())
+        reason: Why the codes are revoked (stored on each code)
+        revoked_by: Who revoked them (Slack user ID or "cli:<user>")
+        dry_run: Count matches without writing anything
+        concurrency: Maximum /batch requests in flight
+        checkpoint: Optional Checkpoint to resume from and record progress in
+        page_size: Objects per Parse query page
+        on_progress: Optional callback(report), called after each batch
+
+    Returns:
+        RevokeReport
+    """
+    report = RevokeReport(dry_run)
+    state = checkpoint.load() if (checkpoint and not dry_run) else {}
+    start_sel, start_after = int(state.get("selector", 0)), state.get("after", "")
+    report.resumed = bool(state)
+
+    fields = revoke_fields(reason, revoked_by)
+    watermark = _Watermark(None if dry_run else checkpoint)
+    slots = threading.BoundedSemaphore(max(1, concurrency) * 2)
+
+    def run(seq: int, batch: list) -> None:
+        ok = True
+        try:
+            if dry_run:
+                results = [{"success": {}}] * len(batch)
+            else:
+                results = batch_update([(obj["objectId"], fields) for obj in batch])
+            report.add("batches")
+            for obj, result in zip(batch, results):
+                code = obj.get("promoCodeId", obj["objectId"])
+                if "error" in result:
+                    report.add("errors")
+                    with report.lock:
+                        if len(report.failures) < _SAMPLE_LIMIT:
+                            report.failures.append((code, result["error"].get("error", result["error"])))
+                    continue
+                report.add("revoked")
+                with report.lock:
+                    if len(report.sample) < _SAMPLE_LIMIT:
+                        report.sample.append(code)
+        except Exception as e:
+            ok = False
+            report.add("failed_batches")
+            with report.lock:
+                if len(report.failures) < _SAMPLE_LIMIT:
+                    report.failures.append(("batch", e))
+            print(f"[revoke] batch failed: {e}")
+        finally:
+            watermark.complete(seq, ok)
+            slots.release()
+            if on_progress:
+                on_progress(report)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        def submit(position: tuple, batch: list) -> None:
+            slots.acquire()  # back-pressure: stop reading while the pool is saturated
+            seq = watermark.register(position)
+            pool.submit(run, seq, batch)
+
+        try:
+            for sel_idx, where in enumerate(selectors):
+                if sel_idx < start_sel:
+                    continue
+                after = start_after if sel_idx == start_sel else ""
+                batch = []
+                for obj in iter_promos(where, keys=REVOKE_KEYS, page_size=page_size, after=after):
+                    report.add("matched")
+                    batch.append(obj)
+                    if len(batch) >= BATCH_LIMIT:
+                        submit((sel_idx, batch[-1]["objectId"]), batch)
+                        batch = []
+                if batch:
+                    submit((sel_idx, batch[-1]["objectId"]), batch)
+                # Marks the whole selector as done once everything before it is
+                watermark.complete(watermark.register((sel_idx + 1, "")))
+        except Exception as e:
+            report.aborted = str(e)
+            print(f"[revoke] aborted: {e}")
+
+    if checkpoint and not dry_run and not watermark.broken and not report.aborted:
+        checkpoint.clear()
+    return report
@@ -0,0 +1,212 @@
+"""
+Prefix capacity report: how full each prefix's suffix space is and when
+uniqueness retries will become costly.
+
+Occupancy ``o`` of a suffix space means a random candidate is taken with
+probability ``o``, so a code costs ``1 / (1 - o)`` candidates (Parse
+lookups) on average. Retries count as costly once that passes
+PROMO_SUFFIX_MAX_EXPECTED_ATTEMPTS, the same threshold the suffix policy
+grows at.
+"""
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+from src.config import (
+    PROMO_PREFIXES,
+    PROMO_SUFFIX_MIN_LENGTH,
+    PROMO_SUFFIX_MAX_LENGTH,
+    PROMO_SUFFIX_MAX_EXPECTED_ATTEMPTS,
+    PROMO_CAPACITY_RATE_DAYS,
+    PROMO_CAPACITY_ALERT_DAYS,
+)
+from src.core.mirror import get_mirror
+from src.core.parse_api import count_promos, current as current_parse, iter_promos, parse_date
+from src.core.promo_generator import _CHARS
+from src.core.suffix_policy import get_suffix_policy
+from src.utils import metrics
+from src.utils.durations import iso_utc
+from src.utils.leader import is_leader
+from src.utils.validation import promo_code_prefix
+
+
+class PrefixCapacity(NamedTuple):
+    prefix: str
+    length: int            # suffix length new codes currently get
+    codes: int             # existing codes with that suffix length
+    recent: int            # of those, created in the last PROMO_CAPACITY_RATE_DAYS days
+    space: int             # possible suffixes of that length
+    measured_attempts: float  # mean candidates per code seen by this process (0 if none)
+
+    @property
+    def occupancy(self) -> float:
+        return self.codes / self.space
+
+    @property
+    def expected_attempts(self) -> float:
+        return 1.0 / max(1e-9, 1.0 - self.occupancy)
+
+    @property
+    def per_day(self) -> float:
+        return self.recent / PROMO_CAPACITY_RATE_DAYS
+
+    def days_until_costly(self, threshold: float = PROMO_SUFFIX_MAX_EXPECTED_ATTEMPTS):
+        """Days until expected attempts exceed ``threshold`` at the current rate (0 = already, None = never)."""
+        costly_at = (1.0 - 1.0 / threshold) * self.space
+        if self.codes >= costly_at:
+            return 0.0
+        if self.per_day <= 0:
+            return None
+        return (costly_at - self.codes) / self.per_day
+
+
+class CapacityReport:
+    """Capacity of every prefix, with formatting and alert selection."""
+
+    def __init__(self, prefixes: list, mode: str):
+        self.prefixes = sorted(prefixes, key=lambda p: -p.occupancy)
+        self.mode = mode
+        self.generated_at = datetime.now(timezone.utc)
+
+    def alerts(self, alert_days: float = PROMO_CAPACITY_ALERT_DAYS) -> list:
+        """
+        Prefixes that need attention.
+
+        A prefix below the maximum suffix length grows by itself, so it is
+        only flagged once it is already costly (its policy has not grown
+        yet). At the maximum length it is flagged when it will become
+        costly within ``alert_days``.
+        """
+        flagged = []
+        for p in self.prefixes:
+            days = p.days_until_costly()
+            if days == 0 or (p.length >= PROMO_SUFFIX_MAX_LENGTH and days is not None and days <= alert_days):
+                flagged.append(p)
+        return flagged
+
+    def format(self) -> str:
+        lines = [
+            f"*Prefix capacity* ({self.mode}, {self.generated_at:%Y-%m-%d %H:%M} UTC) · "
+            f"costly above {PROMO_SUFFIX_MAX_EXPECTED_ATTEMPTS:g} attempts/code",
+        ]
+        for p in self.prefixes:
+            days = p.days_until_costly()
+            when = "costly now" if days == 0 else "—" if days is None else f"costly in ~{days:,.0f}d"
+            measured = f" · measured {p.measured_attempts:.2f}" if p.measured_attempts else ""
+            grows = "" if p.length >= PROMO_SUFFIX_MAX_LENGTH else f" (then grows to {p.length + 1})"
+            lines.append(
+                f"• `{p.prefix}` {p.length} chars: {p.codes:,}/{p.space:,} ({p.occupancy:.1%}) · "
+                f"~{p.expected_attempts:.2f} attempts/code{measured} · {p.per_day:,.0f}/day · {when}"
+                f"{grows if days is not None else ''}"
+            )
+        if not self.prefixes:
+            lines.append("No prefixes found.")
+        return "\n".join(lines)
+
+
+def _suffix_pattern(prefix: str, length: int) -> str:
+    return "^" + re.escape(prefix) + "[" + re.escape(_CHARS) + "]{" + str(length) + "}$"
+
+
+def _measured_attempts(prefix: str) -> float:
+    stats = metrics.snapshot().get(f"promo.attempts.{prefix}")
+    return stats["mean"] if isinstance(stats, dict) and stats["count"] else 0.0
+
+
+def _count_mode(prefixes) -> list:
+    """Exact per-prefix counts from Parse count queries (two per prefix)."""
+    policy = get_suffix_policy()
+    since = parse_date(iso_utc(datetime.now(timezone.utc) - timedelta(days=PROMO_CAPACITY_RATE_DAYS)))
+    results = []
+    for prefix in prefixes:
+        length = policy.length_for(prefix)
+        where = {"promoCodeId": {"$regex": _suffix_pattern(prefix, length)}}
+        codes = count_promos(where)
+        recent = count_promos(dict(where, createdAt={"$gte": since})) if codes else 0
+        results.append(PrefixCapacity(prefix, length, codes, recent, len(_CHARS) ** length,
+                                      _measured_attempts(prefix)))
+    return results
+
+
+def _scan_mode(on_progress=None) -> list:
+    """Full scan of every code (mirror if ready, else Parse), discovering all prefixes."""
+    policy = get_suffix_policy()
+    cutoff = iso_utc(datetime.now(timezone.utc) - timedelta(days=PROMO_CAPACITY_RATE_DAYS))
+    counts, recent = {}, {}
+    mirror = get_mirror() if current_parse().is_default else None  # the mirror only copies the default env
+    if mirror and mirror.is_ready():
+        rows = mirror.iter_codes()
+    else:
+        rows = ((o.get("promoCodeId") or "", o.get("createdAt") or "")
+                for o in iter_promos({}, keys=["promoCodeId"], page_size=1000))
+    for n, (code, created_at) in enumerate(rows, 1):
+        prefix = promo_code_prefix(code)
+        key = (prefix, len(code) - len(prefix))
+        counts[key] = counts.get(key, 0) + 1
+        if created_at >= cutoff:
+            recent[key] = recent.get(key, 0) + 1
+        if on_progress and n % 10000 == 0:
+            on_progress(n)
+
+    results = []
+    for prefix in sorted({p for p, _ in counts}):
+        length = policy.length_for(prefix)
+        results.append(PrefixCapacity(prefix, length, counts.get((prefix, length), 0),
+                                      recent.get((prefix, length), 0), len(_CHARS) ** length,
+                                      _measured_attempts(prefix)))
+    return results
+
+
+def build_capacity_report(prefixes=None, full_scan: bool = False, on_progress=None) -> CapacityReport:
+    """
+    Build a capacity report.
+
+    Args:
+        prefixes: Prefixes to report on (default: the form's prefixes plus any
+            the suffix policy knows); ignored for a full scan
+        full_scan: Scan every code instead of counting per known prefix;
+            finds custom prefixes too, but reads the whole class
+        on_progress: Optional callback(rows_scanned) during a full scan
+
+    Returns:
+        CapacityReport
+    """
+    if full_scan:
+        return CapacityReport(_scan_mode(on_progress), "full scan")
+    if not prefixes:
+        prefixes = sorted(set(PROMO_PREFIXES) | set(get_suffix_policy().snapshot()))
+    return CapacityReport(_count_mode(prefixes), "index counts")
+
+
+def start_capacity_alerts(post, interval_hours: float) -> None:
+    """
+    Check capacity every ``interval_hours`` and ``post(text)`` any alerts.
+
+    Every worker starts the loop, but only the leader process checks and posts.
+
+    Args:
+        post: Callable taking the alert text (e.g. a notify-channel poster)
+        interval_hours: Hours between checks; 0 disables
+    """
+    if interval_hours <= 0:
+        return
+
+    def loop():
+        while True:
+            try:
+                flagged = []
+                if is_leader():
+                    report = build_capacity_report()
+                    flagged = report.alerts()
+                if flagged:
+                    lines = [f":warning: *Promo prefix capacity*: {len(flagged)} prefix(es) need attention"]
+                    lines += [line for line in report.format().splitlines()[1:]
+                              if any(f"`{p.prefix}`" in line for p in flagged)]
+                    post("\n".join(lines))
+            except Exception as e:
+                print(f"[capacity] check failed: {e}")
+            time.sleep(interval_hours * 3600)
+
+    threading.Thread(target=loop, name="promo-capacity-alerts", daemon=True).start()
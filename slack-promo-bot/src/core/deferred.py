@@ -0,0 +1,266 @@
+"""
+Jobs parked while Parse is down.
+
+When the Parse circuit breaker opens, a running job stops claiming codes
+and, once its in-flight codes are back, is parked here instead of turning
+every remaining user into an ``ERROR:`` row. Parked jobs are persisted
+(PROMO_DEFERRED_PATH) with the rows they already finished, so a restart
+does not lose them. A background thread probes each down environment
+through its breaker (the half-open check) and, once it closes, hands that
+environment's jobs back to be resubmitted, oldest first.
+
+The file is shared by every worker process. Each parked job belongs to
+the process that parked it, which keeps a heartbeat on it; a job whose
+owner stopped heartbeating (it exited or crashed) is adopted by exactly
+one other process, through an atomic claim of its row.
+"""
+import atexit
+import json
+import threading
+import time
+import uuid
+
+from src.config import PROMO_DEFERRED_PATH, PROMO_REPLICA_ID
+from src.utils import metrics
+from src.utils.sqlite_db import connect
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deferred (
+    job_id     TEXT PRIMARY KEY,
+    state      TEXT NOT NULL,  -- {"job": GenerationJob.snapshot(), "extra": {...}}
+    owner      TEXT NOT NULL,  -- process that holds the job; "" once released
+    heartbeat  REAL NOT NULL,  -- owner's last sign of life (epoch seconds)
+    parked_at  REAL NOT NULL
+);
+"""
+
+
+class DeferredJobs:
+    """
+    Durable queue of DEFERRED GenerationJobs.
+
+    A job is resubmitted once the breaker of its Parse environment
+    (``job.parse.breaker``) is closed.
+
+    Args:
+        path: SQLite file the queue is persisted to ("" keeps it in memory only)
+        stale_after: Seconds without a heartbeat before another process adopts a job
+    """
+
+    def __init__(self, path: str = PROMO_DEFERRED_PATH, stale_after: float = 60.0):
+        self.stale_after = stale_after
+        # Unique per process, even if a restarted container reuses the PID
+        self.owner = f"{PROMO_REPLICA_ID}/{uuid.uuid4().hex[:8]}"
+        self._conn = connect(path) if path else None
+        if self._conn:
+            self._conn.executescript(_SCHEMA)
+        self._jobs = []  # [(job, extra)] owned by this process
+        self._broken = set()  # job IDs this process failed to restore; not retried
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def park(self, job, **extra) -> None:
+        """
+        Add a DEFERRED job; ``extra`` (JSON-serializable) is saved and restored with it.
+        """
+        with self._lock:
+            self._jobs.append((job, extra))
+            self._save_locked(job, extra)
+            count = len(self._jobs)
+        metrics.counter("jobs.deferred").inc()
+        print(f"[deferred] job {job.job_id} parked at {job.completed}/{job.total} ({count} waiting)")
+        self._wake.set()
+
+    def remove(self, job) -> bool:
+        """Drop ``job`` (e.g. cancelled while parked). Returns False if it was not here."""
+        with self._lock:
+            kept = [(j, x) for j, x in self._jobs if j is not job]
+            if len(kept) == len(self._jobs):
+                return False
+            self._jobs = kept
+            self._delete_locked(job)
+        return True
+
+    def jobs(self) -> list:
+        """Jobs parked by this process, oldest first."""
+        with self._lock:
+            return [j for j, _ in self._jobs]
+
+    def find(self, job_id: str):
+        """The parked job with this ID, or None."""
+        with self._lock:
+            return next((j for j, _ in self._jobs if j.job_id == job_id), None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+    def drain(self, resubmit) -> int:
+        """
+        Hand parked jobs whose environment is up to ``resubmit(job)``, oldest first.
+
+        Each job is removed before resubmit() runs, so one that is deferred
+        again is parked afresh. If resubmit() returns False or raises, the
+        job is parked again and its environment is skipped until next time.
+
+        Returns:
+            Number of jobs resubmitted
+        """
+        drained, failed = 0, set()
+        while True:
+            with self._lock:
+                ready = [i for i, (j, _) in enumerate(self._jobs)
+                         if j.environment not in failed and j.parse.breaker.closed]
+                if not ready:
+                    break
+                job, extra = self._jobs.pop(ready[0])
+                self._delete_locked(job)
+            try:
+                ok = resubmit(job)
+            except Exception as e:
+                print(f"[deferred] resubmitting job {job.job_id} failed: {e}")
+                ok = False
+            if not ok:
+                with self._lock:
+                    self._jobs.insert(ready[0], (job, extra))
+                    self._save_locked(job, extra)
+                failed.add(job.environment)
+                continue
+            drained += 1
+        if drained:
+            metrics.counter("jobs.resumed").inc(drained)
+            print(f"[deferred] resumed {drained} job(s)")
+        return drained
+
+    def adopt(self, restore) -> int:
+        """
+        Claim and restore jobs whose owner stopped heartbeating (e.g. before a restart).
+
+        Each row is claimed with a compare-and-set on (owner, heartbeat), so
+        when several workers look at once exactly one of them gets a job.
+
+        Args:
+            restore: Callable(snapshot, extra) -> GenerationJob
+
+        Returns:
+            Number of jobs adopted
+        """
+        if not self._conn:
+            return 0
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id, state, owner, heartbeat FROM deferred WHERE owner != ? AND heartbeat < ? "
+                "ORDER BY parked_at",
+                (self.owner, now - self.stale_after),
+            ).fetchall()
+        adopted = 0
+        for job_id, state, owner, heartbeat in rows:
+            if job_id in self._broken:
+                continue
+            with self._lock:
+                claimed = self._conn.execute(
+                    "UPDATE deferred SET owner = ?, heartbeat = ? WHERE job_id = ? AND owner = ? AND heartbeat = ?",
+                    (self.owner, now, job_id, owner, heartbeat),
+                ).rowcount == 1
+            if not claimed:
+                continue  # another worker got there first
+            entry = json.loads(state)
+            extra = entry.get("extra") or {}
+            try:
+                job = restore(entry["job"], extra)
+            except Exception as e:
+                # e.g. its environment is no longer configured; hand it back untouched
+                print(f"[deferred] could not restore job {job_id}: {e}")
+                self._broken.add(job_id)
+                with self._lock:
+                    self._conn.execute("UPDATE deferred SET owner = ?, heartbeat = ? WHERE job_id = ?",
+                                       (owner, heartbeat, job_id))
+                continue
+            with self._lock:
+                self._jobs.append((job, extra))
+            adopted += 1
+        if adopted:
+            print(f"[deferred] adopted {adopted} parked job(s)")
+            self._wake.set()
+        return adopted
+
+    def heartbeat(self) -> None:
+        """Mark this process's jobs as still owned."""
+        if self._conn:
+            with self._lock:
+                self._conn.execute("UPDATE deferred SET heartbeat = ? WHERE owner = ?", (time.time(), self.owner))
+
+    def release(self) -> None:
+        """Give this process's jobs up for immediate adoption (clean shutdown)."""
+        if self._conn:
+            with self._lock:
+                self._conn.execute("UPDATE deferred SET owner = '', heartbeat = 0 WHERE owner = ?", (self.owner,))
+
+    def start(self, restore, resubmit, poll: float = 5.0) -> None:
+        """
+        Adopt orphaned jobs and drain the queue from a daemon thread whenever Parse is up.
+
+        Args:
+            restore: Callable(snapshot, extra) -> GenerationJob for jobs parked by another process
+            resubmit: Callable(job) -> bool that puts a job back on the scheduler
+            poll: Seconds between checks while jobs are waiting
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        atexit.register(self.release)
+        beat = self.stale_after / 3
+
+        def loop():
+            while True:
+                try:
+                    self.heartbeat()
+                    self.adopt(restore)
+                except Exception as e:
+                    print(f"[deferred] could not check the parked-job store: {e}")
+                waiting = {j.parse.name: j.parse for j in self.jobs()}
+                for client in waiting.values():
+                    if not client.breaker.closed and client.breaker.retry_in() == 0:
+                        client.probe()  # the half-open check; closes the breaker if Parse answers
+                if waiting:
+                    self.drain(resubmit)
+                retry_in = min((c.breaker.retry_in() for c in waiting.values()), default=0)
+                self._wake.wait(min(max(poll, min(retry_in, 60)), beat) if waiting else beat)
+                self._wake.clear()
+
+        self._thread = threading.Thread(target=loop, name="promo-deferred-jobs", daemon=True)
+        self._thread.start()
+
+    def _save_locked(self, job, extra: dict) -> None:
+        if self._conn:
+            try:
+                now = time.time()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO deferred (job_id, state, owner, heartbeat, parked_at) VALUES (?, ?, ?, ?, ?)",
+                    (job.job_id, json.dumps({"job": job.snapshot(), "extra": extra}), self.owner, now, now),
+                )
+            except Exception as e:
+                print(f"[deferred] could not persist parked job {job.job_id}: {e}")
+
+    def _delete_locked(self, job) -> None:
+        if self._conn:
+            try:
+                self._conn.execute("DELETE FROM deferred WHERE job_id = ? AND owner = ?", (job.job_id, self.owner))
+            except Exception as e:
+                print(f"[deferred] could not unpark job {job.job_id}: {e}")
+
+
+_deferred = None
+_deferred_lock = threading.Lock()
+
+
+def get_deferred_jobs() -> DeferredJobs:
+    """Return the process-wide deferred job queue."""
+    global _deferred
+    if _deferred is None:
+        with _deferred_lock:
+            if _deferred is None:
+                _deferred = DeferredJobs()
+    return _deferred
@@ -0,0 +1,46 @@
+"""Bulk lookup of codes users already hold, for skip-already-provisioned jobs."""
+import re
+
+from src.core.parse_api import iter_promos, parse_date, BATCH_LIMIT
+from src.utils.durations import iso_utc
+
+
+# Only what a reused row needs
+EXISTING_KEYS = ("promoCodeId", "promoCodeUser", "promoCodeDuration")
+
+
+def find_existing_codes(user_ids, prefix: str, chunk_size: int = BATCH_LIMIT) -> dict:
+    """
+    Find an active (not revoked, not expired) code with ``prefix`` for each user.
+
+    Users are looked up with one `$in` query per ``chunk_size`` users,
+    projected to EXISTING_KEYS. A code counts as unexpired if it has no
+    ``promoCodeEndDate`` (not redeemed yet) or one in the future; Parse only
+    compares Date-typed end dates, so codes with a legacy string end date
+    are not reused. If a user holds several matching codes the newest is
+    returned.
+
+    Args:
+        user_ids: Emails/phones as entered (normalized like create_promo_for_user)
+        prefix: Code prefix the job would mint
+        chunk_size: Users per `$in` query
+
+    Returns:
+        {normalized user ID: (code, duration)} for users that already have one
+    """
+    users = list(dict.fromkeys(u.strip().lower() for u in user_ids if u and u.strip()))
+    found, newest = {}, {}
+    now = parse_date(iso_utc())
+    for i in range(0, len(users), chunk_size):
+        where = {
+            "promoCodeUser": {"$in": users[i:i + chunk_size]},
+            "promoCodeId": {"$regex": "^" + re.escape(prefix)},
+            "promoCodeRevoked": {"$ne": True},
+            "$or": [{"promoCodeEndDate": {"$exists": False}}, {"promoCodeEndDate": {"$gt": now}}],
+        }
+        for obj in iter_promos(where, keys=EXISTING_KEYS):
+            uid, created = obj.get("promoCodeUser", ""), obj.get("createdAt") or ""
+            if uid not in newest or created > newest[uid]:
+                newest[uid] = created
+                found[uid] = (obj.get("promoCodeId"), obj.get("promoCodeDuration"))
+    return found
@@ -0,0 +1,287 @@
+"""Streaming export of PromoCodeInfo to CSV or Parquet."""
+import base64
+import csv
+import json
+import os
+import re
+
+from src.core.parse_api import iter_promos_by_time, parse_date
+from src.utils.progress import Throughput
+
+
+EXPORT_FIELDS = (
+    "objectId",
+    "promoCodeId",
+    "promoCodeUser",
+    "promoCodeDuration",
+    "promoCodeDistributionPartner",
+    "promoCodeDeviceCountLimit",
+    "promoCodeStartDate",
+    "promoCodeEndDate",
+    "promoCodeRevoked",
+    "createdAt",
+    "updatedAt",
+)
+
+# objectId/createdAt/updatedAt come back with every object
+_PROJECTED_KEYS = EXPORT_FIELDS[1:-2]
+
+# Rows per Parquet file: a file is only readable once closed, so the resume token advances per file
+_PARQUET_FILE_ROWS = 100_000
+
+
+def build_export_where(prefix: str = "", partner: str = "", since: str = "", until: str = "") -> dict:
+    """
+    Build the Parse ``where`` clause for an export.
+
+    Args:
+        prefix: Only codes starting with this prefix
+        partner: Only codes for this distribution partner
+        since: Only codes created at/after this ISO date or timestamp
+        until: Only codes created before this ISO date or timestamp
+    """
+    where = {}
+    if prefix:
+        where["promoCodeId"] = {"$regex": "^" + re.escape(prefix)}
+    if partner:
+        where["promoCodeDistributionPartner"] = partner
+    created = {}
+    if since:
+        created["$gte"] = parse_date(_as_timestamp(since))
+    if until:
+        created["$lt"] = parse_date(_as_timestamp(until))
+    if created:
+        where["createdAt"] = created
+    return where
+
+
+def _as_timestamp(value: str) -> str:
+    """Accept "2025-01-31" as well as full ISO timestamps."""
+    value = value.strip()
+    if re.fullmatch(r"\d{4}-\d{2}-\d{2}", value):
+        return f"{value}T00:00:00.000Z"
+    return value
+
+
+def encode_resume_token(created_at: str, object_id: str, rows: int, size: int = 0) -> str:
+    """Opaque token identifying the last row safely on disk (and, for CSV, the file size up to it)."""
+    data = {"c": created_at, "o": object_id, "n": rows}
+    if size:
+        data["b"] = size
+    raw = json.dumps(data, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_resume_token(token: str):
+    """
+    Decode a resume token.
+
+    Returns:
+        ((created_at, object_id), rows_already_written, file_size or 0)
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return (data["c"], data["o"]), int(data["n"]), int(data.get("b", 0))
+    except Exception as e:
+        raise ValueError(f"Invalid resume token: {e}") from e
+
+
+def _save_token(path: str, token: str) -> None:
+    """Replace the resume token file atomically, so a crash leaves the old token or the new one."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(token)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _flatten(obj: dict) -> dict:
+    """Turn one Parse object into a flat export row."""
+    row = {}
+    for field in EXPORT_FIELDS:
+        value = obj.get(field)
+        if isinstance(value, dict) and value.get("__type") == "Date":
+            value = value.get("iso")
+        row[field] = value
+    return row
+
+
+class _CsvSink:
+    """
+    Appends rows to one CSV file.
+
+    ``write()`` returns only once the rows are on disk. Resuming truncates
+    the file to the size recorded in the token, dropping rows written after
+    it (e.g. a page cut short by a crash), so no row is exported twice.
+    """
+
+    def __init__(self, path: str, append: bool, size: int = 0):
+        exists = append and os.path.exists(path) and os.path.getsize(path) > 0
+        self.f = open(path, "a" if append else "w", newline="", encoding="utf-8")
+        if exists and size and os.path.getsize(path) > size:
+            print(f"[export] dropping {os.path.getsize(path) - size} bytes written after the resume token")
+            self.f.truncate(size)
+        self.writer = csv.DictWriter(self.f, fieldnames=EXPORT_FIELDS)
+        if not exists:
+            self.writer.writeheader()
+
+    def write(self, rows: list) -> bool:
+        """Write ``rows``; True once they (and everything before) are durable."""
+        self.writer.writerows(rows)
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        return True
+
+    def size(self) -> int:
+        return self.f.tell()
+
+    def close(self) -> None:
+        self.f.close()
+
+
+class _ParquetSink:
+    """
+    Writes one row group per page; needs the optional ``pyarrow`` package.
+
+    A Parquet file is unreadable until its footer is written on close, so
+    rows go to ``<file>.inprogress`` and the file is renamed into place
+    once closed, every _PARQUET_FILE_ROWS rows and at the end. Only then
+    does ``write()`` report the rows durable. Parquet files cannot be
+    appended to, so later files (and resumed exports) are numbered parts:
+    ``codes.part1.parquet``, ``codes.part2.parquet``, ...
+    """
+
+    def __init__(self, path: str, append: bool, size: int = 0):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)") from e
+        self.pa = pa
+        self.pq = pq
+        self.path = path
+        self.overwrite = not append  # a fresh export replaces ``path`` itself
+        self.schema = pa.schema([
+            (f, pa.int64() if f == "promoCodeDeviceCountLimit" else pa.bool_() if f == "promoCodeRevoked" else pa.string())
+            for f in EXPORT_FIELDS
+        ])
+        self.writer = None
+        self.current = ""
+        self.rows = 0
+
+    def _open(self) -> None:
+        path = self.path
+        if not self.overwrite and os.path.exists(path):
+            stem, ext = os.path.splitext(path)
+            n = 1
+            while os.path.exists(f"{stem}.part{n}{ext}"):
+                n += 1
+            path = f"{stem}.part{n}{ext}"
+            print(f"[export] continuing in {path}")
+        self.overwrite = False
+        self.current = path
+        self.writer = self.pq.ParquetWriter(f"{path}.inprogress", self.schema)
+
+    def _finish(self) -> None:
+        self.writer.close()
+        os.replace(f"{self.current}.inprogress", self.current)
+        self.writer, self.rows = None, 0
+
+    def write(self, rows: list) -> bool:
+        """Write ``rows``; True if this closed the file, making them (and everything before) durable."""
+        if self.writer is None:
+            self._open()
+        columns = {f: [r[f] for r in rows] for f in EXPORT_FIELDS}
+        self.writer.write_table(self.pa.Table.from_pydict(columns, schema=self.schema))
+        self.rows += len(rows)
+        if self.rows >= _PARQUET_FILE_ROWS:
+            self._finish()
+            return True
+        return False
+
+    def size(self) -> int:
+        return 0
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self._finish()
+
+
+def parquet_available() -> bool:
+    """True if the optional pyarrow dependency is installed."""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def export_promos(path: str, where: dict, fmt: str = "csv", resume_token: str = "",
+                  page_size: int = 1000, on_progress=None):
+    """
+    Stream PromoCodeInfo rows matching ``where`` into ``path``.
+
+    Rows are paged by (createdAt, objectId) cursor and written page by page,
+    so memory use is one page regardless of export size. Once rows are
+    durable on disk (every page for CSV, every closed file for Parquet) the
+    resume token is atomically replaced in ``<path>.resume``; passing it
+    back (after a crash or Ctrl+C) continues right after the last such row.
+
+    Args:
+        path: Output file
+        where: Parse where clause (see build_export_where())
+        fmt: "csv" or "parquet"
+        resume_token: Token from a previous, interrupted export
+        page_size: Rows fetched per Parse request
+        on_progress: Optional callback(meter, token) after each page
+
+    Returns:
+        (Throughput meter, final resume token)
+    """
+    cursor, already, size = decode_resume_token(resume_token) if resume_token else (None, 0, 0)
+    sink_cls = _ParquetSink if fmt == "parquet" else _CsvSink
+    sink = sink_cls(path, append=bool(resume_token), size=size)
+    token_path = f"{path}.resume"
+
+    meter = Throughput()
+    meter.add("rows", 0)
+    token = pending = resume_token  # last durable row / last row written
+    page = []
+
+    def flush():
+        nonlocal token, pending
+        durable = sink.write([_flatten(o) for o in page])
+        meter.add("rows", len(page))
+        last = page[-1]
+        pending = encode_resume_token(last["createdAt"], last["objectId"], already + meter.get("rows"), sink.size())
+        if durable:
+            token = pending
+            _save_token(token_path, token)
+        page.clear()
+        if on_progress:
+            on_progress(meter, token)
+
+    try:
+        for obj in iter_promos_by_time(where, keys=_PROJECTED_KEYS, page_size=page_size, after=cursor):
+            page.append(obj)
+            if len(page) >= page_size:
+                flush()
+        if page:
+            flush()
+    finally:
+        # Also on Ctrl+C / errors: closing makes the rows written so far durable (Parquet footer)
+        sink.close()
+        if pending != token:
+            token = pending
+            _save_token(token_path, token)
+
+    # Finished cleanly: nothing left to resume
+    try:
+        os.remove(token_path)
+    except FileNotFoundError:
+        pass
+    return meter, token
@@ -0,0 +1,149 @@
+"""
+Jobs visible to every worker process, and controls routed to their owner.
+
+In HTTP mode a job runs in the gunicorn worker that confirmed it, but the
+Pause/Resume/Cancel click or `/promo-job` command can land in any worker.
+Each worker mirrors its unfinished jobs into a shared SQLite table
+(PROMO_JOB_REGISTRY_PATH) and polls it: a control requested elsewhere is
+written to the job's row, and the owning worker picks it up and applies it
+between codes, like a local click.
+"""
+import threading
+import time
+import uuid
+
+from src.config import PROMO_JOB_REGISTRY_PATH, PROMO_REPLICA_ID
+from src.utils.sqlite_db import connect
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id     TEXT PRIMARY KEY,
+    requester  TEXT NOT NULL,
+    owner      TEXT NOT NULL,      -- worker process running the job
+    status     TEXT NOT NULL,
+    prefix     TEXT NOT NULL,
+    completed  INTEGER NOT NULL,
+    total      INTEGER NOT NULL,
+    control    TEXT NOT NULL DEFAULT '',  -- pause/resume/cancel waiting for the owner
+    synced_at  REAL NOT NULL       -- owner's last sync (epoch seconds)
+);
+"""
+
+_COLUMNS = ("job_id", "requester", "owner", "status", "prefix", "completed", "total", "control")
+
+
+class JobRegistry:
+    """
+    Shared table of unfinished jobs and pending controls.
+
+    Args:
+        path: SQLite file shared by the worker processes ("" keeps it in memory only)
+        poll: Seconds between syncs; a remote control takes effect within about this long
+    """
+
+    def __init__(self, path: str = PROMO_JOB_REGISTRY_PATH, poll: float = 2.0):
+        self.poll = poll
+        # Rows not synced for this long belong to a worker that exited; they are ignored
+        self.stale_after = max(30.0, poll * 10)
+        self.owner = f"{PROMO_REPLICA_ID}/{uuid.uuid4().hex[:8]}"
+        self._conn = connect(path or ":memory:")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def find(self, job_id: str):
+        """The live row for ``job_id`` as a dict, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE job_id = ? AND synced_at >= ?",
+                (job_id, time.time() - self.stale_after),
+            ).fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def jobs(self, requester: str) -> list:
+        """Live rows of ``requester``'s jobs in any worker, as dicts."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE requester = ? AND synced_at >= ? ORDER BY rowid",
+                (requester, time.time() - self.stale_after),
+            ).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def request(self, job_id: str, action: str) -> bool:
+        """Ask the owner of ``job_id`` to apply ``action``; False if the job is gone."""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET control = ? WHERE job_id = ? AND synced_at >= ?",
+                (action, job_id, time.time() - self.stale_after),
+            ).rowcount == 1
+
+    def sync(self, jobs: list) -> list:
+        """
+        Publish this worker's unfinished ``jobs`` and take the controls requested for them.
+
+        Rows of jobs that are no longer here (finished, or adopted by another
+        worker) are dropped, as are rows left behind by exited workers.
+
+        Returns:
+            [(job, action)] to apply
+        """
+        now = time.time()
+        by_id = {job.job_id: job for job in jobs}
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                controls = self._conn.execute(
+                    "SELECT job_id, control FROM jobs WHERE owner = ? AND control != ''", (self.owner,)
+                ).fetchall()
+                self._conn.execute("DELETE FROM jobs WHERE owner = ? OR synced_at < ?",
+                                   (self.owner, now - self.stale_after))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO jobs (job_id, requester, owner, status, prefix, completed, total, "
+                    "synced_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(j.job_id, j.requester, self.owner, j.status, j.prefix, j.completed, j.total, now)
+                     for j in jobs],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [(by_id[job_id], action) for job_id, action in controls if job_id in by_id]
+
+    def start(self, local_jobs, apply) -> None:
+        """
+        Sync from a daemon thread every ``poll`` seconds.
+
+        Args:
+            local_jobs: Callable returning this worker's unfinished jobs
+            apply: Callable(job, action) -> str that performs a control (the reply is logged)
+        """
+        if self._thread and self._thread.is_alive():
+            return
+
+        def loop():
+            while True:
+                try:
+                    for job, action in self.sync(local_jobs()):
+                        print(f"[jobs] {action} of job {job.job_id} requested from another worker: "
+                              f"{apply(job, action)}")
+                except Exception as e:
+                    print(f"[jobs] job registry sync failed: {e}")
+                time.sleep(self.poll)
+
+        self._thread = threading.Thread(target=loop, name="promo-job-registry", daemon=True)
+        self._thread.start()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_job_registry() -> JobRegistry:
+    """Return the process-wide job registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = JobRegistry()
+    return _registry
@@ -0,0 +1,329 @@
+"""Promo generation jobs (one per confirmed batch)."""
+import threading
+import time
+import uuid
+from typing import NamedTuple
+
+from src.core.parse_api import get_client, use_environment, is_outage
+from src.core.promo_generator import create_promo_for_user
+
+
+class ResultRow(NamedTuple):
+    """One generated code (or error) — unpacks like the old 4-tuples."""
+    user_id: str
+    code_or_error: str
+    duration: str
+    partner: str
+
+    # True for a code the user already had (skip-existing jobs), see ExistingRow
+    existing = False
+
+    @property
+    def ok(self) -> bool:
+        return not str(self.code_or_error).startswith("ERROR:")
+
+
+class ExistingRow(ResultRow):
+    """A reused code the user already held; nothing was minted."""
+    __slots__ = ()
+    existing = True
+
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+PAUSED = "paused"
+DONE = "done"
+CANCELLED = "cancelled"
+DEFERRED = "deferred"  # parked until Parse recovers; not finished
+FINISHED = (DONE, CANCELLED)
+
+
+class GenerationJob:
+    """
+    A batch of user IDs to mint codes for, worked on one code at a time.
+
+    The scheduler claims row indexes with claim(), runs them (possibly on
+    several threads) and reports back with record(). Rows keep the input
+    order regardless of completion order.
+
+    pause() and cancel() take effect between codes: rows already claimed
+    finish normally, nothing new is claimed. resume() continues from the
+    first unclaimed row, so completed rows are never redone.
+
+    Codes are minted in the job's Parse ``environment`` (the default one
+    unless given). If that Parse app goes down mid-job (its circuit
+    breaker opens), the rows that hit the outage, including timeouts/5xx
+    just before the breaker opened, are put back instead of becoming
+    errors. Nothing new is claimed, and once the rows in flight are back
+    the job is DEFERRED: the scheduler drops it and calls on_deferred.
+    requeue() makes it claimable again; snapshot()/restore() carry it
+    across a restart.
+    """
+
+    def __init__(self, requester: str, ids: list, prefix: str, duration: str, partner: str,
+                 notes: str = "", target: str = "", on_done=None, on_progress=None, on_deferred=None,
+                 environment: str = ""):
+        self.job_id = uuid.uuid4().hex[:8]
+        self.requester = requester
+        self.ids = list(ids)
+        self.prefix = prefix
+        self.duration = duration
+        self.partner = partner
+        self.notes = notes
+        self.target = target
+        self.parse = get_client(environment)  # the Parse environment codes are minted in
+        self.environment = self.parse.name
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self.on_deferred = on_deferred
+        # Skip-existing jobs: {normalized user ID: (code, duration)} to reuse instead of
+        # minting; None until looked up
+        self.skip_existing = False
+        self.existing = None
+
+        self.status = QUEUED
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self._rows = [None] * len(self.ids)
+        self._next = 0
+        self._pending = []  # row indexes to redo before _next (put back by an outage)
+        self._deferring = False
+        self._retryable = set()  # rows that failed like an outage; redone if the job is deferred
+        self._inflight = 0
+        self._completed = 0
+        self._cancelled = False
+        self._paused = False
+        self._lock = threading.Lock()
+
+    # --- progress ---
+
+    @property
+    def total(self) -> int:
+        return len(self.ids)
+
+    @property
+    def completed(self) -> int:
+        return self._completed
+
+    @property
+    def unclaimed(self) -> int:
+        return len(self.ids) - self._next + len(self._pending)
+
+    @property
+    def rows(self) -> list:
+        """Finished rows, in input order."""
+        with self._lock:
+            return [r for r in self._rows if r is not None]
+
+    @property
+    def errors(self) -> int:
+        return sum(1 for r in self.rows if not r.ok)
+
+    @property
+    def reused(self) -> int:
+        return sum(1 for r in self.rows if r.existing)
+
+    def unprocessed_ids(self) -> list:
+        """User IDs that did not get a row (cancelled before their turn)."""
+        with self._lock:
+            return [uid for uid, row in zip(self.ids, self._rows) if row is None]
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    # --- controls ---
+
+    def pause(self) -> bool:
+        """Stop handing out new rows. Returns False if the job is already finished/paused/deferred."""
+        with self._lock:
+            if self.status in FINISHED or self._paused or self._deferring:
+                return False
+            self._paused = True
+            self.status = PAUSED
+            return True
+
+    def resume(self) -> bool:
+        """Continue a paused job from its first unclaimed row."""
+        with self._lock:
+            if not self._paused or self.status in FINISHED or self._deferring:
+                return False
+            self._paused = False
+            self.status = RUNNING if self.started_at is not None else QUEUED
+            return True
+
+    def cancel(self) -> bool:
+        """
+        Stop the job for good; rows in flight still complete.
+
+        Returns:
+            True if the job has nothing in flight and is now finished
+            (the caller must finalize it); False if the last in-flight
+            row will finish it, or if it was already finished.
+        """
+        with self._lock:
+            if self.status in FINISHED:
+                return False
+            self._cancelled = True
+            self._paused = False
+            if self._inflight == 0:
+                self.status = CANCELLED
+                self.finished_at = time.monotonic()
+                return True
+            return False
+
+    def wait_seconds(self) -> float:
+        """Time from submission to the first code being started (so far, if still queued)."""
+        end = self.started_at if self.started_at is not None else time.monotonic()
+        return end - self.submitted_at
+
+    # --- scheduler interface ---
+
+    def claimable(self) -> bool:
+        """True if there are rows left to hand out (and the job is not paused/cancelled/deferred)."""
+        return (bool(self._pending) or self._next < len(self.ids)) and not (
+            self._paused or self._cancelled or self._deferring)
+
+    def claim(self):
+        """Reserve the next row index, or None if nothing is left."""
+        with self._lock:
+            if self._paused or self._cancelled or self._deferring:
+                return None
+            if self._pending:
+                index = self._pending.pop(0)
+            elif self._next < len(self.ids):
+                index = self._next
+                self._next += 1
+            else:
+                return None
+            self._inflight += 1
+            if self.started_at is None:
+                self.started_at = time.monotonic()
+                self.status = RUNNING
+            return index
+
+    def run(self, index: int):
+        """
+        Mint the code for row ``index`` (no locks held).
+
+        Returns:
+            The ResultRow, or None if Parse is down (the row is to be retried later)
+        """
+        uid = self.ids[index]
+        held = self.existing.get(uid.strip().lower()) if self.existing else None
+        if held:
+            code, duration = held
+            return ExistingRow(uid, code, duration or self.duration, self.partner)
+        try:
+            with use_environment(self.environment):
+                code = create_promo_for_user(uid, self.prefix, self.duration, self.partner)
+            return ResultRow(uid, code, self.duration, self.partner)
+        except Exception as e:
+            if is_outage(e):
+                if not self.parse.breaker.closed:
+                    return None  # Parse is down: retry this row once it recovers
+                with self._lock:
+                    self._retryable.add(index)
+            return ResultRow(uid, f"ERROR: {e}", self.duration, self.partner)
+
+    def record(self, index: int, row) -> bool:
+        """
+        Store a finished row, or put ``index`` back if ``row`` is None (Parse is down).
+
+        Returns:
+            True if this was the job's last outstanding row: the job is then
+            DONE, CANCELLED or DEFERRED
+        """
+        with self._lock:
+            self._inflight -= 1
+            if row is None:
+                self._pending.append(index)
+                self._deferring = True
+            else:
+                self._rows[index] = row
+                self._completed += 1
+            if self._inflight:
+                return False
+            if self._cancelled:
+                self.status = CANCELLED
+            elif self._deferring:
+                for i in self._retryable:
+                    if self._rows[i] is not None:
+                        self._rows[i] = None
+                        self._completed -= 1
+                        self._pending.append(i)
+                self._retryable.clear()
+                self.status = DEFERRED
+                return True
+            elif self._next >= len(self.ids) and not self._pending:
+                self.status = DONE
+            else:
+                return False
+            self.finished_at = time.monotonic()
+            return True
+
+    # --- deferral ---
+
+    def defer(self) -> bool:
+        """
+        Park a job that is not running (e.g. Parse is down at submit time).
+
+        Returns:
+            False if the job has rows in flight or is finished
+        """
+        with self._lock:
+            if self._inflight or self.status in FINISHED:
+                return False
+            self._deferring = True
+            self.status = DEFERRED
+            return True
+
+    def requeue(self) -> None:
+        """Make a DEFERRED job claimable again, starting with the rows put back."""
+        with self._lock:
+            self._deferring = False
+            self._pending.sort()
+            if self._paused:
+                self.status = PAUSED
+            else:
+                self.status = RUNNING if self.started_at is not None else QUEUED
+
+    def snapshot(self) -> dict:
+        """JSON-serializable state of a job that is not running (see restore())."""
+        with self._lock:
+            return {
+                "job_id": self.job_id, "requester": self.requester, "ids": self.ids, "prefix": self.prefix,
+                "duration": self.duration, "partner": self.partner, "notes": self.notes, "target": self.target,
+                "environment": self.environment, "skip_existing": self.skip_existing, "existing": self.existing, "paused": self._paused,
+                "rows": [list(r) + [r.existing] if r is not None else None for r in self._rows],
+            }
+
+    @classmethod
+    def restore(cls, state: dict, **callbacks) -> "GenerationJob":
+        """
+        Rebuild a DEFERRED job from snapshot(); rows without a result are pending.
+
+        Args:
+            state: A snapshot() dict
+            **callbacks: on_done / on_progress / on_deferred
+        """
+        job = cls(state["requester"], state["ids"], state["prefix"], state["duration"], state["partner"],
+                  notes=state.get("notes", ""), target=state.get("target", ""),
+                  environment=state.get("environment", ""), **callbacks)
+        job.job_id = state["job_id"]
+        job.skip_existing = state.get("skip_existing", False)
+        job.existing = state.get("existing")
+        for i, row in enumerate(state["rows"]):
+            if row is None:
+                job._pending.append(i)
+            else:
+                *fields, existing = row
+                job._rows[i] = (ExistingRow if existing else ResultRow)(*fields)
+                job._completed += 1
+        job._next = len(job.ids)
+        job._paused = state.get("paused", False)
+        job._deferring = True
+        job.status = DEFERRED
+        return job
@@ -0,0 +1,101 @@
+"""Promo code lookup (by user or by code) with a read-through cache."""
+import re
+from typing import NamedTuple
+
+from src.config import PROMO_LOOKUP_PAGE_SIZE, PROMO_LOOKUP_CACHE_SIZE, PROMO_LOOKUP_CACHE_TTL
+from src.core.parse_api import current as current_parse, find_promos
+from src.core.mirror import get_mirror
+from src.utils.cache import TTLCache
+from src.utils.validation import normalize_user_id, validate_user_id
+
+
+# Only the fields shown in the results view are fetched from Parse
+LOOKUP_KEYS = (
+    "promoCodeId",
+    "promoCodeUser",
+    "promoCodeDuration",
+    "promoCodeDistributionPartner",
+    "createdAt",
+)
+
+def _cache() -> TTLCache:
+    """The lookup cache of the current Parse environment."""
+    return current_parse().cache("lookup", PROMO_LOOKUP_CACHE_SIZE, PROMO_LOOKUP_CACHE_TTL)
+
+
+class LookupPage(NamedTuple):
+    """One page of lookup results."""
+    field: str
+    value: str
+    page: int
+    rows: list
+    has_more: bool
+
+
+def classify_query(raw: str):
+    """
+    Work out what a lookup query refers to.
+
+    Args:
+        raw: Free-text query (an email, phone number or promo code)
+
+    Returns:
+        (field, value) tuple, where field is "promoCodeUser" or "promoCodeId"
+
+    Raises:
+        ValueError: If the query is empty or an invalid email/phone
+    """
+    q = (raw or "").strip()
+    if not q:
+        raise ValueError("Enter an email, phone number or promo code.")
+
+    # Promo codes always contain letters; phone numbers never do
+    if "@" in q or not re.search(r"[A-Za-z]", q):
+        uid = normalize_user_id(q)
+        if not validate_user_id(uid):
+            raise ValueError(f"`{q}` doesn't look like a valid email or phone number.")
+        return "promoCodeUser", uid
+    return "promoCodeId", q.upper()
+
+
+def _load_page(field: str, value: str, page: int) -> LookupPage:
+    size = PROMO_LOOKUP_PAGE_SIZE
+    mirror = get_mirror() if current_parse().is_default else None
+    # Fetch one extra row to know whether a next page exists
+    if mirror and mirror.is_ready():
+        results = mirror.find(field, value, limit=size + 1, offset=page * size)
+        return LookupPage(field, value, page, results[:size], len(results) > size)
+    results = find_promos(
+        {field: value},
+        keys=LOOKUP_KEYS,
+        order="-createdAt",
+        limit=size + 1,
+        skip=page * size,
+    )
+    return LookupPage(field, value, page, results[:size], len(results) > size)
+
+
+def lookup_promos(raw_query: str, page: int = 0) -> LookupPage:
+    """
+    Look up promo codes by user (email/phone) or by promo code.
+
+    Results are cached per (field, value, page) in the current Parse
+    environment; concurrent identical lookups share a single Parse request.
+
+    Args:
+        raw_query: Free-text query
+        page: Zero-based page number
+
+    Returns:
+        LookupPage with up to PROMO_LOOKUP_PAGE_SIZE rows
+    """
+    field, value = classify_query(raw_query)
+    page = max(0, int(page))
+    key = (field, value, page)
+    return _cache().get_or_load(key, lambda: _load_page(field, value, page))
+
+
+def invalidate_user(user_id: str) -> None:
+    """Forget cached lookups for a user (called after new codes are created)."""
+    uid = normalize_user_id(user_id)
+    _cache().invalidate_where(lambda k: k[0] == "promoCodeUser" and k[1] == uid)
@@ -0,0 +1,323 @@
+"""Optional local SQLite mirror of PromoCodeInfo.
+
+Parse stays the source of truth. The mirror is kept current by a
+background thread that pulls objects changed since the last ``updatedAt``
+watermark, and by write-through from every create the bot does. It lets
+lookups, uniqueness pre-checks and reports run locally instead of over
+the network.
+
+A deleted object has no ``updatedAt`` to pull, so the incremental sync
+never sees deletes. A periodic reconcile (PROMO_MIRROR_RECONCILE_SECONDS)
+lists every objectId in Parse and drops mirrored rows that are gone.
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from src.config import PROMO_MIRROR_PATH, PROMO_MIRROR_SYNC_SECONDS, PROMO_MIRROR_RECONCILE_SECONDS
+from src.core.parse_api import iter_promos, iter_promos_by_time
+from src.utils.durations import iso_utc
+from src.utils.leader import is_leader
+from src.utils.sqlite_db import connect
+from src.utils.validation import promo_code_prefix
+
+
+# Parse field -> mirror column
+_COLUMNS = {
+    "objectId": "object_id",
+    "promoCodeId": "code",
+    "promoCodeUser": "user",
+    "promoCodeDuration": "duration",
+    "promoCodeDistributionPartner": "partner",
+    "promoCodeRevoked": "revoked",
+    "createdAt": "created_at",
+    "updatedAt": "updated_at",
+}
+_FIELDS = {column: field for field, column in _COLUMNS.items()}
+
+_SYNC_KEYS = ("promoCodeId", "promoCodeUser", "promoCodeDuration",
+              "promoCodeDistributionPartner", "promoCodeRevoked")
+
+# Rows created this close to the start of a reconcile scan are kept even if the scan missed them
+# (created mid-scan, or clock skew between this host and Parse)
+_RECONCILE_MARGIN = timedelta(minutes=10)
+
+_SET_META = "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS promos (
+    object_id  TEXT PRIMARY KEY,
+    code       TEXT NOT NULL,
+    prefix     TEXT NOT NULL,
+    user       TEXT,
+    duration   TEXT,
+    partner    TEXT,
+    revoked    INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS promos_code ON promos (code);
+CREATE INDEX IF NOT EXISTS promos_user ON promos (user, created_at);
+CREATE INDEX IF NOT EXISTS promos_prefix ON promos (prefix);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class PromoMirror:
+    """A SQLite copy of PromoCodeInfo, safe to share between threads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = connect(path)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- reads ---
+
+    def is_ready(self) -> bool:
+        """True once a full initial sync has completed (reads may be served locally)."""
+        return self._meta("initial_sync_done") == "1"
+
+    def has_code(self, code: str) -> bool:
+        """True if the mirror knows this code exists."""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM promos WHERE code = ?", (code,)).fetchone()
+        return row is not None
+
+    def find(self, field: str, value: str, limit: int = 100, offset: int = 0) -> list:
+        """
+        Find codes by "promoCodeUser" or "promoCodeId", newest first.
+
+        Returns:
+            List of dicts shaped like Parse results
+        """
+        column = _COLUMNS[field]
+        with self._lock:
+            cur = self._conn.execute(
+                f"SELECT * FROM promos WHERE {column} = ? ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (value, limit, offset),
+            )
+            names = [d[0] for d in cur.description]
+            rows = cur.fetchall()
+        results = []
+        for row in rows:
+            obj = {_FIELDS[n]: v for n, v in zip(names, row) if n in _FIELDS and v is not None}
+            obj["promoCodeRevoked"] = bool(obj.get("promoCodeRevoked"))
+            results.append(obj)
+        return results
+
+    def iter_codes(self, batch: int = 10000):
+        """Yield (code, created_at) for every mirrored code, in batches."""
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT code, COALESCE(created_at, '') FROM promos WHERE code > ? ORDER BY code LIMIT ?",
+                    (last, batch),
+                ).fetchall()
+            yield from rows
+            if len(rows) < batch:
+                return
+            last = rows[-1][0]
+
+    def count_by_prefix(self) -> dict:
+        """Number of mirrored codes per prefix."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT prefix, COUNT(*) FROM promos GROUP BY prefix").fetchall())
+
+    # --- writes ---
+
+    def upsert(self, objects, meta: dict = None) -> int:
+        """
+        Insert or update Parse objects (must include objectId and promoCodeId).
+
+        ``meta`` keys (e.g. the sync watermark) are written in the same
+        transaction, so they always match the rows.
+        """
+        rows = []
+        for obj in objects:
+            code = obj.get("promoCodeId") or ""
+            rows.append((
+                obj["objectId"], code, promo_code_prefix(code), obj.get("promoCodeUser"),
+                obj.get("promoCodeDuration"), obj.get("promoCodeDistributionPartner"),
+                1 if obj.get("promoCodeRevoked") else 0, obj.get("createdAt"), obj.get("updatedAt"),
+            ))
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # A code can be re-created under a new objectId; keep only the latest
+                self._conn.executemany(
+                    "DELETE FROM promos WHERE code = ? AND object_id != ?", [(r[1], r[0]) for r in rows]
+                )
+                self._conn.executemany(
+                    """INSERT INTO promos (object_id, code, prefix, user, duration, partner, revoked, created_at, updated_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(object_id) DO UPDATE SET
+                         code = excluded.code, prefix = excluded.prefix, user = excluded.user,
+                         duration = excluded.duration, partner = excluded.partner, revoked = excluded.revoked,
+                         created_at = COALESCE(excluded.created_at, created_at),
+                         updated_at = COALESCE(excluded.updated_at, updated_at)""",
+                    rows,
+                )
+                if meta:
+                    self._conn.executemany(_SET_META, meta.items())
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def record_created(self, payload: dict, created: dict) -> None:
+        """Write-through for a code the bot just created in Parse."""
+        if not created.get("objectId"):
+            return
+        obj = dict(payload)
+        obj["objectId"] = created["objectId"]
+        obj["createdAt"] = obj["updatedAt"] = created.get("createdAt")
+        self.upsert([obj])
+
+    # --- sync ---
+
+    def _meta(self, key: str, default: str = "") -> str:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(_SET_META, (key, value))
+
+    def sync_once(self, page_size: int = 1000) -> int:
+        """
+        Pull every object updated since the watermark.
+
+        The watermark, (updatedAt, objectId) of the last object applied, is
+        advanced after every page, so an interrupted sync resumes cheaply.
+        """
+        ts, oid = self._meta("watermark_updated_at"), self._meta("watermark_object_id")
+        after = (ts, oid) if ts else None
+        total, page = 0, []
+
+        def flush():
+            nonlocal total
+            last = page[-1]
+            self.upsert(page, {"watermark_updated_at": last["updatedAt"], "watermark_object_id": last["objectId"]})
+            total += len(page)
+            page.clear()
+
+        for obj in iter_promos_by_time({}, keys=_SYNC_KEYS, page_size=page_size, after=after, field="updatedAt"):
+            page.append(obj)
+            if len(page) >= page_size:
+                flush()
+        if page:
+            flush()
+        self._set_meta("initial_sync_done", "1")
+        return total
+
+    def reconcile(self, page_size: int = 1000) -> int:
+        """
+        Delete mirrored rows whose object no longer exists in Parse.
+
+        Lists every objectId in Parse (objectId-cursor scan, ids only) into a
+        temporary table, then drops the rows it did not see that were created
+        well before the scan started. Nothing is deleted if the scan fails or
+        comes back empty while the mirror is not.
+
+        Returns:
+            Number of rows deleted
+        """
+        cutoff = iso_utc(datetime.now(timezone.utc) - _RECONCILE_MARGIN)
+        with self._lock:
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS reconcile_seen (object_id TEXT PRIMARY KEY)")
+            self._conn.execute("DELETE FROM reconcile_seen")
+        try:
+            seen, page = 0, []
+            for obj in iter_promos({}, keys=["promoCodeId"], page_size=page_size):
+                page.append((obj["objectId"],))
+                if len(page) >= page_size:
+                    with self._lock:
+                        self._conn.executemany("INSERT OR IGNORE INTO reconcile_seen VALUES (?)", page)
+                    seen += len(page)
+                    page.clear()
+            with self._lock:
+                self._conn.executemany("INSERT OR IGNORE INTO reconcile_seen VALUES (?)", page)
+                seen += len(page)
+                if not seen and self._conn.execute("SELECT 1 FROM promos LIMIT 1").fetchone():
+                    print("[mirror] reconcile saw no objects in Parse; keeping the mirror as is")
+                    return 0
+                deleted = self._conn.execute(
+                    "DELETE FROM promos WHERE created_at < ? "
+                    "AND object_id NOT IN (SELECT object_id FROM reconcile_seen)",
+                    (cutoff,),
+                ).rowcount
+        finally:
+            with self._lock:
+                self._conn.execute("DELETE FROM reconcile_seen")
+        self._set_meta("reconciled_at", str(time.time()))
+        return deleted
+
+    def start_background_sync(self, interval: float = PROMO_MIRROR_SYNC_SECONDS,
+                              reconcile_interval: float = PROMO_MIRROR_RECONCILE_SECONDS) -> None:
+        """
+        Start a daemon thread running sync_once() every ``interval`` seconds.
+
+        Every worker process starts the thread, but only the leader syncs
+        (the others read the shared file), so Parse sees one sync per host
+        and the watermark only moves forward. Every ``reconcile_interval``
+        seconds (0 = never) the leader also runs reconcile() to drop objects
+        deleted in Parse.
+        """
+        if self._thread and self._thread.is_alive():
+            return
+
+        def loop():
+            while not self._stop.is_set():
+                if not is_leader():
+                    self._stop.wait(interval)
+                    continue
+                started = time.monotonic()
+                try:
+                    n = self.sync_once()
+                    if n:
+                        print(f"[mirror] synced {n} objects in {time.monotonic() - started:.1f}s")
+                except Exception as e:
+                    print(f"[mirror] sync failed: {e}")
+                try:
+                    last = float(self._meta("reconciled_at") or 0)
+                    if reconcile_interval > 0 and time.time() - last >= reconcile_interval:
+                        started = time.monotonic()
+                        n = self.reconcile()
+                        print(f"[mirror] reconciled in {time.monotonic() - started:.1f}s: "
+                              f"dropped {n} objects deleted in Parse")
+                except Exception as e:
+                    print(f"[mirror] reconcile failed: {e}")
+                self._stop.wait(interval)
+
+        self._thread = threading.Thread(target=loop, name="promo-mirror-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+_mirror = None
+_mirror_lock = threading.Lock()
+
+
+def get_mirror():
+    """Return the process-wide mirror, or None if PROMO_MIRROR_PATH is unset."""
+    global _mirror
+    if not PROMO_MIRROR_PATH:
+        return None
+    if _mirror is None:
+        with _mirror_lock:
+            if _mirror is None:
+                _mirror = PromoMirror(PROMO_MIRROR_PATH)
+    return _mirror
@@ -1,39 +1,557 @@
-"""Parse/Back4App API interactions."""
-import os
+"""Parse/Back4App API interactions.
+
+Each Parse app the bot serves (production, staging, ...) is an
+environment with its own ParseClient: credentials, pooled session, rate
+limiter, circuit breaker and caches, all set up once. The module-level
+functions are a facade over the client of the current environment (the
+default unless inside ``use_environment()``), so most callers never deal
+with environments at all.
+
+Reads go through ParseClient.query()/count()/exists(): queries always
+project ``keys``, presence and count checks ask for ``count=1&limit=0``
+(no objects at all), responses are gzip-compressed on the wire and result
+pages are decoded object by object as they arrive. Bytes on the wire and
+decoded are recorded per call in the ``parse.<environment>.*_bytes``
+metrics.
+"""
+import contextlib
+import contextvars
 import json
-import requests
-from src.config import PARSE_APP_ID, PARSE_REST_KEY, PARSE_MASTER
+import socket
+import threading
+from urllib.parse import urlparse
+from src.config import (
+    PARSE_ENVIRONMENTS,
+    PARSE_DEFAULT_ENVIRONMENT,
+    PARSE_PREFIX_ENVIRONMENTS,
+    PARSE_POOL_SIZE,
+    PARSE_BREAKER_WINDOW,
+    PARSE_BREAKER_MIN_CALLS,
+    PARSE_BREAKER_FAILURE_RATE,
+    PARSE_BREAKER_COOLDOWN_SECONDS,
+    PROMO_RESERVATION_CLASS,
+    PROMO_REPLICA_ID,
+)
+from src.utils import metrics
+from src.utils.cache import TTLCache
+from src.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.utils.json_stream import iter_array
+from src.utils.rate_limit import RateLimiter
+
+
+# Parse Server rejects /batch requests with more than 50 operations
+BATCH_LIMIT = 50
+
+# Parse error code for a unique-index violation
+DUPLICATE_VALUE = 137
+
+# Statuses that mean Parse itself is struggling (not a bad request)
+_UNHEALTHY_STATUS = (429, 500, 502, 503, 504)
+
+# Response sizes, for the per-call bytes histograms
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Result pages are decoded in pieces of this many (decompressed) bytes
+_STREAM_CHUNK = 64 * 1024
+
+
+class ParseClient:
+    """
+    REST client for one Parse app, safe to share between threads.
+
+    Timeouts, connection errors and 5xx/429 responses count against the
+    client's circuit breaker; while it is open requests are not sent at
+    all. With a rate limit, requests beyond it wait for their turn.
+
+    Args:
+        name: Environment name (e.g. "production")
+        api_root: Parse server URL including its mount path
+        app_id: X-Parse-Application-Id
+        master_key: Master key (preferred)
+        rest_key: REST API key, used if there is no master key
+        rate_limit: Requests per second; 0 = unlimited
+        pool_size: Keep-alive connections kept per host
+    """
+
+    def __init__(self, name: str, api_root: str, app_id: str, master_key: str = "", rest_key: str = "",
+                 rate_limit: float = 0, pool_size: int = PARSE_POOL_SIZE):
+        self.name = name
+        self.api_root = api_root.rstrip("/")
+        # Batch sub-request paths include the server mount path (e.g. "/parse")
+        self.mount = urlparse(self.api_root).path.rstrip("/")
+        self.pool_size = pool_size
+        self.headers = {
+            "X-Parse-Application-Id": app_id,
+            "Content-Type": "application/json",
+            "Accept-Encoding": "gzip",
+        }
+        # Prefer master key if available; else use REST key
+        if master_key:
+            self.headers["X-Parse-Master-Key"] = master_key
+        elif rest_key:
+            self.headers["X-Parse-REST-API-Key"] = rest_key
+        self.limiter = RateLimiter(rate_limit)
+        self.breaker = CircuitBreaker(
+            f"parse.{name}",
+            window=PARSE_BREAKER_WINDOW,
+            min_calls=PARSE_BREAKER_MIN_CALLS,
+            failure_rate=PARSE_BREAKER_FAILURE_RATE,
+            cooldown=PARSE_BREAKER_COOLDOWN_SECONDS,
+        )
+        self._session = None
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"ParseClient({self.name!r}, {self.api_root!r})"
+
+    @property
+    def is_default(self) -> bool:
+        return self.name == PARSE_DEFAULT_ENVIRONMENT
+
+    def cache(self, name: str, maxsize: int, ttl: float) -> TTLCache:
+        """This environment's TTLCache called ``name`` (created on first use)."""
+        with self._lock:
+            if name not in self._caches:
+                self._caches[name] = TTLCache(maxsize=maxsize, ttl=ttl)
+            return self._caches[name]
+
+    # --- transport ---
+
+    def session(self):
+        """
+        The client's pooled HTTP session.
+
+        ``requests`` is imported here rather than at module level so that it
+        stays off the startup path; the pre-warm thread usually pays for it.
+        """
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+
+    def request(self, method: str, path: str, timeout: float = 10, **kwargs):
+        """
+        Send a request to this Parse app over the pooled session.
+
+        Args:
+            method: HTTP method
+            path: Path below the API root (e.g. "classes/PromoCodeInfo")
+            timeout: Seconds before giving up
+            **kwargs: Passed through to requests (params, json, ...)
+
+        Returns:
+            requests.Response
+
+        Raises:
+            CircuitOpenError: If Parse has been failing and the breaker is open
+        """
+        url = f"{self.api_root}/{path.lstrip('/')}"
+        self.breaker.check()
+        if self.limiter.acquire():
+            metrics.counter(f"parse.{self.name}.rate_limited").inc()
+        try:
+            resp = self.session().request(method, url, headers=self.headers, timeout=timeout, **kwargs)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        if resp.status_code in _UNHEALTHY_STATUS:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return resp
+
+    def probe(self) -> bool:
+        """
+        One cheap GET /health through the breaker (its half-open probe when due).
+
+        Returns:
+            True if Parse answered
+        """
+        try:
+            resp = self.request("GET", "health", timeout=5)
+            resp.close()
+            return resp.status_code not in _UNHEALTHY_STATUS
+        except Exception:
+            return False
+
+    def prewarm(self, connections: int = 1) -> None:
+        """
+        Resolve the Parse host and open pooled connections ahead of the first real call.
+
+        Each connection does a cheap GET /health, which pays for DNS, TCP and
+        TLS setup and leaves the keep-alive connection in the pool.
+
+        Args:
+            connections: Number of connections to open in parallel
+        """
+        host = urlparse(self.api_root).hostname
+        if host:
+            socket.getaddrinfo(host, None)
+
+        def touch():
+            try:
+                self.request("GET", "health", timeout=5).close()
+            except Exception as e:
+                print(f"[parse] {self.name}: prewarm request failed: {e}")
+
+        threads = [threading.Thread(target=touch, daemon=True) for _ in range(max(1, connections) - 1)]
+        for t in threads:
+            t.start()
+        touch()
+        for t in threads:
+            t.join()
+
+    # --- reads ---
+
+    def query(self, class_name: str, where: dict, keys, order: str = "", limit: int = 100, skip: int = 0,
+              op: str = "query"):
+        """
+        Stream the objects of ``class_name`` matching ``where``.
+
+        The response is decoded as it arrives, so a large page never exists
+        as one JSON document or one list. Stop early and the connection is
+        dropped instead of reused.
+
+        Args:
+            class_name: Parse class
+            where: Parse ``where`` constraint dict
+            keys: Field names to fetch (Parse adds objectId, createdAt and updatedAt)
+            order: Optional Parse sort order (e.g., "-createdAt")
+            limit: Maximum number of results
+            skip: Number of results to skip (page offset)
+            op: Name for the bytes metrics
+
+        Yields:
+            Result dicts
+
+        Raises:
+            ValueError: If ``keys`` is empty (whole objects are never fetched)
+        """
+        if not keys:
+            raise ValueError("query() needs the keys to fetch")
+        params = {"where": _compact(where), "keys": ",".join(keys), "limit": limit}
+        if order:
+            params["order"] = order
+        if skip:
+            params["skip"] = skip
+        return self._stream(op, f"classes/{class_name}", params)
+
+    def count(self, class_name: str, where: dict, op: str = "count") -> int:
+        """Count the objects of ``class_name`` matching ``where`` without fetching any."""
+        params = {"where": _compact(where), "count": 1, "limit": 0}
+        resp = self.request("GET", f"classes/{class_name}", params=params)
+        resp.raise_for_status()
+        data = resp.json() or {}
+        self._record_bytes(op, resp, len(resp.content))
+        return int(data.get("count", 0))
+
+    def exists(self, class_name: str, where: dict) -> bool:
+        """True if any object of ``class_name`` matches ``where`` (a count query; no objects sent)."""
+        return self.count(class_name, where, op="exists") > 0
+
+    def _stream(self, op: str, path: str, params: dict):
+        resp = self.request("GET", path, params=params, stream=True)
+        decoded = 0
+        try:
+            resp.raise_for_status()
+
+            def chunks():
+                nonlocal decoded
+                for chunk in resp.iter_content(_STREAM_CHUNK):
+                    decoded += len(chunk)
+                    yield chunk
+
+            yield from iter_array(chunks(), "results")
+        finally:
+            self._record_bytes(op, resp, decoded)
+            resp.close()
+
+    def _record_bytes(self, op: str, resp, decoded: int) -> None:
+        """Record one response's size on the wire (compressed) and decoded."""
+        tell = getattr(resp.raw, "tell", None)
+        wire = tell() if tell else decoded
+        metrics.histogram(f"parse.{self.name}.{op}.wire_bytes", BYTES_BUCKETS).observe(wire)
+        metrics.counter(f"parse.{self.name}.wire_bytes").inc(wire)
+        metrics.counter(f"parse.{self.name}.decoded_bytes").inc(decoded)
+
+    # --- PromoCodeInfo ---
+
+    def promo_exists(self, promo_code_id: str) -> bool:
+        """Check if a promo code already exists in the database."""
+        return self.exists("PromoCodeInfo", {"promoCodeId": promo_code_id})
+
+    def create_promo_object(self, payload: dict) -> dict:
+        """Create a new promo code object in the database; returns {"objectId", "createdAt"}."""
+        resp = self.request("POST", "classes/PromoCodeInfo", json=payload)
+        resp.raise_for_status()
+        return resp.json() or {}
+
+    def reserve_promo_code(self, promo_code_id: str) -> bool:
+        """
+        Atomically claim a promo code across all bot replicas.
+
+        Creates a reservation object keyed by the code. The reservation class
+        must have a unique index on ``key``; Parse then rejects a second
+        reservation for the same code with DUPLICATE_VALUE, which makes the
+        claim a conditional create.
+
+        Returns:
+            True if this process now owns the code, False if someone else does
+        """
+        payload = {"key": promo_code_id, "reservedBy": PROMO_REPLICA_ID}
+        resp = self.request("POST", f"classes/{PROMO_RESERVATION_CLASS}", json=payload)
+        if resp.status_code == 400:
+            try:
+                if (resp.json() or {}).get("code") == DUPLICATE_VALUE:
+                    return False
+            except ValueError:
+                pass
+        resp.raise_for_status()
+        return True
+
+    def get_config(self) -> dict:
+        """Fetch the app's Parse Config parameters."""
+        resp = self.request("GET", "config")
+        resp.raise_for_status()
+        return (resp.json() or {}).get("params") or {}
+
+    def find_promos(self, where: dict, keys, order: str = "", limit: int = 100, skip: int = 0) -> list:
+        """
+        Query PromoCodeInfo objects.
+
+        Args:
+            where: Parse ``where`` constraint dict
+            keys: Field names to fetch
+            order: Optional Parse sort order (e.g., "-createdAt")
+            limit: Maximum number of results
+            skip: Number of results to skip (page offset)
+
+        Returns:
+            List of result dicts
+        """
+        return list(self.query("PromoCodeInfo", where, keys, order=order, limit=limit, skip=skip, op="find"))
 
+    def count_promos(self, where: dict) -> int:
+        """Count PromoCodeInfo objects matching ``where`` without fetching any."""
+        return self.count("PromoCodeInfo", where)
 
-def _parse_headers():
-    """Build Parse REST headers with authentication."""
-    headers = {
-        "X-Parse-Application-Id": PARSE_APP_ID,
-        "Content-Type": "application/json",
-    }
-    # Prefer master key if available; else use REST key
-    if PARSE_MASTER:
-        headers["X-Parse-Master-Key"] = PARSE_MASTER
-    elif PARSE_REST_KEY:
-        headers["X-Parse-REST-API-Key"] = PARSE_REST_KEY
-    return headers
+    def iter_promos(self, where: dict, keys, page_size: int = 500, after: str = ""):
+        """
+        Stream PromoCodeInfo objects matching ``where``, ordered by objectId.
+
+        Pages with an objectId cursor instead of ``skip``, so every page costs
+        the same no matter how deep into the class it is. Objects are yielded
+        while their page is still being decoded.
+
+        Args:
+            where: Parse ``where`` constraint dict
+            keys: Field names to fetch (objectId is always returned)
+            page_size: Objects fetched per request
+            after: Resume after this objectId
+
+        Yields:
+            Result dicts
+        """
+        last = after
+        while True:
+            page_where = dict(where)
+            if last:
+                page_where["objectId"] = {"$gt": last}
+            seen = 0
+            for obj in self.query("PromoCodeInfo", page_where, keys, order="objectId", limit=page_size, op="scan"):
+                seen += 1
+                last = obj["objectId"]
+                yield obj
+            if seen < page_size:
+                return
+
+    def iter_promos_by_time(self, where: dict, keys, page_size: int = 500, after=None,
+                            field: str = "createdAt"):
+        """
+        Stream PromoCodeInfo objects ordered by a timestamp field, then objectId.
+
+        The cursor is the (timestamp, objectId) of the last object seen, so
+        objects sharing a timestamp are neither skipped nor repeated, and pages
+        never use ``skip``.
+
+        Args:
+            where: Parse ``where`` constraint dict (may constrain ``field`` too)
+            keys: Field names to fetch (objectId/createdAt/updatedAt are always returned)
+            page_size: Objects fetched per request
+            after: Optional (iso_timestamp, objectId) cursor to resume after
+            field: "createdAt" or "updatedAt"
+
+        Yields:
+            Result dicts
+        """
+        cursor = tuple(after) if after else None
+        while True:
+            page_where = dict(where)
+            if cursor:
+                ts, oid = cursor
+                page_where["$or"] = [
+                    {field: {"$gt": parse_date(ts)}},
+                    {field: parse_date(ts), "objectId": {"$gt": oid}},
+                ]
+            seen = 0
+            for obj in self.query("PromoCodeInfo", page_where, keys, order=f"{field},objectId", limit=page_size,
+                                  op="scan"):
+                seen += 1
+                cursor = (obj[field], obj["objectId"])
+                yield obj
+            if seen < page_size:
+                return
+
+    def batch_update(self, updates: list) -> list:
+        """
+        Apply field updates to PromoCodeInfo objects through Parse's /batch endpoint.
+
+        Args:
+            updates: List of (object_id, fields) tuples, at most BATCH_LIMIT long
+
+        Returns:
+            Parse's per-operation results, in order: {"success": ...} or {"error": ...}
+        """
+        if len(updates) > BATCH_LIMIT:
+            raise ValueError(f"At most {BATCH_LIMIT} updates per batch (got {len(updates)})")
+        if not updates:
+            return []
+
+        ops = [
+            {"method": "PUT", "path": f"{self.mount}/classes/PromoCodeInfo/{object_id}", "body": fields}
+            for object_id, fields in updates
+        ]
+        resp = self.request("POST", "batch", json={"requests": ops}, timeout=30)
+        resp.raise_for_status()
+        return resp.json() or []
+
+
+# --- environments ---
+
+_clients = None
+_clients_lock = threading.Lock()
+_environment = contextvars.ContextVar("parse_environment", default=None)
+
+
+def clients() -> dict:
+    """{environment name: ParseClient} for every configured environment, built once."""
+    global _clients
+    if _clients is None:
+        with _clients_lock:
+            if _clients is None:
+                _clients = {name: ParseClient(name, **env) for name, env in PARSE_ENVIRONMENTS.items()}
+    return _clients
+
+
+def get_client(environment: str = None) -> ParseClient:
+    """
+    The client for ``environment`` (the default one if empty).
+
+    Raises:
+        ValueError: For an environment that is not configured
+    """
+    name = (environment or PARSE_DEFAULT_ENVIRONMENT).lower()
+    try:
+        return clients()[name]
+    except KeyError:
+        raise ValueError(f"Unknown Parse environment `{name}` (configured: {', '.join(clients())})") from None
+
+
+def current() -> ParseClient:
+    """The client for the current context (see use_environment())."""
+    return get_client(_environment.get())
+
+
+@contextlib.contextmanager
+def use_environment(environment: str = None):
+    """Route module-level Parse calls in this context (thread) to ``environment``."""
+    client = get_client(environment)
+    token = _environment.set(client.name)
+    try:
+        yield client
+    finally:
+        _environment.reset(token)
+
+
+def resolve_environment(prefix: str, choice: str = "") -> str:
+    """Environment for a job: the explicit ``choice``, else PARSE_PREFIX_ENVIRONMENTS, else the default."""
+    return get_client(choice or PARSE_PREFIX_ENVIRONMENTS.get(prefix)).name
+
+
+def is_outage(exc: Exception) -> bool:
+    """True if ``exc`` says Parse is down or overloaded, rather than that the request was bad."""
+    if isinstance(exc, CircuitOpenError):
+        return True
+    import requests  # already loaded by the session that raised
+
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    resp = getattr(exc, "response", None)
+    return resp is not None and resp.status_code in _UNHEALTHY_STATUS
+
+
+def _compact(where: dict) -> str:
+    """``where`` as JSON without the optional spaces (it goes in every query string)."""
+    return json.dumps(where, separators=(",", ":"))
+
+
+def parse_date(iso: str) -> dict:
+    """Wrap an ISO-8601 timestamp as a Parse Date for use in queries."""
+    return {"__type": "Date", "iso": iso}
+
+
+# --- facade: the current environment's client ---
+
+def probe() -> bool:
+    return current().probe()
+
+
+def prewarm(connections: int = 1) -> None:
+    """Pre-warm every environment's connection pool (see ParseClient.prewarm())."""
+    for client in clients().values():
+        client.prewarm(connections)
 
 
 def promo_exists(promo_code_id: str) -> bool:
-    """Check if a promo code already exists in the database."""
-    api_root = os.environ["PARSE_API_ROOT"].rstrip("/")
-    url = f"{api_root}/classes/PromoCodeInfo"
-    params = {"where": json.dumps({"promoCodeId": promo_code_id}), "limit": 1}
-    resp = requests.get(url, headers=_parse_headers(), params=params, timeout=10)
-    resp.raise_for_status()
-    data = resp.json() or {}
-    results = data.get("results", [])
-    return len(results) > 0
-
-
-def create_promo_object(payload: dict) -> None:
-    """Create a new promo code object in the database."""
-    api_root = os.environ["PARSE_API_ROOT"].rstrip("/")
-    url = f"{api_root}/classes/PromoCodeInfo"
-    resp = requests.post(url, headers=_parse_headers(), json=payload, timeout=10)
-    resp.raise_for_status()
+    return current().promo_exists(promo_code_id)
+
+
+def create_promo_object(payload: dict) -> dict:
+    return current().create_promo_object(payload)
+
+
+def reserve_promo_code(promo_code_id: str) -> bool:
+    return current().reserve_promo_code(promo_code_id)
+
+
+def get_config() -> dict:
+    return current().get_config()
+
+
+def find_promos(where: dict, keys, order: str = "", limit: int = 100, skip: int = 0) -> list:
+    return current().find_promos(where, keys=keys, order=order, limit=limit, skip=skip)
+
+
+def count_promos(where: dict) -> int:
+    return current().count_promos(where)
+
+
+def iter_promos(where: dict, keys, page_size: int = 500, after: str = ""):
+    return current().iter_promos(where, keys=keys, page_size=page_size, after=after)
+
+
+def batch_update(updates: list) -> list:
+    return current().batch_update(updates)
+
+
+def iter_promos_by_time(where: dict, keys, page_size: int = 500, after=None, field: str = "createdAt"):
+    return current().iter_promos_by_time(where, keys=keys, page_size=page_size, after=after, field=field)
@@ -1,17 +1,29 @@
 """Promo code generation logic."""
-import random
 from typing import Set
-from src.core.parse_api import promo_exists, create_promo_object
+from src.config import PROMO_RESERVATIONS_ENABLED
+from src.core.parse_api import current as current_parse, promo_exists, create_promo_object, reserve_promo_code
+from src.core.lookup import invalidate_user
+from src.core.mirror import get_mirror
+from src.core.suffix_engine import SuffixEngine
+from src.core.suffix_policy import get_suffix_policy
+from src.utils import metrics
+from src.utils.startup import mark_once
 
 
+# Candidates needed per successful code
+ATTEMPT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
 # Characters used for promo code suffix generation
 _CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890"
 
+# CSPRNG suffix source; replace together with _CHARS (e.g. in stress tests)
+_engine = SuffixEngine(_CHARS)
+
 
-def _gen_suffix(seen: Set[str]) -> str:
-    """Generate a unique 4-character suffix for a promo code."""
+def _gen_suffix(seen: Set[str], length: int = 4) -> str:
+    """Generate a suffix of ``length`` characters not yet in ``seen``."""
     while True:
-        s = "".join(random.choice(_CHARS) for _ in range(4))
+        s = _engine.next_suffix(length)
         if s not in seen:
             seen.add(s)
             return s
@@ -35,12 +47,30 @@ def create_promo_for_user(user_id: str, prefix: str, duration: str, partner: str
     """
     uid = user_id.strip().lower()
     seen: Set[str] = set()
+    # The mirror copies the default environment only
+    mirror = get_mirror() if current_parse().is_default else None
+    policy = get_suffix_policy()
+    length, collisions = policy.length_for(prefix), 0
     
     for _ in range(100):  # retry on rare collisions
-        code = f"{prefix}{_gen_suffix(seen)}"
+        if policy.length_for(prefix) != length:
+            # Another thread grew this prefix meanwhile; count collisions afresh
+            length, collisions = policy.length_for(prefix), 0
+        code = f"{prefix}{_gen_suffix(seen, length)}"
         
-        # If exists, try next code
+        # Known locally → skip without a Parse round trip; Parse still has the final say
+        if mirror and mirror.has_code(code):
+            collisions += 1
+            continue
+
+        # Claim the code atomically so no other replica/thread can mint it concurrently
+        if PROMO_RESERVATIONS_ENABLED and not reserve_promo_code(code):
+            collisions += 1
+            continue
+
+        # If exists, try next code (covers codes created before reservations existed)
         if promo_exists(code):
+            collisions += 1
             continue
             
         payload = {
@@ -50,7 +80,24 @@ def create_promo_for_user(user_id: str, prefix: str, duration: str, partner: str
             "promoCodeDuration": duration,
             "promoCodeDistributionPartner": partner,
         }
-        create_promo_object(payload)
+        created = create_promo_object(payload)
+        if mirror:
+            try:
+                mirror.record_created(payload, created)
+            except Exception as e:
+                print(f"[mirror] write-through failed for {code}: {e}")
+        invalidate_user(uid)
+        policy.record(prefix, length, collisions)
+        _record_attempts(prefix, collisions + 1)
+        mark_once("first_code")
         return code
-        
+
+    # Grows the suffix so the next attempt for this prefix has room
+    policy.record(prefix, length, collisions, success=False)
+    metrics.counter(f"promo.gave_up.{prefix}").inc()
     raise RuntimeError("Could not generate a unique promo after many attempts")
+
+
+def _record_attempts(prefix: str, attempts: int) -> None:
+    """Per-prefix telemetry: candidates (uniqueness checks) per successful code."""
+    metrics.histogram(f"promo.attempts.{prefix}", ATTEMPT_BUCKETS).observe(attempts)
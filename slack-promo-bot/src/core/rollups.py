@@ -0,0 +1,234 @@
+"""Pre-aggregated usage rollups for ``/promo-stats``.
+
+Codes handed out are counted per hour, day and month × prefix × partner ×
+requester, updated as each job finishes. A report sums a handful of
+rollup rows (one per bucket and combination in range), so its cost does
+not grow with the number of codes.
+
+Codes created before the rollups went live can be backfilled by streaming
+PromoCodeInfo (``python cli.py stats-backfill``). PromoCodeInfo does not
+record who asked for a code, so backfilled rows have requester
+``BACKFILL_REQUESTER``. Backfill only counts codes created before the
+live-since time and replaces its own previous rows, so it can be re-run
+safely.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+
+from src.config import PROMO_ROLLUPS_PATH
+from src.utils.durations import iso_utc
+from src.utils.sqlite_db import connect
+from src.utils.validation import promo_code_prefix
+
+
+GRAINS = ("hour", "day", "month")
+BACKFILL_REQUESTER = "(backfill)"
+
+# Bucket key per grain, as a prefix of an ISO timestamp
+_BUCKET_LEN = {"hour": 13, "day": 10, "month": 7}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    grain     TEXT NOT NULL,
+    bucket    TEXT NOT NULL,
+    prefix    TEXT NOT NULL,
+    partner   TEXT NOT NULL,
+    requester TEXT NOT NULL,
+    source    TEXT NOT NULL,
+    codes     INTEGER NOT NULL DEFAULT 0,
+    errors    INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (grain, bucket, prefix, partner, requester, source)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_UPSERT = """INSERT INTO rollups (grain, bucket, prefix, partner, requester, source, codes, errors)
+             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+             ON CONFLICT(grain, bucket, prefix, partner, requester, source) DO UPDATE SET
+               codes = codes + excluded.codes, errors = errors + excluded.errors"""
+
+
+def bucket(ts: str, grain: str) -> str:
+    """Bucket key of ISO timestamp ``ts`` (e.g. "2025-06-01T13" for an hour)."""
+    return ts[:_BUCKET_LEN[grain]]
+
+
+def _expand(counts: dict, source: str) -> list:
+    """Rows for every grain from {(hour, prefix, partner, requester): [codes, errors]}."""
+    rolled = {}
+    for (hour, prefix, partner, requester), (codes, errors) in counts.items():
+        for grain in GRAINS:
+            key = (grain, hour[:_BUCKET_LEN[grain]], prefix, partner, requester, source)
+            c, e = rolled.get(key, (0, 0))
+            rolled[key] = (c + codes, e + errors)
+    return [k + v for k, v in rolled.items()]
+
+
+class UsageRollups:
+    """SQLite-backed rollup counters, safe to share between threads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = connect(path)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('live_since', ?)", (iso_utc(),))
+
+    @property
+    def live_since(self) -> str:
+        """When live counting started; backfill covers codes created before it."""
+        with self._lock:
+            return self._conn.execute("SELECT value FROM meta WHERE key = 'live_since'").fetchone()[0]
+
+    # --- writes ---
+
+    def _apply(self, rows: list, replace_source: str = None) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if replace_source:
+                    self._conn.execute("DELETE FROM rollups WHERE source = ?", (replace_source,))
+                self._conn.executemany(_UPSERT, rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def record_job(self, job, finished_at: str = None) -> int:
+        """
+        Count a finished GenerationJob's codes and errors.
+
+        Returns:
+            Number of rows counted
+        """
+        if not job.parse.is_default:
+            return 0  # stats cover the default Parse environment, like the backfill
+        hour = bucket(finished_at or iso_utc(), "hour")
+        counts = {}
+        for row in job.rows:
+            if row.existing:
+                continue  # handed back, not minted
+            key = (hour, job.prefix, row.partner or job.partner or "", job.requester)
+            c = counts.setdefault(key, [0, 0])
+            c[0 if row.ok else 1] += 1
+        if counts:
+            self._apply(_expand(counts, "live"))
+        return len(job.rows)
+
+    def backfill(self, objects, on_progress=None) -> int:
+        """
+        Rebuild the backfill rows from PromoCodeInfo objects created before live_since.
+
+        Counts are aggregated in memory (one entry per hour × prefix ×
+        partner) and swapped in with one transaction, replacing any earlier
+        backfill.
+
+        Args:
+            objects: Iterable of dicts with promoCodeId, promoCodeDistributionPartner, createdAt
+            on_progress: Optional callback(objects_seen) every 10,000 objects
+
+        Returns:
+            Number of codes counted
+        """
+        cutoff = self.live_since
+        counts, n = {}, 0
+        for n, obj in enumerate(objects, 1):
+            created = obj.get("createdAt") or ""
+            if not created or created >= cutoff:
+                continue
+            key = (bucket(created, "hour"), promo_code_prefix(obj.get("promoCodeId") or ""),
+                   obj.get("promoCodeDistributionPartner") or "", BACKFILL_REQUESTER)
+            counts.setdefault(key, [0, 0])[0] += 1
+            if on_progress and n % 10000 == 0:
+                on_progress(n)
+        self._apply(_expand(counts, "backfill"), replace_source="backfill")
+        return sum(c for c, _ in counts.values())
+
+    # --- reads ---
+
+    def totals(self, grain: str, since: str, until: str) -> dict:
+        """
+        Sum rollups for buckets in [since, until) at ``grain``.
+
+        Args:
+            grain: "hour", "day" or "month"
+            since: Bucket key or ISO timestamp (truncated to the grain), inclusive
+            until: Same, exclusive
+
+        Returns:
+            {"codes", "errors", "buckets", "by_prefix", "by_partner", "by_requester"};
+            the breakdowns map each key to [codes, errors]
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT bucket, prefix, partner, requester, SUM(codes), SUM(errors) FROM rollups
+                   WHERE grain = ? AND bucket >= ? AND bucket < ?
+                   GROUP BY bucket, prefix, partner, requester""",
+                (grain, bucket(since, grain), bucket(until, grain)),
+            ).fetchall()
+        result = {"codes": 0, "errors": 0, "buckets": set(), "by_prefix": {}, "by_partner": {}, "by_requester": {}}
+        for b, prefix, partner, requester, codes, errors in rows:
+            result["codes"] += codes
+            result["errors"] += errors
+            result["buckets"].add(b)
+            for name, key in (("by_prefix", prefix), ("by_partner", partner), ("by_requester", requester)):
+                c = result[name].setdefault(key, [0, 0])
+                c[0] += codes
+                c[1] += errors
+        return result
+
+
+def period_range(period: str, now: datetime = None) -> tuple:
+    """
+    (grain, since, until, label) for a `/promo-stats` period.
+
+    Periods: "24h" (hourly), "today", "7d" / "week", "30d", "month" (this
+    calendar month), "YYYY-MM" (that month), "YYYY-MM-DD" (that day).
+
+    Raises:
+        ValueError: For an unknown period
+    """
+    now = now or datetime.now(timezone.utc)
+    iso = lambda dt: dt.isoformat()[:19]  # noqa: E731
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "24h":
+        start = now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=23)
+        return "hour", iso(start), iso(now + timedelta(hours=1)), "last 24 hours"
+    if period == "today":
+        return "day", iso(day), iso(day + timedelta(days=1)), f"today ({day:%Y-%m-%d})"
+    if period in ("7d", "week", "30d"):
+        days = 30 if period == "30d" else 7
+        return "day", iso(day - timedelta(days=days - 1)), iso(day + timedelta(days=1)), f"last {days} days"
+    if period == "month":
+        period = f"{now:%Y-%m}"
+    try:
+        if len(period) == 7:
+            start = datetime.strptime(period, "%Y-%m")
+            end = (start + timedelta(days=32)).replace(day=1)
+            return "month", iso(start), iso(end), start.strftime("%B %Y")
+        if len(period) == 10:
+            start = datetime.strptime(period, "%Y-%m-%d")
+            return "day", iso(start), iso(start + timedelta(days=1)), period
+    except ValueError:
+        pass
+    raise ValueError(f"Unknown period `{period}`")
+
+
+_rollups = None
+_rollups_lock = threading.Lock()
+
+
+def get_rollups():
+    """Return the process-wide rollups, or None if PROMO_ROLLUPS_PATH is unset."""
+    global _rollups
+    if not PROMO_ROLLUPS_PATH:
+        return None
+    if _rollups is None:
+        with _rollups_lock:
+            if _rollups is None:
+                _rollups = UsageRollups(PROMO_ROLLUPS_PATH)
+    return _rollups
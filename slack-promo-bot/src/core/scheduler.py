@@ -0,0 +1,300 @@
+"""
+Fair scheduling of generation jobs across requesters.
+
+Every code minted costs Parse requests, and the process shares a fixed
+budget of concurrent mints (worker threads) between all jobs. Requesters
+take turns by deficit round robin: each turn a requester earns
+``quantum × weight`` credit and spends one credit per code, so a
+requester with a 10-code job is served between the codes of someone
+else's 5,000-code job instead of after it. Within one requester the job
+with the fewest codes left goes first. A per-requester cap bounds how
+many of the budget's slots one person can hold at once.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+
+from src.config import (
+    PROMO_WORKER_PARSE_BUDGET,
+    PROMO_WORKER_REQUESTER_MAX_INFLIGHT,
+    PROMO_SCHEDULER_QUANTUM,
+    PROMO_REQUESTER_WEIGHTS,
+)
+from src.core.jobs import QUEUED, DEFERRED
+from src.utils import metrics
+
+
+# Seconds from confirm to the first code of a job starting
+WAIT_BUCKETS_S = (0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+# Codes replayed at most when working out a queue position; jobs not reached by then count as ahead
+_REPLAY_LIMIT = 50000
+
+
+class _Lane:
+    """Scheduler state for one requester."""
+
+    def __init__(self, weight: float):
+        self.weight = weight
+        self.jobs = []
+        self.deficit = 0.0
+        self.inflight = 0
+
+    def next_job(self):
+        """Job to take the next code from: fewest unclaimed codes first."""
+        ready = [j for j in self.jobs if j.claimable()]
+        return min(ready, key=lambda j: j.unclaimed) if ready else None
+
+
+class FairScheduler:
+    """
+    Runs GenerationJobs on a shared pool of ``budget`` worker threads.
+
+    Args:
+        budget: Codes minted concurrently across all jobs (this process's share of the Parse budget)
+        per_requester_cap: Codes one requester may have in flight at once in this process
+        quantum: Credit a requester earns per round (× its weight)
+        weights: Optional {requester: weight}; default weight is 1
+    """
+
+    def __init__(self, budget: int = PROMO_WORKER_PARSE_BUDGET,
+                 per_requester_cap: int = PROMO_WORKER_REQUESTER_MAX_INFLIGHT,
+                 quantum: float = PROMO_SCHEDULER_QUANTUM, weights: dict = None):
+        self.budget = max(1, int(budget))
+        self.per_requester_cap = max(1, int(per_requester_cap))
+        self.quantum = float(quantum)
+        self.weights = dict(PROMO_REQUESTER_WEIGHTS if weights is None else weights)
+        self._lanes = OrderedDict()  # requester -> _Lane; the head is served next
+        self._cond = threading.Condition()
+        self._workers = []
+        self._stopped = False
+
+    # --- public API ---
+
+    def submit(self, job) -> int:
+        """
+        Queue a job.
+
+        Returns:
+            Queue position, see position()
+        """
+        with self._cond:
+            lane = self._lanes.get(job.requester)
+            if lane is None:
+                lane = self._lanes[job.requester] = _Lane(self.weights.get(job.requester, 1.0))
+            lane.jobs.append(job)
+            self._start_workers()
+            self._cond.notify_all()
+        metrics.counter("scheduler.jobs_submitted").inc()
+        return self.position(job)
+
+    def position(self, job) -> int:
+        """
+        Current queue position of a queued ``job`` (0 once it has started or finished).
+
+        1 + the number of other not-yet-started jobs that will start before
+        it, found by replaying the deficit round robin one code at a time on
+        a copy of the lanes (the per-requester cap is ignored). A job that
+        was not submitted yet is placed where submit() would put it.
+        """
+        if job.status != QUEUED or job.started_at is not None:
+            return 0
+        with self._cond:
+            lanes, found = [], False
+            for requester, lane in self._lanes.items():
+                left = {j: j.unclaimed for j in lane.jobs if j is job or j.claimable()}
+                found = found or job in left
+                if requester == job.requester and not found:
+                    left[job] = job.unclaimed
+                    found = True
+                lanes.append([lane.deficit, self.quantum * lane.weight, left])
+            if not found:
+                lanes.append([0.0, self.quantum * self.weights.get(job.requester, 1.0), {job: job.unclaimed}])
+        return self._replay(deque(lanes), job)
+
+    @staticmethod
+    def _replay(lanes: deque, job) -> int:
+        """Replay _pick() on [deficit, credit per round, {job: codes left}] lanes until ``job`` is picked."""
+        started = set()
+        for _ in range(_REPLAY_LIMIT):
+            if not lanes:
+                break
+            lane = lanes[0]
+            deficit, credit, left = lane
+            if not left:
+                lanes.popleft()
+                continue
+            if deficit < 1:
+                deficit += credit
+                if deficit < 1:
+                    lane[0] = deficit
+                    lanes.rotate(-1)
+                    continue
+            picked = min(left, key=left.get)  # _Lane.next_job(): fewest codes left, first on ties
+            if picked is job:
+                return len(started) + 1
+            if picked.started_at is None:
+                started.add(picked)
+            left[picked] -= 1
+            if not left[picked]:
+                del left[picked]
+            lane[0] = deficit - 1
+            if lane[0] < 1:
+                lanes.rotate(-1)
+        # Not reached within the limit: count every job that has not started yet as ahead
+        waiting = {j for _, _, left in lanes for j in left if j.started_at is None and j is not job}
+        return len(started | waiting) + 1
+
+    def find(self, job_id: str):
+        """The unfinished job with this ID, or None."""
+        with self._cond:
+            for lane in self._lanes.values():
+                for job in lane.jobs:
+                    if job.job_id == job_id:
+                        return job
+        return None
+
+    def pause(self, job) -> bool:
+        """Pause ``job`` between codes."""
+        return job.pause()
+
+    def resume(self, job) -> bool:
+        """Resume a paused ``job``."""
+        with self._cond:
+            resumed = job.resume()
+            self._cond.notify_all()
+        return resumed
+
+    def cancel(self, job) -> bool:
+        """
+        Cancel ``job`` between codes.
+
+        If nothing is in flight the job is finalized here (its on_done runs
+        in the caller's thread); otherwise the worker finishing the last
+        in-flight code does it.
+        """
+        with self._cond:
+            finished = job.cancel()
+            if finished:
+                self._remove(job)
+            self._cond.notify_all()
+        if finished:
+            self._callback(job, job.on_done)
+        return True
+
+    def active_jobs(self) -> list:
+        """Unfinished jobs, oldest first."""
+        with self._cond:
+            jobs = [j for l in self._lanes.values() for j in l.jobs]
+        return sorted(jobs, key=lambda j: j.submitted_at)
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    # --- internals ---
+
+    def _start_workers(self) -> None:
+        if self._workers:
+            return
+        for i in range(self.budget):
+            t = threading.Thread(target=self._work, name=f"promo-scheduler-{i}", daemon=True)
+            t.start()
+            self._workers.append(t)
+
+    def _eligible(self, lane) -> bool:
+        return lane.inflight < self.per_requester_cap and lane.next_job() is not None
+
+    def _pick(self):
+        """Deficit round robin over requesters; call with the condition held."""
+        while True:
+            if self._stopped:
+                return None
+            eligible = [r for r, lane in self._lanes.items() if self._eligible(lane)]
+            if not eligible:
+                self._cond.wait()
+                continue
+            requester, lane = next(iter(self._lanes.items()))
+            if not self._eligible(lane):
+                self._lanes.move_to_end(requester)
+                continue
+            if lane.deficit < 1:
+                lane.deficit += self.quantum * lane.weight
+                if lane.deficit < 1:
+                    self._lanes.move_to_end(requester)
+                    continue
+            job = lane.next_job()
+            index = job.claim()
+            if index is None:
+                continue  # paused/cancelled since next_job() looked at it
+            first = index == 0
+            lane.deficit -= 1
+            lane.inflight += 1
+            if lane.deficit < 1:
+                self._lanes.move_to_end(requester)
+            return lane, job, index, first
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                picked = self._pick()
+            if picked is None:
+                return
+            lane, job, index, first = picked
+            if first:
+                self._record_wait(job)
+
+            row = job.run(index)
+            finished = job.record(index, row)
+
+            with self._cond:
+                lane.inflight -= 1
+                if finished:
+                    self._remove(job)
+                self._cond.notify_all()
+
+            if not finished:
+                self._callback(job, job.on_progress)
+            else:
+                self._callback(job, job.on_deferred if job.status == DEFERRED else job.on_done)
+
+    def _remove(self, job) -> None:
+        """Drop a finished job; call with the condition held."""
+        lane = self._lanes.get(job.requester)
+        if lane is None:
+            return
+        if job in lane.jobs:
+            lane.jobs.remove(job)
+        if not lane.jobs and not lane.inflight:
+            # Idle requesters don't bank credit (standard DRR)
+            self._lanes.pop(job.requester, None)
+
+    @staticmethod
+    def _callback(job, callback) -> None:
+        if callback:
+            try:
+                callback(job)
+            except Exception as e:
+                print(f"[scheduler] callback failed for job {job.job_id}: {e}")
+
+    def _record_wait(self, job) -> None:
+        wait = job.wait_seconds()
+        metrics.histogram("scheduler.wait_s", WAIT_BUCKETS_S).observe(wait)
+        metrics.histogram(f"scheduler.wait_s.{job.requester}", WAIT_BUCKETS_S).observe(wait)
+        if wait >= 30:
+            print(f"[scheduler] job {job.job_id} for {job.requester} waited {wait:.0f}s")
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> FairScheduler:
+    """Return the process-wide scheduler."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = FairScheduler()
+    return _scheduler
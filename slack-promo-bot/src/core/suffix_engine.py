@@ -0,0 +1,73 @@
+"""
+Cryptographically random promo code suffixes, generated in bulk.
+
+Entropy comes from ``os.urandom`` (the same source as ``secrets``) in
+large reads. Each byte is mapped to one alphabet symbol by rejection
+sampling: bytes below the largest multiple of the alphabet size are kept
+(``byte % size``), the rest are dropped, so every symbol is exactly
+equally likely. The mapping and the rejection both run inside
+``bytes.translate``, so thousands of suffixes cost one syscall and a few
+C-level passes instead of a Python loop per character.
+"""
+import os
+import threading
+
+
+class SuffixEngine:
+    """
+    Source of uniformly random suffixes over ``alphabet``.
+
+    Args:
+        alphabet: Symbols to draw from (at most 256, ASCII)
+        buffer_symbols: Symbols fetched per refill of the shared pool
+    """
+
+    def __init__(self, alphabet: str, buffer_symbols: int = 16384):
+        if not 1 < len(alphabet) <= 256 or len(set(alphabet)) != len(alphabet):
+            raise ValueError("alphabet must have 2-256 distinct symbols")
+        self.alphabet = alphabet
+        self.buffer_symbols = buffer_symbols
+        size = len(alphabet)
+        self._limit = 256 - 256 % size  # bytes >= limit are rejected
+        self._table = bytes(ord(alphabet[b % size]) if b < self._limit else 0 for b in range(256))
+        self._rejected = bytes(range(self._limit, 256))
+        self._pool = ""
+        self._pos = 0
+        self._lock = threading.Lock()
+
+    def symbols(self, count: int) -> str:
+        """Exactly ``count`` random symbols."""
+        out, have = [], 0
+        while have < count:
+            # Over-draw by the rejection rate plus a little, so one pass usually suffices
+            need = count - have
+            raw = os.urandom(need * 256 // self._limit + 16)
+            chunk = raw.translate(self._table, self._rejected).decode("ascii")
+            out.append(chunk)
+            have += len(chunk)
+        return "".join(out)[:count]
+
+    def suffixes(self, count: int, length: int = 4) -> list:
+        """``count`` random suffixes of ``length`` symbols (duplicates possible, as with any random draw)."""
+        s = self.symbols(count * length)
+        return [s[i:i + length] for i in range(0, len(s), length)]
+
+    def stream(self, length: int = 4, batch: int = 4096):
+        """
+        Endless generator of suffixes, refilled ``batch`` at a time.
+
+        For batched allocation paths that mint many codes in one loop; not
+        thread-safe (use one generator per thread, or next_suffix()).
+        """
+        while True:
+            yield from self.suffixes(batch, length)
+
+    def next_suffix(self, length: int = 4) -> str:
+        """One suffix from a shared, thread-safe pool of pre-drawn symbols."""
+        with self._lock:
+            if self._pos + length > len(self._pool):
+                self._pool = self.symbols(max(self.buffer_symbols, length))
+                self._pos = 0
+            s = self._pool[self._pos:self._pos + length]
+            self._pos += length
+            return s
@@ -0,0 +1,174 @@
+"""
+Per-prefix suffix length, grown automatically as a prefix fills up.
+
+Every candidate code costs at least one uniqueness check. With occupancy
+``o`` of a prefix's suffix space, a random candidate collides with
+probability ``o``, so a code takes ``1 / (1 - o)`` candidates on average.
+The policy keeps an exponentially weighted collision rate per prefix and,
+once the expected candidates per code crosses a threshold, moves new
+codes for that prefix to a longer suffix (36× more space per character).
+Existing codes are unaffected; lengths only ever grow.
+
+State is persisted as JSON so a restart keeps the grown lengths. That
+file is local to one replica and gone after a redeploy on an ephemeral
+filesystem, so the length is also read back from Parse: the longest
+suffix among a prefix's newest codes is a floor, re-checked every
+PROMO_SUFFIX_OBSERVE_SECONDS. A replica that never saw the growth, or
+starts without the file, follows the others instead of minting short
+suffixes into a full space again.
+"""
+import re
+import threading
+
+from src.config import (
+    PROMO_SUFFIX_POLICY_PATH,
+    PROMO_SUFFIX_MIN_LENGTH,
+    PROMO_SUFFIX_MAX_LENGTH,
+    PROMO_SUFFIX_MAX_EXPECTED_ATTEMPTS,
+    PROMO_SUFFIX_OBSERVE_SECONDS,
+)
+from src.core.parse_api import current as current_parse
+from src.utils.cache import TTLCache
+from src.utils.checkpoint import Checkpoint
+
+
+# Weight of the newest candidate in the collision-rate average (~ last 200 candidates)
+_ALPHA = 0.005
+# Candidates observed at the current length before the rate is trusted
+_MIN_SAMPLES = 200
+# Newest codes of a prefix whose suffix lengths set the floor
+_OBSERVE_CODES = 20
+
+
+class SuffixPolicy:
+    """
+    Tracks collision rates and the suffix length to use for each prefix.
+
+    Args:
+        path: JSON file to persist to ("" keeps the policy in memory only)
+        min_length: Suffix length for prefixes never seen before
+        max_length: Longest suffix the policy will move to
+        max_expected_attempts: Grow once 1 / (1 - collision rate) exceeds this
+        observe_ttl: Seconds between reads of the lengths in use in Parse (0 never reads them)
+    """
+
+    def __init__(self, path: str = PROMO_SUFFIX_POLICY_PATH, min_length: int = PROMO_SUFFIX_MIN_LENGTH,
+                 max_length: int = PROMO_SUFFIX_MAX_LENGTH,
+                 max_expected_attempts: float = PROMO_SUFFIX_MAX_EXPECTED_ATTEMPTS,
+                 observe_ttl: float = PROMO_SUFFIX_OBSERVE_SECONDS):
+        self.min_length = min_length
+        self.max_length = max(min_length, max_length)
+        self.max_expected_attempts = max_expected_attempts
+        self._store = Checkpoint(path) if path else None
+        self._prefixes = dict(self._store.load().get("prefixes", {})) if self._store else {}
+        self._observed = TTLCache(maxsize=1024, ttl=observe_ttl) if observe_ttl > 0 else None
+        self._lock = threading.Lock()
+
+    def length_for(self, prefix: str) -> int:
+        """Suffix length to use for new codes with ``prefix`` (never shorter than the newest codes in Parse)."""
+        state = self._prefixes.get(prefix)
+        length = state["length"] if state else self.min_length
+        if self._observed is None or length >= self.max_length:
+            return length
+        observed = self._observed_length(prefix)
+        if observed <= length:
+            return length
+        with self._lock:
+            state = self._prefixes.setdefault(prefix, {
+                "length": self.min_length, "collision_rate": 0.0, "samples": 0, "codes": 0,
+            })
+            if observed > state["length"]:
+                print(f"[suffix] {prefix} codes in Parse already use {observed}-character suffixes; following")
+                state.update(length=observed, collision_rate=0.0, samples=0)
+                self._save()
+            return state["length"]
+
+    def expected_attempts(self, prefix: str) -> float:
+        """Estimated candidates per code at the current length."""
+        state = self._prefixes.get(prefix)
+        rate = state["collision_rate"] if state else 0.0
+        return 1.0 / max(1e-9, 1.0 - rate)
+
+    def snapshot(self) -> dict:
+        """Copy of the per-prefix state (for reports)."""
+        with self._lock:
+            return {p: dict(s) for p, s in self._prefixes.items()}
+
+    def record(self, prefix: str, length: int, collisions: int, success: bool = True) -> bool:
+        """
+        Feed the outcome of one create_promo_for_user() call.
+
+        Args:
+            prefix: Code prefix
+            length: Suffix length the candidates were drawn with
+            collisions: Candidates rejected because the code was taken
+            success: False if the caller gave up without a code
+
+        Returns:
+            True if the prefix just moved to a longer suffix
+        """
+        with self._lock:
+            state = self._prefixes.setdefault(prefix, {
+                "length": self.min_length, "collision_rate": 0.0, "samples": 0, "codes": 0,
+            })
+            if length != state["length"]:
+                return False  # drawn before a length change; says nothing about the new space
+            outcomes = [1.0] * collisions + ([0.0] if success else [])
+            rate = state["collision_rate"]
+            for collided in outcomes:
+                rate += _ALPHA * (collided - rate)
+            state["collision_rate"] = rate
+            state["samples"] += len(outcomes)
+            state["codes"] += 1 if success else 0
+
+            grow = state["length"] < self.max_length and (
+                not success
+                or (state["samples"] >= _MIN_SAMPLES and 1.0 / max(1e-9, 1.0 - rate) > self.max_expected_attempts)
+            )
+            if grow:
+                state.update(length=state["length"] + 1, collision_rate=0.0, samples=0)
+                print(f"[suffix] {prefix} suffixes grow to {state['length']} characters "
+                      f"(collision rate {rate:.2f}, ~{1 / max(1e-9, 1 - rate):.1f} attempts per code)")
+            if grow or state["codes"] % 50 == 1:
+                self._save()
+            return grow
+
+    def _observed_length(self, prefix: str) -> int:
+        """Longest suffix among the newest codes of ``prefix`` in the current Parse environment (0 if unknown)."""
+        from src.core.promo_generator import _CHARS  # promo_generator imports this module
+
+        parse = current_parse()
+        pattern = "^" + re.escape(prefix) + "[" + re.escape(_CHARS) + "]+$"
+
+        def load():
+            rows = parse.find_promos({"promoCodeId": {"$regex": pattern}}, keys=["promoCodeId"],
+                                     order="-createdAt", limit=_OBSERVE_CODES)
+            longest = max((len(r.get("promoCodeId") or "") - len(prefix) for r in rows), default=0)
+            return min(longest, self.max_length)
+
+        try:
+            return self._observed.get_or_load((parse.name, prefix), load)
+        except Exception as e:
+            print(f"[suffix] could not read {prefix} suffix lengths from Parse: {e}")
+            return 0
+
+    def _save(self) -> None:
+        if self._store:
+            try:
+                self._store.save({"prefixes": self._prefixes})
+            except OSError as e:
+                print(f"[suffix] could not persist policy: {e}")
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def get_suffix_policy() -> SuffixPolicy:
+    """Return the process-wide suffix policy."""
+    global _policy
+    if _policy is None:
+        with _policy_lock:
+            if _policy is None:
+                _policy = SuffixPolicy()
+    return _policy
@@ -0,0 +1,234 @@
+"""
+Hot-reloadable runtime settings.
+
+``src/config.py`` is read once at import and holds bootstrap values
+(tokens, Parse credentials, serving mode). The settings below can also be
+overridden at runtime from a JSON file (PROMO_CONFIG_FILE) and/or Parse
+Config (PROMO_CONFIG_FROM_PARSE=1), using the same names as the
+environment variables, e.g.::
+
+    {"PROMO_NOTIFY_CHANNEL": "C0123456789", "PROMO_AUTHORIZED_USER_IDS": "U0123ABC,U0456DEF"}
+
+A watcher thread polls the sources and swaps in a new immutable Settings
+snapshot with a single assignment. Readers call ``current()`` once per
+request and use that snapshot throughout, so they never lock and never
+see a half-applied reload.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Callable, NamedTuple
+
+from src import config
+from src.utils import metrics
+
+
+NOTIFY_MODES = ("immediate", "digest")
+NOTIFY_DETAILS = ("full", "permalink")
+
+# Milliseconds; a reload is a file read or one Parse request plus a swap
+RELOAD_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class Settings(NamedTuple):
+    default_prefix: str
+    default_duration: str
+    default_partner: str
+    notify_channel: str
+    notify_mode: str
+    notify_detail: str
+    enable_conversations_join: bool
+    inline_validation_max_ids: int
+    authorized_user_ids: frozenset
+    authorized_usergroup_ids: frozenset
+    authorized_channel_ids: frozenset
+    version: int = 0
+    source: str = "env"
+
+
+def _id_set(value) -> frozenset:
+    if isinstance(value, str):
+        value = value.split(",")
+    return frozenset(str(v).strip() for v in value if str(v).strip())
+
+
+def _choice(*allowed):
+    def parse(value) -> str:
+        choice = str(value).strip().lower()
+        if choice not in allowed:
+            raise ValueError(f"expected one of {', '.join(allowed)}")
+        return choice
+    return parse
+
+
+def _flag(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+# Override key -> (Settings field, parser)
+_KEYS = {
+    "PROMO_PREFIX": ("default_prefix", str),
+    "PROMO_DURATION": ("default_duration", str),
+    "PROMO_PARTNER": ("default_partner", str),
+    "PROMO_NOTIFY_CHANNEL": ("notify_channel", lambda v: str(v).strip()),
+    "PROMO_NOTIFY_MODE": ("notify_mode", _choice(*NOTIFY_MODES)),
+    "PROMO_NOTIFY_DETAIL": ("notify_detail", _choice(*NOTIFY_DETAILS)),
+    "ENABLE_CONVERSATIONS_JOIN": ("enable_conversations_join", _flag),
+    "PROMO_INLINE_VALIDATION_MAX_IDS": ("inline_validation_max_ids", int),
+    "PROMO_AUTHORIZED_USER_IDS": ("authorized_user_ids", _id_set),
+    "PROMO_AUTHORIZED_USERGROUP_IDS": ("authorized_usergroup_ids", _id_set),
+    "PROMO_AUTHORIZED_CHANNEL_IDS": ("authorized_channel_ids", _id_set),
+}
+
+
+def _from_env() -> Settings:
+    return Settings(
+        default_prefix=config.DEFAULT_PREFIX,
+        default_duration=config.DEFAULT_DURATION,
+        default_partner=config.DEFAULT_PARTNER,
+        notify_channel=config.PROMO_NOTIFY_CHANNEL,
+        notify_mode=config.PROMO_NOTIFY_MODE if config.PROMO_NOTIFY_MODE in NOTIFY_MODES else "immediate",
+        notify_detail=config.PROMO_NOTIFY_DETAIL if config.PROMO_NOTIFY_DETAIL in NOTIFY_DETAILS else "full",
+        enable_conversations_join=config.ENABLE_CONVERSATIONS_JOIN,
+        inline_validation_max_ids=config.PROMO_INLINE_VALIDATION_MAX_IDS,
+        authorized_user_ids=frozenset(config.PROMO_AUTHORIZED_USER_IDS),
+        authorized_usergroup_ids=frozenset(config.PROMO_AUTHORIZED_USERGROUP_IDS),
+        authorized_channel_ids=frozenset(config.PROMO_AUTHORIZED_CHANNEL_IDS),
+    )
+
+
+def build_settings(overrides: dict, base: Settings = None) -> Settings:
+    """
+    Apply override values (keyed by env var name) on top of ``base``.
+
+    Raises:
+        ValueError: If a value cannot be parsed
+    """
+    base = base or _from_env()
+    fields = {}
+    for key, value in overrides.items():
+        if key not in _KEYS:
+            continue
+        field, parse = _KEYS[key]
+        try:
+            fields[field] = parse(value)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid value for {key}: {value!r} ({e})") from e
+    return base._replace(**fields)
+
+
+_current = _from_env()
+_listeners: list = []
+_reload_lock = threading.Lock()
+
+
+def current() -> Settings:
+    """The active settings snapshot (lock-free; take it once per request)."""
+    return _current
+
+
+def on_change(listener: Callable[[Settings, Settings], None]) -> None:
+    """Call ``listener(old, new)`` after every reload that changes a setting."""
+    _listeners.append(listener)
+
+
+def _read_sources() -> tuple:
+    """Merged overrides from all configured sources (file wins over Parse) and a source label."""
+    overrides, sources = {}, []
+    if config.PROMO_CONFIG_FROM_PARSE:
+        from src.core.parse_api import get_config
+
+        overrides.update(get_config())
+        sources.append("parse")
+    if config.PROMO_CONFIG_FILE:
+        with open(config.PROMO_CONFIG_FILE, encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError(f"{config.PROMO_CONFIG_FILE} must contain a JSON object")
+        overrides.update(data)
+        sources.append("file")
+    return overrides, "+".join(["env"] + sources)
+
+
+def reload() -> bool:
+    """
+    Re-read the override sources and swap in a new snapshot if anything changed.
+
+    On any error the current snapshot stays active.
+
+    Returns:
+        True if a new snapshot was installed
+    """
+    global _current
+    started = time.perf_counter()
+    with _reload_lock:
+        try:
+            overrides, source = _read_sources()
+            new = build_settings(overrides)
+        except Exception as e:
+            metrics.counter("config.reload_errors").inc()
+            print(f"[config] reload failed, keeping version {_current.version}: {e}")
+            return False
+        old = _current
+        if new._replace(version=0, source="") == old._replace(version=0, source=""):
+            return False
+        new = new._replace(version=old.version + 1, source=source)
+        _current = new
+    metrics.histogram("config.reload_ms", RELOAD_BUCKETS_MS).observe((time.perf_counter() - started) * 1000)
+    metrics.counter("config.reloads").inc()
+    changed = [f for f in Settings._fields[:-2] if getattr(old, f) != getattr(new, f)]
+    print(f"[config] version {new.version} from {source}: {', '.join(changed)}")
+    for listener in list(_listeners):
+        try:
+            listener(old, new)
+        except Exception as e:
+            print(f"[config] change listener failed: {e}")
+    return True
+
+
+def _file_signature():
+    try:
+        st = os.stat(config.PROMO_CONFIG_FILE)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+_watcher = None
+
+
+def start_watcher(interval: float = None) -> None:
+    """
+    Load overrides now, then poll the sources from a daemon thread.
+
+    The file is only re-read when its mtime/size change; Parse Config is
+    fetched every ``interval`` seconds. Does nothing if no source is configured.
+    """
+    global _watcher
+    if not (config.PROMO_CONFIG_FILE or config.PROMO_CONFIG_FROM_PARSE):
+        return
+    if _watcher and _watcher.is_alive():
+        return
+    interval = config.PROMO_CONFIG_POLL_SECONDS if interval is None else interval
+    reload()
+
+    def loop():
+        signature = _file_signature()
+        while True:
+            time.sleep(interval)
+            if config.PROMO_CONFIG_FROM_PARSE:
+                reload()
+                signature = _file_signature()
+                continue
+            latest = _file_signature()
+            if latest != signature:
+                signature = latest
+                reload()
+
+    _watcher = threading.Thread(target=loop, name="promo-config-watch", daemon=True)
+    _watcher.start()
@@ -0,0 +1,98 @@
+"""Slack handler for searching the local audit log."""
+import re
+import time
+from datetime import date, timedelta
+
+from src.config import PARSE_DEFAULT_ENVIRONMENT
+from src.utils.authz import get_requester_user_id, is_authorized_slack_user, unauthorized_text
+from src.core.audit import get_audit_log
+
+
+USAGE = (
+    "Usage: `/promo-audit [code:CODE] [user:USER_ID] [by:@requester] [since:YYYY-MM-DD] [until:YYYY-MM-DD]`\n"
+    "A bare argument is treated as a code. Newest entries first."
+)
+
+# Filter keywords -> AuditLog.query() argument
+_KEYS = {"code": "code", "user": "user", "by": "requester", "requester": "requester",
+         "since": "since", "until": "until"}
+
+_LIMIT = 20
+
+
+def parse_audit_args(text: str) -> dict:
+    """
+    Parse `/promo-audit` arguments into AuditLog.query() filters.
+
+    Raises:
+        ValueError: On an unknown keyword or a malformed date
+    """
+    filters = {}
+    for token in (text or "").split():
+        key, sep, value = token.partition(":")
+        if not sep:
+            key, value = "code", token
+        key = key.lower()
+        if key not in _KEYS or not value:
+            raise ValueError(f"Unknown filter `{token}`")
+        if key in ("by", "requester"):
+            # Accept <@U123>, <@U123|name> and U123
+            mention = re.fullmatch(r"<@([A-Z0-9]+)(?:\|[^>]*)?>", value)
+            value = mention.group(1) if mention else value.lstrip("@")
+        if key in ("since", "until") and not re.fullmatch(r"\d{4}-\d{2}-\d{2}(T[\d:.]+Z?)?", value):
+            raise ValueError(f"`{key}` must be a date like 2025-01-31")
+        if key == "until" and len(value) == 10:
+            value = (date.fromisoformat(value) + timedelta(days=1)).isoformat()  # whole day inclusive
+        filters[_KEYS[key]] = value.upper() if key == "code" else value
+    return filters
+
+
+def format_audit_results(total: int, entries: list, elapsed_ms: float) -> str:
+    """Ephemeral reply text for a query result."""
+    lines = [f"*Audit log*: {total:,} matching entr{'y' if total == 1 else 'ies'} ({elapsed_ms:.0f} ms)"]
+    for e in entries:
+        result = f"`{e['code']}`" if e["code"] else f"_{e['error']}_"
+        if e["existing"]:
+            result += " _(existing)_"
+        notes = f" · {e['notes']}" if e["notes"] else ""
+        if e["environment"] and e["environment"] != PARSE_DEFAULT_ENVIRONMENT:
+            notes = f" · {e['environment']}" + notes
+        lines.append(
+            f"• {e['created_at'][:16].replace('T', ' ')} · `{e['user']}` → {result} · by <@{e['requester']}> "
+            f"({e['prefix']} {e['duration']} {e['partner']}, job `{e['job_id']}`){notes}"
+        )
+    if total > len(entries):
+        lines.append(f"_…showing the newest {len(entries)}; narrow the search to see more._")
+    return "\n".join(lines)
+
+
+def handle_audit_command(ack, body, client):
+    """
+    Handle `/promo-audit`: answer from the local audit log in the ack.
+
+    Args:
+        ack: Slack acknowledgement function
+        body: Request body from Slack
+        client: Slack client
+    """
+    requester_user_id = get_requester_user_id(body)
+    if not is_authorized_slack_user(requester_user_id):
+        ack(unauthorized_text(requester_user_id))
+        return
+
+    audit = get_audit_log()
+    if audit is None:
+        ack("The audit log is disabled (set `PROMO_AUDIT_PATH`).")
+        return
+    try:
+        filters = parse_audit_args(body.get("text") or "")
+    except ValueError as e:
+        ack(f"{e}\n{USAGE}")
+        return
+    if not filters:
+        ack(USAGE)
+        return
+
+    started = time.perf_counter()
+    total, entries = audit.query(limit=_LIMIT, **filters)
+    ack(format_audit_results(total, entries, (time.perf_counter() - started) * 1000))
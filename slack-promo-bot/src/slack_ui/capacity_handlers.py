@@ -0,0 +1,40 @@
+"""Slack handler for the prefix capacity report."""
+from src.utils.authz import get_requester_user_id, is_authorized_slack_user, unauthorized_text
+from src.core.capacity import build_capacity_report
+from src.slack_ui.conversations import post_dm
+
+
+def handle_capacity_command(ack, body, client):
+    """
+    Handle `/promo-capacity [full | PREFIX ...]`.
+
+    The report is built after the ack (a full scan can take a while) and
+    sent to the requester as a DM.
+
+    Args:
+        ack: Slack acknowledgement function
+        body: Request body from Slack
+        client: Slack client
+    """
+    requester_user_id = get_requester_user_id(body)
+    if not is_authorized_slack_user(requester_user_id):
+        ack(unauthorized_text(requester_user_id))
+        return
+
+    args = (body.get("text") or "").split()
+    full_scan = bool(args) and args[0].lower() == "full"
+    prefixes = [] if full_scan else [a.upper() for a in args]
+    if full_scan:
+        ack("Scanning every code for the capacity report… I'll DM it to you.")
+    else:
+        ack()
+
+    try:
+        text = build_capacity_report(prefixes, full_scan=full_scan).format()
+    except Exception as e:
+        print(f"[capacity] report failed: {e}")
+        text = f":warning: Capacity report failed: {e}"
+    try:
+        post_dm(client, requester_user_id, text=text)
+    except Exception as e:
+        print(f"[capacity] could not DM report: {e}")
@@ -0,0 +1,125 @@
+"""
+Cached Slack conversation resolution: user → DM channel, channels the
+bot has already joined, and which channels are public.
+
+A DM channel ID never changes for a given user, and a join only has to
+happen once, so both are cached (bounded, with a TTL as a safety net)
+instead of calling ``conversations.open`` / ``conversations.join`` on every
+job. A post that fails with ``channel_not_found`` / ``not_in_channel``
+drops the channel from both caches so the next attempt resolves it again.
+"""
+import re
+
+from src.config import PROMO_CONVERSATION_CACHE_SIZE, PROMO_CONVERSATION_CACHE_TTL
+from src.utils import metrics
+from src.utils.cache import TTLCache
+
+
+# Slack errors meaning a cached channel ID or join is no longer valid
+STALE_CHANNEL_ERRORS = ("channel_not_found", "not_in_channel", "is_archived")
+
+_dm_channels = TTLCache(maxsize=PROMO_CONVERSATION_CACHE_SIZE, ttl=PROMO_CONVERSATION_CACHE_TTL)
+_joined = TTLCache(maxsize=PROMO_CONVERSATION_CACHE_SIZE, ttl=PROMO_CONVERSATION_CACHE_TTL)
+_public = TTLCache(maxsize=PROMO_CONVERSATION_CACHE_SIZE, ttl=PROMO_CONVERSATION_CACHE_TTL)
+
+
+def slack_error(e: Exception) -> str:
+    """Slack error code of a SlackApiError (e.g. "not_in_channel"), else ""."""
+    response = getattr(e, "response", None)
+    try:
+        return (response.get("error") if response is not None else "") or ""
+    except Exception:
+        return ""
+
+
+def open_dm(client, user_id: str) -> str:
+    """
+    Return the DM channel ID with ``user_id``, opening it only on a cache miss.
+
+    Raises:
+        Whatever ``conversations_open`` raises (failures are not cached)
+    """
+    def load():
+        metrics.counter("slack.conversations_open").inc()
+        return client.conversations_open(users=user_id)["channel"]["id"]
+
+    return _dm_channels.get_or_load(user_id, load)
+
+
+def ensure_joined(client, channel: str) -> None:
+    """
+    Join public channel ``channel`` unless this process already did.
+
+    Failures are logged and remembered too (e.g. missing_scope would fail
+    the same way every job); a later ``not_in_channel`` forgets them.
+    """
+    if not re.fullmatch(r"C[A-Z0-9]+", channel or "") or _joined.get(channel):
+        return
+    try:
+        metrics.counter("slack.conversations_join").inc()
+        client.conversations_join(channel=channel)
+    except Exception as e:
+        # Ignore join failures; we'll attempt to post anyway
+        print(f"[notify] conversations_join failed for {channel}: {e}")
+    _joined.set(channel, True)
+
+
+def is_public_channel(client, channel: str) -> bool:
+    """
+    True if ``channel`` is a public channel any workspace member can open.
+
+    DMs, group DMs and private channels are not; neither is a channel
+    ``conversations.info`` fails for (e.g. missing ``channels:read``).
+    """
+    if not channel or channel[0] == "D":
+        return False
+
+    def load():
+        metrics.counter("slack.conversations_info").inc()
+        info = client.conversations_info(channel=channel)["channel"]
+        return bool(info.get("is_channel") and not info.get("is_private"))
+
+    try:
+        return _public.get_or_load(channel, load)
+    except Exception as e:
+        print(f"[slack] conversations_info failed for {channel}: {e}")
+        return False
+
+
+def forget_channel(channel: str) -> None:
+    """Drop ``channel`` from the caches (after a stale-channel error)."""
+    _joined.invalidate(channel)
+    _public.invalidate(channel)
+    dropped = _dm_channels.invalidate_values(lambda dm: dm == channel)
+    print(f"[slack] forgot cached channel {channel}" + (f" (DM of {dropped} user(s))" if dropped else ""))
+
+
+def check_stale(channel: str, error: Exception) -> bool:
+    """Forget ``channel`` if ``error`` says it is stale; returns True if it did."""
+    if slack_error(error) in STALE_CHANNEL_ERRORS:
+        forget_channel(channel)
+        return True
+    return False
+
+
+def post_dm(client, user_id: str, **kwargs):
+    """
+    ``chat_postMessage`` to the DM with ``user_id`` via the cached channel.
+
+    A stale cached channel is forgotten and the DM re-opened once.
+    """
+    channel = open_dm(client, user_id)
+    try:
+        return client.chat_postMessage(channel=channel, **kwargs)
+    except Exception as e:
+        if not check_stale(channel, e):
+            raise
+    return client.chat_postMessage(channel=open_dm(client, user_id), **kwargs)
+
+
+def cache_stats() -> dict:
+    """Hit/miss counts of both caches (for logs and benchmarks)."""
+    return {
+        "dm": {"size": len(_dm_channels), "hits": _dm_channels.hits, "misses": _dm_channels.misses},
+        "joined": {"size": len(_joined), "hits": _joined.hits, "misses": _joined.misses},
+    }
@@ -0,0 +1,252 @@
+"""
+Digest mode for PROMO_NOTIFY_CHANNEL.
+
+Instead of one message (with every code) per job, finished jobs are
+buffered and flushed as one summary every PROMO_DIGEST_INTERVAL_SECONDS,
+or as soon as PROMO_DIGEST_MAX_ROWS codes are waiting. The summary has
+totals by prefix, partner and requester; the per-code detail is attached
+as a single CSV file. The buffer is a SQLite table (PROMO_DIGEST_PATH)
+shared by every worker process, so a restart does not lose pending
+entries and each worker adds to the same digest. A flush first claims the
+entries atomically, so two workers never post the same ones, and a failed
+flush releases them for the next attempt.
+"""
+import csv
+import io
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from src.config import PROMO_DIGEST_PATH, PROMO_DIGEST_INTERVAL_SECONDS, PROMO_DIGEST_MAX_ROWS
+from src.live_config import current as current_settings
+from src.slack_ui.conversations import check_stale
+from src.utils import metrics
+from src.utils.leader import is_leader
+from src.utils.sqlite_db import connect
+
+
+CSV_COLUMNS = ("finished_at", "requester", "target", "prefix", "partner", "duration", "user_id", "code", "error",
+               "existing", "notes")
+
+# Lines per breakdown in the summary; the rest are folded into "… and N more"
+_TOP = 10
+
+# How often the flusher checks the buffer size; add() in another worker cannot wake it
+_POLL = 60
+
+# A claim older than this belongs to a flusher that died mid-post; the entries are taken back
+_CLAIM_TIMEOUT = 600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS digest (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    entry       TEXT NOT NULL,     -- JSON, see NotifyDigest.add()
+    rows        INTEGER NOT NULL,
+    claimed_by  TEXT,              -- flush in progress that owns the entry
+    claimed_at  REAL
+);
+"""
+
+
+def _breakdown(title: str, counts: dict, label=lambda k: f"`{k}`") -> str:
+    ranked = sorted(counts.items(), key=lambda kv: (-kv[1][0], kv[0]))
+    parts = [f"{label(k)} {ok:,}" + (f" (+{err:,} errors)" if err else "") for k, (ok, err) in ranked[:_TOP]]
+    if len(ranked) > _TOP:
+        parts.append(f"… and {len(ranked) - _TOP} more")
+    return f"*{title}:* " + " · ".join(parts)
+
+
+def format_digest(entries: list) -> str:
+    """Summary text for buffered ``entries`` (totals plus per-prefix/partner/requester breakdowns)."""
+    by_prefix, by_partner, by_requester = {}, {}, {}
+    codes = errors = reused = 0
+    for entry in entries:
+        for _, code_or_err, _, partner, *flags in entry["rows"]:
+            if flags and flags[0]:
+                reused += 1  # handed back, not minted
+                continue
+            failed = str(code_or_err).startswith("ERROR:")
+            codes += not failed
+            errors += failed
+            for counts, key in ((by_prefix, entry["prefix"]), (by_partner, partner or entry["partner"]),
+                                (by_requester, entry["requester"])):
+                ok, err = counts.get(key, (0, 0))
+                counts[key] = (ok + (not failed), err + failed)
+    first = min(e["finished_at"] for e in entries)[11:16]
+    last = max(e["finished_at"] for e in entries)[11:16]
+    lines = [
+        f"*Promo digest* · {len(entries)} job(s) finished {first}–{last} UTC",
+        f"Codes: {codes:,} · Errors: {errors:,}" + (f" · Existing (reused): {reused:,}" if reused else ""),
+    ]
+    if by_prefix:
+        lines.append(_breakdown("By prefix", by_prefix))
+        lines.append(_breakdown("By partner", by_partner))
+        lines.append(_breakdown("By requester", by_requester, label=lambda uid: f"<@{uid}>"))
+    return "\n".join(lines)
+
+
+def format_digest_csv(entries: list) -> str:
+    """One CSV row per generated code (or error) across ``entries``."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(CSV_COLUMNS)
+    for e in entries:
+        for uid, code_or_err, duration, partner, *flags in e["rows"]:
+            failed = str(code_or_err).startswith("ERROR:")
+            writer.writerow([
+                e["finished_at"], e["requester"], e["target"], e["prefix"], partner or e["partner"],
+                duration or e["duration"], uid, "" if failed else code_or_err,
+                code_or_err if failed else "", "1" if flags and flags[0] else "", e["notes"],
+            ])
+    return out.getvalue()
+
+
+class NotifyDigest:
+    """
+    Buffer of finished jobs waiting to be summarised in the notify channel.
+
+    Args:
+        path: SQLite file the buffer is kept in ("" keeps it in memory only)
+        interval: Seconds between flushes
+        max_rows: Flush early once this many codes are buffered
+    """
+
+    def __init__(self, path: str = PROMO_DIGEST_PATH, interval: float = PROMO_DIGEST_INTERVAL_SECONDS,
+                 max_rows: int = PROMO_DIGEST_MAX_ROWS):
+        self.interval = interval
+        self.max_rows = max_rows
+        self._conn = connect(path or ":memory:")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def pending(self) -> tuple:
+        """(jobs, rows) currently buffered."""
+        with self._lock:
+            jobs, rows = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(rows), 0) FROM digest").fetchone()
+        return jobs, rows
+
+    def add(self, requester: str, target: str, prefix: str, duration: str, partner: str,
+            notes: str = "", rows: list = None) -> None:
+        """Buffer one finished job; wakes the flusher if the size threshold is reached."""
+        entry = {
+            "finished_at": datetime.now(timezone.utc).isoformat()[:19] + "Z",
+            "requester": requester, "target": target, "prefix": prefix, "duration": duration,
+            "partner": partner, "notes": notes or "",
+            "rows": [list(r[:4]) + [bool(getattr(r, "existing", False))] for r in rows or []],
+        }
+        try:
+            with self._lock:
+                self._conn.execute("INSERT INTO digest (entry, rows) VALUES (?, ?)",
+                                   (json.dumps(entry), len(entry["rows"])))
+        except Exception as e:
+            print(f"[notify] could not buffer digest entry: {e}")
+            metrics.counter("notify.digest_errors").inc()
+            return
+        metrics.counter("notify.digest_buffered").inc()
+        if self.pending()[1] >= self.max_rows:
+            self._wake.set()
+
+    def flush(self, client, channel: str) -> bool:
+        """
+        Post everything buffered as one summary (plus CSV) to ``channel``.
+
+        Returns:
+            True if the buffer was posted (or empty); on failure it is kept
+        """
+        with self._flush_lock:
+            token = uuid.uuid4().hex
+            entries = self._claim(token)
+            if not entries:
+                return True
+            summary = format_digest(entries)
+            try:
+                if any(e["rows"] for e in entries):
+                    client.files_upload_v2(
+                        channel=channel,
+                        content=format_digest_csv(entries),
+                        filename=f"promo-digest-{datetime.now(timezone.utc):%Y%m%d-%H%M}.csv",
+                        title="Promo digest",
+                        initial_comment=summary,
+                    )
+                else:
+                    client.chat_postMessage(channel=channel, text=summary)
+            except Exception as e:
+                print(f"[notify] digest flush to {channel} failed, keeping {len(entries)} job(s): {e}")
+                metrics.counter("notify.digest_errors").inc()
+                check_stale(channel, e)
+                with self._lock:
+                    self._conn.execute("UPDATE digest SET claimed_by = NULL, claimed_at = NULL WHERE claimed_by = ?",
+                                       (token,))
+                return False
+            with self._lock:
+                # Entries added while posting were not claimed; they stay for the next flush
+                self._conn.execute("DELETE FROM digest WHERE claimed_by = ?", (token,))
+            metrics.counter("notify.digest_flushes").inc()
+            print(f"[notify] digest posted to {channel}: {len(entries)} job(s)")
+            return True
+
+    def start(self, client) -> None:
+        """
+        Flush from a daemon thread every interval (or when full) to the current notify channel.
+
+        Every worker starts the thread, but only the leader process flushes.
+        """
+        if self._thread and self._thread.is_alive():
+            return
+
+        def loop():
+            last = time.monotonic()
+            while True:
+                self._wake.wait(min(self.interval, _POLL))
+                self._wake.clear()
+                try:
+                    due = time.monotonic() - last >= self.interval or self.pending()[1] >= self.max_rows
+                    if not due or not is_leader():
+                        continue
+                except Exception as e:
+                    print(f"[notify] could not check the digest buffer: {e}")
+                    continue
+                last = time.monotonic()
+                channel = current_settings().notify_channel
+                if channel:  # else keep buffering until a channel is configured
+                    self.flush(client, channel)
+
+        self._thread = threading.Thread(target=loop, name="promo-notify-digest", daemon=True)
+        self._thread.start()
+
+    def _claim(self, token: str) -> list:
+        """Atomically take every unclaimed (or abandoned) entry for this flush, oldest first."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE digest SET claimed_by = ?, claimed_at = ? WHERE claimed_by IS NULL OR claimed_at < ?",
+                    (token, now, now - _CLAIM_TIMEOUT),
+                )
+                rows = self._conn.execute("SELECT entry FROM digest WHERE claimed_by = ? ORDER BY id",
+                                          (token,)).fetchall()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [json.loads(entry) for (entry,) in rows]
+
+
+_digest = None
+_digest_lock = threading.Lock()
+
+
+def get_digest() -> NotifyDigest:
+    """Return the process-wide notify digest."""
+    global _digest
+    if _digest is None:
+        with _digest_lock:
+            if _digest is None:
+                _digest = NotifyDigest()
+    return _digest
@@ -0,0 +1,99 @@
+"""Slack handlers for bulk validity extension."""
+import re
+from src.live_config import current as current_settings
+from src.utils.authz import get_requester_user_id, is_authorized_slack_user, unauthorized_text
+from src.utils.validation import parse_user_ids, validate_user_id
+from src.slack_ui.modal_views import build_extend_modal, build_access_denied_modal
+from src.slack_ui.view_state import input_value, selected_value, checked_values
+from src.core.bulk_extend import extend_validity
+from src.slack_ui.conversations import open_dm, check_stale, post_dm
+
+
+def handle_open_extend(ack, body, client):
+    """
+    Handle `/promo-extend` by opening the extension modal.
+
+    Args:
+        ack: Slack acknowledgement function
+        body: Request body from Slack
+        client: Slack client
+    """
+    requester_user_id = get_requester_user_id(body)
+    if not is_authorized_slack_user(requester_user_id):
+        ack(unauthorized_text(requester_user_id))
+        return
+
+    ack()
+    try:
+        client.views_open(trigger_id=body["trigger_id"], view=build_extend_modal())
+    except Exception as e:
+        print(f"[handle_open_extend] views_open failed: {e}")
+
+
+def handle_extend_submit(ack, body, client, view):
+    """
+    Validate the extension form, then run the extension and DM the report.
+
+    Args:
+        ack: Slack acknowledgement function
+        body: Request body from Slack
+        client: Slack client
+        view: The submitted view
+    """
+    requester_user_id = get_requester_user_id(body)
+    if not is_authorized_slack_user(requester_user_id):
+        ack({"response_action": "update", "view": build_access_denied_modal()})
+        return
+
+    vals = view["state"]["values"]
+
+    ids = parse_user_ids(input_value(vals, "users_text"))
+    if not ids:
+        ack({"response_action": "errors", "errors": {"users_text": "Enter at least one email or phone."}})
+        return
+    invalid = [x for x in ids if not validate_user_id(x)]
+    if invalid:
+        ack({"response_action": "errors", "errors": {"users_text": f"These look invalid: {', '.join(invalid[:5])}"}})
+        return
+
+    custom_days = input_value(vals, "custom_days")
+    if custom_days and (not re.fullmatch(r"\d+", custom_days) or int(custom_days) <= 0):
+        ack({"response_action": "errors", "errors": {"custom_days": "Enter a positive number of days (e.g., 45)."}})
+        return
+
+    notes = input_value(vals, "notes")
+    if not notes:
+        ack({"response_action": "errors", "errors": {"notes": "Please provide the reason for this extension."}})
+        return
+
+    extension = f"{int(custom_days)}D" if custom_days else selected_value(vals, "extension", "30D")
+    prefix = input_value(vals, "prefix_filter")
+    dry_run = "dry_run" in checked_values(vals, "options")
+
+    ack({"response_action": "clear"})
+
+    try:
+        open_dm(client, requester_user_id)  # fail fast before doing the work
+    except Exception as e:
+        print(f"[extend] conversations_open failed: {e}")
+        return
+
+    report = extend_validity(((uid, None) for uid in ids), extension, prefix=prefix, dry_run=dry_run)
+
+    header = (
+        f"Extension by `{extension}`" + (f" for prefix `{prefix}`" if prefix else "")
+        + f" requested by <@{requester_user_id}>\nNotes: {notes}"
+    )
+    text = f"{header}\n{report.format()}"
+    try:
+        post_dm(client, requester_user_id, text=text)
+    except Exception as e:
+        print(f"[extend] DM summary failed: {e}")
+
+    notify = current_settings().notify_channel
+    if not dry_run and notify:
+        try:
+            client.chat_postMessage(channel=notify, text=text)
+        except Exception as e:
+            print(f"[extend] notify failed for {notify}: {e}")
+            check_stale(notify, e)
@@ -1,159 +1,209 @@
 """Slack event handlers for the promo bot."""
 import re
 import json
-from src.config import DEFAULT_PREFIX, DEFAULT_DURATION, DEFAULT_PARTNER, PROMO_NOTIFY_CHANNEL
+from src.live_config import current as current_settings
 from src.utils.validation import parse_user_ids, validate_user_id
 from src.utils.authz import get_requester_user_id, is_authorized_slack_user, unauthorized_text
 from src.slack_ui.modal_views import (
     build_promo_form_modal,
     build_confirmation_modal,
     build_access_denied_modal,
+    build_validating_modal,
+    build_validation_errors_modal,
 )
-from src.core.promo_generator import create_promo_for_user
-from src.slack_ui.notifications import notify_channel, format_results_message
+from src.slack_ui.view_state import input_value, checked_values
+from src.core.jobs import GenerationJob, CANCELLED, DEFERRED
+from src.core.scheduler import get_scheduler
+from src.core.deferred import get_deferred_jobs
+from src.core.parse_api import resolve_environment, use_environment
+from src.core.audit import get_audit_log, job_record
+from src.core.existing_codes import find_existing_codes
+from src.core.rollups import get_rollups
+from src.slack_ui.job_status import (
+    post_job_status, update_job_status, refresh_queued_statuses, status_message, adopt_status_message,
+)
+from src.slack_ui.notifications import notify_channel, format_results_message, post_results
+from src.slack_ui.conversations import open_dm, check_stale, post_dm, is_public_channel
 
 
-def handle_open_modal(ack, body, client, private_metadata=""):
+def ack_open_modal(ack, body):
     """
-    Handle opening the promo generation modal.
-    
+    Acknowledge the shortcut/slash command that opens the promo modal.
+
     Args:
         ack: Slack acknowledgement function
         body: Request body from Slack
+    """
+    requester_user_id = get_requester_user_id(body)
+    if not is_authorized_slack_user(requester_user_id) and body.get("command"):
+        # Slash commands can be answered without opening a modal
+        ack(unauthorized_text(requester_user_id))
+        return
+    ack()
+
+
+def open_modal(body, client, private_metadata=""):
+    """
+    Open the promo generation modal (runs after ack, as a lazy listener).
+
+    Args:
+        body: Request body from Slack
         client: Slack client
         private_metadata: Optional metadata to attach to the modal
     """
     requester_user_id = get_requester_user_id(body)
     if not is_authorized_slack_user(requester_user_id):
-        # Slash commands can be answered without opening a modal
         if body.get("command"):
-            ack(unauthorized_text(requester_user_id))
-            return
-
+            return  # already answered in the ack
         # Global shortcuts don't have a channel context → show a modal instead
-        ack()
         try:
             client.views_open(trigger_id=body["trigger_id"], view=build_access_denied_modal())
         except Exception as e:
-            print(f"[handle_open_modal] views_open(access_denied) failed: {e}")
+            print(f"[open_modal] views_open(access_denied) failed: {e}")
         return
 
-    ack()
     try:
         view = build_promo_form_modal()
         if private_metadata:
             view["private_metadata"] = private_metadata
         client.views_open(trigger_id=body["trigger_id"], view=view)
     except Exception as e:
-        print(f"[handle_open_modal] views_open failed: {e}")
+        print(f"[open_modal] views_open failed: {e}")
 
 
-def handle_promo_submit(ack, body, client, view):
+def _read_submission(view) -> dict:
+    """Extract raw form values from the submitted promo form (cheap, no validation)."""
+    vals = view["state"]["values"]
+
+    # Extract selected values
+    selected_prefix_opt = (vals.get("prefix", {}).get("value", {}).get("selected_option") or {})
+    selected_duration_opt = (vals.get("duration", {}).get("value", {}).get("selected_option") or {})
+    selected_partner_opt = (vals.get("partner", {}).get("value", {}).get("selected_option") or {})
+
+    # Determine target channel for results
+    post_channel_block = vals.get("post_channel") or {}
+    post_channel_action = post_channel_block.get("value") or {}
+    post_channel_id = (post_channel_action.get("selected_conversation") or "").strip()
+    target_for_results = post_channel_id or (view.get("private_metadata") or "").strip()
+
+    settings = current_settings()
+    return {
+        "raw": (vals.get("users_text") or {}).get("value", {}).get("value") or "",
+        "custom_days": input_value(vals, "custom_days"),
+        "notes": input_value(vals, "notes"),
+        "custom_prefix": input_value(vals, "custom_prefix"),
+        "prefix_choice": selected_prefix_opt.get("value", settings.default_prefix),
+        "duration_choice": selected_duration_opt.get("value", settings.default_duration),
+        "partner": selected_partner_opt.get("value", settings.default_partner),
+        "target_for_results": target_for_results,
+        "skip_existing": "skip_existing" in checked_values(vals, "options"),
+        "environment": ((vals.get("environment", {}).get("value", {}).get("selected_option") or {}).get("value") or ""),
+    }
+
+
+def _is_large_submission(sub: dict) -> bool:
+    """Too many entries to validate inside Slack's ack window?"""
+    return sub["raw"].count(",") + 1 > current_settings().inline_validation_max_ids
+
+
+def _validate_submission(sub: dict):
     """
-    Handle promo generation form submission and show confirmation modal.
-    
-    Args:
-        ack: Slack acknowledgement function
-        body: Request body from Slack
-        client: Slack client
-        view: The submitted view
+    Validate a submission read by _read_submission().
+
+    Returns:
+        (errors, confirm_view): errors is a {block_id: message} dict (empty if valid);
+        confirm_view is the confirmation modal when valid, else None
     """
-    requester_user_id = get_requester_user_id(body)
-    if not is_authorized_slack_user(requester_user_id):
-        ack({"response_action": "update", "view": build_access_denied_modal()})
-        return
+    raw = sub["raw"]
 
-    vals = view["state"]["values"]
-    
-    # Extract and validate users input
-    _users_block = vals.get("users_text") or {}
-    _users_action = _users_block.get("value") or {}
-    raw = _users_action.get("value") or ""
-    
     # Check for line breaks without commas (common mistake)
     if ("\n" in raw or "\r" in raw) and "," not in raw:
-        ack({
-            "response_action": "errors",
-            "errors": {"users_text": "Use commas to separate entries. Line breaks are not separators."}
-        })
-        return
+        return {"users_text": "Use commas to separate entries. Line breaks are not separators."}, None
 
     ids = parse_user_ids(raw)
 
     # Validate user IDs
     if not ids:
-        ack({
-            "response_action": "errors",
-            "errors": {"users_text": "Enter at least one email or phone. Separate with commas only."}
-        })
-        return
-        
+        return {"users_text": "Enter at least one email or phone. Separate with commas only."}, None
+
     invalid = [x for x in ids if not validate_user_id(x)]
     if invalid:
-        ack({
-            "response_action": "errors",
-            "errors": {"users_text": f"These look invalid: {', '.join(invalid[:5])}"}
-        })
-        return
+        return {"users_text": f"These look invalid: {', '.join(invalid[:5])}"}, None
 
     # Validate custom days if provided
-    _custom_block = vals.get("custom_days") or {}
-    _custom_action = _custom_block.get("value") or {}
-    custom_days_raw = (_custom_action.get("value") or "").strip()
+    custom_days_raw = sub["custom_days"]
     if custom_days_raw:
         if not re.fullmatch(r"\d+", custom_days_raw) or int(custom_days_raw) <= 0:
-            ack({
-                "response_action": "errors",
-                "errors": {"custom_days": "Enter a positive number of days (e.g., 45)."}
-            })
-            return
+            return {"custom_days": "Enter a positive number of days (e.g., 45)."}, None
 
     # Validate notes (mandatory)
-    _notes_block = vals.get("notes") or {}
-    _notes_action = _notes_block.get("value") or {}
-    notes_raw = (_notes_action.get("value") or "").strip()
-    if not notes_raw:
-        ack({
-            "response_action": "errors",
-            "errors": {"notes": "Please provide the reason for these promo codes."}
-        })
-        return
-
-    # Extract selected values
-    selected_prefix_opt = (vals.get("prefix", {}).get("value", {}).get("selected_option") or {})
-    selected_duration_opt = (vals.get("duration", {}).get("value", {}).get("selected_option") or {})
-    selected_partner_opt = (vals.get("partner", {}).get("value", {}).get("selected_option") or {})
-
-    partner = selected_partner_opt.get("value", DEFAULT_PARTNER)
+    if not sub["notes"]:
+        return {"notes": "Please provide the reason for these promo codes."}, None
 
     # Compute duration: custom_days overrides dropdown if present
-    duration_choice = selected_duration_opt.get("value", DEFAULT_DURATION)
-    duration = f"{int(custom_days_raw)}D" if custom_days_raw else duration_choice
+    duration = f"{int(custom_days_raw)}D" if custom_days_raw else sub["duration_choice"]
 
     # Compute prefix: custom_prefix overrides dropdown if present
-    prefix_choice = selected_prefix_opt.get("value", DEFAULT_PREFIX)
-    _cp_block = vals.get("custom_prefix") or {}
-    _cp_action = _cp_block.get("value") or {}
-    custom_prefix_raw = (_cp_action.get("value") or "").strip()
-    prefix = custom_prefix_raw or prefix_choice
+    prefix = sub["custom_prefix"] or sub["prefix_choice"]
 
-    # Determine target channel for results
-    post_channel_block = vals.get("post_channel") or {}
-    post_channel_action = post_channel_block.get("value") or {}
-    post_channel_id = (post_channel_action.get("selected_conversation") or "").strip()
-    target_for_results = post_channel_id or (view.get("private_metadata") or "").strip()
+    target_for_results = sub["target_for_results"]
     target_display = f"<#{target_for_results}>" if target_for_results else "DM"
 
-    # Build and push confirmation modal
+    try:
+        environment = resolve_environment(prefix, sub["environment"])
+    except ValueError as e:
+        # An unconfigured environment from the form's choice or PARSE_PREFIX_ENVIRONMENTS
+        return {"environment" if sub["environment"] else "prefix": str(e)}, None
+
     confirm_view = build_confirmation_modal(
         ids=ids,
         prefix=prefix,
         duration=duration,
-        partner=partner,
-        notes=notes_raw,
+        partner=sub["partner"],
+        notes=sub["notes"],
         target_display=target_display,
-        target_for_results=target_for_results
+        target_for_results=target_for_results,
+        skip_existing=sub["skip_existing"],
+        environment=environment,
     )
+    return {}, confirm_view
+
+
+def _validation_external_id(view) -> str:
+    """external_id of the "Validating…" modal pushed over a given form view."""
+    return f"promo-validate-{view['id']}"
+
+
+def ack_promo_submit(ack, body, view):
+    """
+    Acknowledge the promo form submission.
+
+    Small inputs are validated inline so errors show next to the fields.
+    Large inputs are acknowledged immediately with a pushed "Validating…"
+    modal; process_promo_submit() then validates and updates that modal.
+
+    Args:
+        ack: Slack acknowledgement function
+        body: Request body from Slack
+        view: The submitted view
+    """
+    requester_user_id = get_requester_user_id(body)
+    if not is_authorized_slack_user(requester_user_id):
+        ack({"response_action": "update", "view": build_access_denied_modal()})
+        return
+
+    sub = _read_submission(view)
+    if _is_large_submission(sub):
+        ack({
+            "response_action": "push",
+            "view": build_validating_modal(sub["raw"].count(",") + 1, _validation_external_id(view)),
+        })
+        return
+
+    errors, confirm_view = _validate_submission(sub)
+    if errors:
+        ack({"response_action": "errors", "errors": errors})
+        return
 
     ack({
         "response_action": "push",
@@ -161,15 +211,37 @@ def handle_promo_submit(ack, body, client, view):
     })
 
 
-def handle_promo_confirm(ack, body, client, view):
+def process_promo_submit(body, client, view):
     """
-    Handle confirmation and generate promo codes.
-    
+    Validate large submissions after the ack (lazy listener) and replace the
+    "Validating…" modal with the confirmation modal or the errors found.
+
     Args:
-        ack: Slack acknowledgement function
         body: Request body from Slack
         client: Slack client
-        view: The confirmation view
+        view: The submitted view
+    """
+    if not is_authorized_slack_user(get_requester_user_id(body)):
+        return
+    sub = _read_submission(view)
+    if not _is_large_submission(sub):
+        return  # already handled inline by ack_promo_submit
+
+    errors, confirm_view = _validate_submission(sub)
+    new_view = build_validation_errors_modal(errors) if errors else confirm_view
+    try:
+        client.views_update(external_id=_validation_external_id(view), view=new_view)
+    except Exception as e:
+        print(f"[process_promo_submit] views_update failed: {e}")
+
+
+def ack_promo_confirm(ack, body):
+    """
+    Acknowledge the confirmation by closing the modal stack.
+
+    Args:
+        ack: Slack acknowledgement function
+        body: Request body from Slack
     """
     requester_user_id = get_requester_user_id(body)
     if not is_authorized_slack_user(requester_user_id):
@@ -179,6 +251,22 @@ def handle_promo_confirm(ack, body, client, view):
     # Close the entire modal stack
     ack({"response_action": "clear"})
 
+
+def process_promo_confirm(body, client, view):
+    """
+    Queue code generation for the confirmed batch (lazy listener, runs after the ack).
+
+    Results are posted by _finish_job() when the scheduler completes the job.
+    
+    Args:
+        body: Request body from Slack
+        client: Slack client
+        view: The confirmation view
+    """
+    requester_user_id = get_requester_user_id(body)
+    if not is_authorized_slack_user(requester_user_id):
+        return
+
     # Extract metadata
     try:
         meta_json = view.get("private_metadata") or "{}"
@@ -190,53 +278,193 @@ def handle_promo_confirm(ack, body, client, view):
     if isinstance(ids, str):
         ids = [s for s in re.split(r"\s*,\s*", ids) if s]
 
-    prefix = data.get("prefix", DEFAULT_PREFIX)
-    duration = data.get("duration", DEFAULT_DURATION)
-    partner = data.get("partner", DEFAULT_PARTNER)
+    # One snapshot for the whole job, even if the config is reloaded meanwhile
+    settings = current_settings()
+    prefix = data.get("prefix", settings.default_prefix)
+    duration = data.get("duration", settings.default_duration)
+    partner = data.get("partner", settings.default_partner)
     notes = data.get("notes", "")
 
     # Determine target for results
     target = data.get("target") or None
     if not target:
-        dm = client.conversations_open(users=requester_user_id)
-        target = dm["channel"]["id"]
+        target = open_dm(client, requester_user_id)
+
+    # Queue the batch; the scheduler shares Parse throughput fairly between requesters
+    notify = settings.notify_channel
+    try:
+        environment = resolve_environment(prefix, data.get("environment", ""))
+    except ValueError as e:
+        # Validated on submit; only reachable if the environments changed since
+        print(f"[jobs] not queuing batch for {requester_user_id}: {e}")
+        try:
+            post_dm(client, requester_user_id, text=f"Promo codes were not generated: {e}")
+        except Exception as e2:
+            print(f"[jobs] could not tell {requester_user_id}: {e2}")
+        return
+    job = GenerationJob(
+        requester_user_id, ids, prefix, duration, partner, notes=notes, target=target, environment=environment,
+        **_job_callbacks(client, notify),
+    )
+    job.skip_existing = bool(data.get("skip_existing"))
+    post_job_status(client, job)
+    if not _submit_job(job):
+        job.defer()
+        _defer_job(client, job, notify)
+
+
+def _job_callbacks(client, notify: str) -> dict:
+    """Scheduler callbacks for a job whose results go to Slack via ``client``."""
+    return {
+        "on_done": lambda job: _finish_job(client, job, notify),
+        "on_progress": lambda job: _job_progress(client, job),
+        "on_deferred": lambda job: _defer_job(client, job, notify),
+    }
+
 
-    # Generate promo codes
-    rows, errors = [], 0
-    for uid in ids:
+def _job_progress(client, job):
+    """Refresh ``job``'s status message, and the queue positions its progress moved (on_progress callback)."""
+    update_job_status(client, job)
+    refresh_queued_statuses(client)
+
+
+def _submit_job(job) -> bool:
+    """
+    Run the existing-code pre-pass if asked for, then queue ``job``.
+
+    Returns:
+        False if Parse is down; the job is not queued and should be parked
+    """
+    if not job.parse.breaker.closed:
+        return False
+    if job.skip_existing and job.existing is None:
         try:
-            promo_id = create_promo_for_user(uid, prefix, duration, partner)
-            rows.append((uid, promo_id, duration, partner))
+            with use_environment(job.environment):
+                job.existing = find_existing_codes(job.ids, job.prefix)
+            print(f"[jobs] {job.job_id}: {len(job.existing)} of {job.total} users already have a {job.prefix} code")
         except Exception as e:
-            rows.append((uid, f"ERROR: {e}", duration, partner))
-            errors += 1
+            if not job.parse.breaker.closed:
+                return False
+            # Minting for everyone is the pre-existing behaviour; don't fail the job over the pre-pass
+            print(f"[jobs] {job.job_id}: existing-code lookup failed, minting for everyone: {e}")
+            job.existing = {}
+    if job.status == DEFERRED:
+        job.requeue()
+    get_scheduler().submit(job)
+    return True
 
-    # Format and post results
-    message = format_results_message(prefix, duration, partner, notes, ids, rows, errors)
-    
+
+def _defer_job(client, job, notify: str):
+    """Park a job while Parse is down and tell the requester (scheduler on_deferred callback)."""
+    get_deferred_jobs().park(job, notify=notify, status=status_message(job.job_id))
+    update_job_status(client, job, force=True)
     try:
-        client.chat_postMessage(channel=target, text=message)
+        post_dm(client, job.requester, text=(
+            f"Parse ({job.environment}) is not responding, so promo job `{job.job_id}` ({job.prefix}, {job.total} users) is deferred "
+            f"at {job.completed}/{job.total}. Codes already generated are kept. The job resumes by itself "
+            "when Parse recovers and the results are posted as usual."
+        ))
     except Exception as e:
-        print(f"[results] chat_postMessage failed for {target}: {e}")
-        # Fallback to DM
+        print(f"[jobs] could not tell {job.requester} that job {job.job_id} was deferred: {e}")
+
+
+def _resume_deferred_job(client, job) -> bool:
+    """Put a parked job back on the scheduler once Parse is up (DeferredJobs resubmit callback)."""
+    if not _submit_job(job):
+        return False
+    update_job_status(client, job, force=True)
+    return True
+
+
+def _restore_deferred_job(client, state: dict, extra: dict):
+    """Rebuild a job parked by an earlier process (DeferredJobs restore callback)."""
+    job = GenerationJob.restore(state, **_job_callbacks(client, extra.get("notify", "")))
+    if extra.get("status"):
+        adopt_status_message(job, **extra["status"])
+    return job
+
+
+def start_deferred_jobs(client):
+    """Restore parked jobs and resume them whenever Parse recovers."""
+    get_deferred_jobs().start(
+        restore=lambda state, extra: _restore_deferred_job(client, state, extra),
+        resubmit=lambda job: _resume_deferred_job(client, job),
+    )
+
+
+def _finish_job(client, job, notify: str):
+    """Post a finished job's results (scheduler on_done callback)."""
+    update_job_status(client, job, force=True)
+    refresh_queued_statuses(client)
+    rows, errors = job.rows, job.errors
+
+    audit = get_audit_log()
+    if audit:
+        audit.append(job_record(job))
+    rollups = get_rollups()
+    if rollups:
         try:
-            dm = client.conversations_open(users=requester_user_id)
-            dm_channel = dm["channel"]["id"]
-            client.chat_postMessage(channel=dm_channel, text=message)
-        except Exception as e2:
-            print(f"[results] DM fallback failed: {e2}")
+            rollups.record_job(job)
+        except Exception as e:
+            print(f"[stats] could not count job {job.job_id}: {e}")
 
-    # Send notification to configured channel if set
-    notify_channel(
+    # Format and post results
+    message = format_results_message(job.prefix, job.duration, job.partner, job.notes, job.ids, rows, errors)
+    summary = format_results_message(job.prefix, job.duration, job.partner, job.notes, job.ids, rows, errors,
+                                     include_rows=False)
+    if job.status == CANCELLED:
+        skipped = job.unprocessed_ids()
+        cancelled = (
+            f"\n\n*Cancelled* after {len(rows)} of {job.total} users. "
+            f"Not processed ({len(skipped)}): " + ", ".join(f"`{uid}`" for uid in skipped)
+        )
+        message += cancelled
+        summary += cancelled
+
+    # In permalink mode the codes are sent once and the other post links to them. The link must
+    # point into a public channel: the notify channel's members cannot open a DM or private channel
+    settings = current_settings()
+    link_mode = bool(notify) and settings.notify_mode == "immediate" and settings.notify_detail == "permalink"
+    link_to_target = link_mode and is_public_channel(client, job.target)
+    link_to_notify = link_mode and not link_to_target and is_public_channel(client, notify)
+
+    notification = dict(
         client=client,
-        notify_channel=PROMO_NOTIFY_CHANNEL,
-        target=target,
-        prefix=prefix,
-        duration=duration,
-        partner=partner,
-        processed_count=len(ids),
+        notify_channel=notify,
+        target=job.target,
+        prefix=job.prefix,
+        duration=job.duration,
+        partner=job.partner,
+        processed_count=len(job.ids),
         errors=errors,
-        requester_user_id=requester_user_id,
-        notes=notes,
+        requester_user_id=job.requester,
+        notes=job.notes,
         rows=rows,
     )
+    if link_to_notify:
+        # Full results to the notify channel; the requester's DM / private channel gets the link
+        permalink = notify_channel(**notification, want_permalink=True)
+        if permalink:
+            message = summary + f"\n<{permalink}|Full results>"
+            summary, rows = message, []
+        _post_job_results(client, job, message, summary, rows)
+        return
+
+    permalink = _post_job_results(client, job, message, summary, rows, want_permalink=link_to_target)
+    # Send notification to configured channel if set
+    notify_channel(**notification, permalink=permalink)
+
+
+def _post_job_results(client, job, message: str, summary: str, rows: list, want_permalink: bool = False) -> str:
+    """post_results() to the job's target, falling back to the requester's DM; returns the permalink or ""."""
+    try:
+        return post_results(client, job.target, message, summary, rows, want_permalink)
+    except Exception as e:
+        print(f"[results] posting results failed for {job.target}: {e}")
+        check_stale(job.target, e)
+        # Fallback to DM; not linkable from the notify channel, so the notification repeats the codes
+        try:
+            post_results(client, open_dm(client, job.requester), message, summary, rows)
+        except Exception as e2:
+            print(f"[results] DM fallback failed: {e2}")
+    return ""
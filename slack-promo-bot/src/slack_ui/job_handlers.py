@@ -0,0 +1,141 @@
+"""
+Slack handlers for pausing, resuming and cancelling generation jobs.
+
+A job that runs in another worker process (HTTP mode) is controlled
+through the shared job registry; its worker applies the control.
+"""
+from src.utils.authz import get_requester_user_id, is_authorized_slack_user, unauthorized_text
+from src.core.jobs import FINISHED, DEFERRED
+from src.core.scheduler import get_scheduler
+from src.core.deferred import get_deferred_jobs
+from src.core.job_registry import get_job_registry
+from src.slack_ui.job_status import format_job_status, update_job_status
+
+
+_ACTIONS = ("pause", "resume", "cancel")
+
+
+def _control(client, job, action: str) -> str:
+    """Apply ``action`` to ``job`` and refresh its status message; returns a reply for the user."""
+    scheduler = get_scheduler()
+    if job.status in FINISHED:
+        return f"Job `{job.job_id}` has already finished."
+    if job.status == DEFERRED:
+        if action != "cancel":
+            return f"Job `{job.job_id}` is waiting for Parse to recover; it resumes by itself."
+        get_deferred_jobs().remove(job)
+    if action == "pause":
+        changed = scheduler.pause(job)
+    elif action == "resume":
+        changed = scheduler.resume(job)
+    else:
+        changed = scheduler.cancel(job)
+    if not changed:
+        return f"Job `{job.job_id}` is already {job.status}."
+    update_job_status(client, job, force=True)
+    if action == "cancel":
+        return (
+            f"Cancelling job `{job.job_id}` after the codes in flight; "
+            "the results message will list who got a code and who was skipped."
+        )
+    return f"Job `{job.job_id}` {action}d at {job.completed}/{job.total}."
+
+
+def _control_remote(row: dict, action: str) -> str:
+    """Hand ``action`` to the worker running the job in registry ``row``; returns a reply for the user."""
+    job_id = row["job_id"]
+    if row["status"] in FINISHED:
+        return f"Job `{job_id}` has already finished."
+    if row["status"] == DEFERRED and action != "cancel":
+        return f"Job `{job_id}` is waiting for Parse to recover; it resumes by itself."
+    if not get_job_registry().request(job_id, action):
+        return f"No running job `{job_id}` (it may have finished)."
+    return f"Job `{job_id}` is running in another worker; {action} requested, it takes effect in a few seconds."
+
+
+def _control_own_job(client, requester_user_id: str, job_id: str, action: str) -> str:
+    """Apply ``action`` to the requester's job ``job_id`` in whichever worker runs it."""
+    job = get_scheduler().find(job_id) or get_deferred_jobs().find(job_id)
+    if job is not None:
+        if job.requester != requester_user_id:
+            return f"Only <@{job.requester}> can control job `{job_id}`."
+        return _control(client, job, action)
+    # In HTTP mode the job may be running in another worker process
+    row = get_job_registry().find(job_id)
+    if row is None:
+        return f"No running job `{job_id}` (it may have finished)."
+    if row["requester"] != requester_user_id:
+        return f"Only <@{row['requester']}> can control job `{job_id}`."
+    return _control_remote(row, action)
+
+
+def start_job_controls(client):
+    """Publish this worker's jobs to the registry and apply controls requested from other workers."""
+    get_job_registry().start(
+        local_jobs=lambda: get_scheduler().active_jobs() + get_deferred_jobs().jobs(),
+        apply=lambda job, action: _control(client, job, action),
+    )
+
+
+def handle_job_action(ack, body, client):
+    """
+    Handle the Pause/Resume/Cancel buttons on a job status message.
+
+    Args:
+        ack: Slack acknowledgement function
+        body: Request body from Slack
+        client: Slack client
+    """
+    ack()
+    requester_user_id = get_requester_user_id(body)
+    if not is_authorized_slack_user(requester_user_id):
+        return
+
+    action = (body.get("actions") or [{}])[0]
+    verb = action.get("action_id", "").rsplit("_", 1)[-1]
+    reply = _control_own_job(client, requester_user_id, action.get("value", ""), verb)
+
+    channel = (body.get("channel") or {}).get("id")
+    if channel:
+        try:
+            client.chat_postEphemeral(channel=channel, user=requester_user_id, text=reply)
+        except Exception as e:
+            print(f"[jobs] chat_postEphemeral failed: {e}")
+
+
+def handle_job_command(ack, body, client):
+    """
+    Handle `/promo-job [list | pause <id> | resume <id> | cancel <id>]`.
+
+    Args:
+        ack: Slack acknowledgement function
+        body: Request body from Slack
+        client: Slack client
+    """
+    requester_user_id = get_requester_user_id(body)
+    if not is_authorized_slack_user(requester_user_id):
+        ack(unauthorized_text(requester_user_id))
+        return
+
+    parts = (body.get("text") or "").split()
+    verb = parts[0].lower() if parts else "list"
+
+    if verb == "list":
+        scheduler = get_scheduler()
+        jobs = [j for j in scheduler.active_jobs() + get_deferred_jobs().jobs() if j.requester == requester_user_id]
+        local = {j.job_id for j in jobs}
+        remote = [r for r in get_job_registry().jobs(requester_user_id) if r["job_id"] not in local]
+        if not jobs and not remote:
+            ack("You have no queued or running jobs.")
+            return
+        lines = [format_job_status(j, scheduler.position(j)) for j in jobs]
+        lines += [f"Promo job `{r['job_id']}` · `{r['prefix']}` · {r['total']} users\n"
+                  f"{r['status'].capitalize()} at {r['completed']}/{r['total']} (another worker)" for r in remote]
+        ack("\n".join(lines))
+        return
+
+    if verb not in _ACTIONS or len(parts) != 2:
+        ack("Usage: `/promo-job list` or `/promo-job pause|resume|cancel <job id>`")
+        return
+
+    ack(_control_own_job(client, requester_user_id, parts[1], verb))
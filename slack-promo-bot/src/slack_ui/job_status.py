@@ -0,0 +1,151 @@
+"""Per-job status message: queue position, then progress, then done, with job controls."""
+import threading
+import time
+
+from src.core.jobs import QUEUED, PAUSED, DONE, CANCELLED, DEFERRED, FINISHED
+from src.core.scheduler import get_scheduler
+from src.slack_ui.conversations import check_stale
+
+
+# Minimum seconds between chat.update calls for one job (Slack rate limits chat.update)
+_UPDATE_INTERVAL = 3.0
+
+_messages = {}  # job_id -> {"channel", "ts", "updated_at", "position"}; position as last shown
+_lock = threading.Lock()
+_last_refresh = 0.0
+
+
+def format_job_status(job, position: int = 0) -> str:
+    """One-line status for ``job``."""
+    head = f"Promo job `{job.job_id}` · `{job.prefix}` · {job.total} users"
+    if not job.parse.is_default:
+        head += f" · {job.environment}"
+    if job.status == QUEUED:
+        return f"⏳ {head}\nQueued — position {position} (other jobs ahead are served in turn)"
+    if job.status == DONE:
+        return f"✅ {head}\nDone: {job.completed} processed · {job.errors} errors"
+    if job.status == CANCELLED:
+        return f"🛑 {head}\nCancelled after {job.completed}/{job.total} · {job.errors} errors"
+    if job.status == DEFERRED:
+        return (
+            f"⚠️ {head}\nDeferred at {job.completed}/{job.total} · {job.errors} errors — Parse is not responding. "
+            "The job resumes by itself when it recovers."
+        )
+    if job.status == PAUSED:
+        return f"⏸️ {head}\nPaused at {job.completed}/{job.total} · {job.errors} errors"
+    return f"🔄 {head}\nGenerating… {job.completed}/{job.total} · {job.errors} errors"
+
+
+def build_job_status_blocks(job, position: int = 0) -> list:
+    """Status text plus Pause/Resume and Cancel buttons while the job is unfinished (only Cancel if deferred)."""
+    blocks = [{"type": "section", "text": {"type": "mrkdwn", "text": format_job_status(job, position)}}]
+    if job.status in FINISHED:
+        return blocks
+    toggle = (
+        {"text": "Resume", "action_id": "promo_job_resume"}
+        if job.status == PAUSED else
+        {"text": "Pause", "action_id": "promo_job_pause"}
+    )
+    elements = [] if job.status == DEFERRED else [{
+        "type": "button",
+        "action_id": toggle["action_id"],
+        "text": {"type": "plain_text", "text": toggle["text"]},
+        "value": job.job_id,
+    }]
+    blocks.append({
+        "type": "actions",
+        "block_id": "promo_job_controls",
+        "elements": elements + [
+            {
+                "type": "button",
+                "action_id": "promo_job_cancel",
+                "style": "danger",
+                "text": {"type": "plain_text", "text": "Cancel"},
+                "value": job.job_id,
+                "confirm": {
+                    "title": {"type": "plain_text", "text": "Cancel this job?"},
+                    "text": {"type": "mrkdwn", "text": "Codes already generated are kept; the remaining users are skipped."},
+                    "confirm": {"type": "plain_text", "text": "Cancel job"},
+                    "deny": {"type": "plain_text", "text": "Keep going"},
+                },
+            },
+        ],
+    })
+    return blocks
+
+
+def post_job_status(client, job) -> None:
+    """Post the initial status message for ``job`` to its target channel."""
+    position = get_scheduler().position(job)
+    try:
+        resp = client.chat_postMessage(
+            channel=job.target, text=format_job_status(job, position), blocks=build_job_status_blocks(job, position)
+        )
+    except Exception as e:
+        print(f"[jobs] could not post status for {job.job_id}: {e}")
+        check_stale(job.target, e)
+        return
+    with _lock:
+        _messages[job.job_id] = {
+            "channel": resp["channel"], "ts": resp["ts"], "updated_at": time.monotonic(), "position": position,
+        }
+
+
+def status_message(job_id: str) -> dict:
+    """{"channel", "ts"} of a job's status message, or None (to save with a parked job)."""
+    with _lock:
+        msg = _messages.get(job_id)
+        return {"channel": msg["channel"], "ts": msg["ts"]} if msg else None
+
+
+def adopt_status_message(job, channel: str, ts: str) -> None:
+    """Keep updating an existing status message (a parked job restored after a restart)."""
+    with _lock:
+        _messages[job.job_id] = {"channel": channel, "ts": ts, "updated_at": 0.0, "position": 0}
+
+
+def update_job_status(client, job, force: bool = False) -> None:
+    """
+    Refresh the status message, at most every few seconds unless ``force``.
+
+    The message is forgotten once the job is done.
+    """
+    position = get_scheduler().position(job)
+    with _lock:
+        msg = _messages.get(job.job_id)
+        if msg is None:
+            return
+        now = time.monotonic()
+        if not force and now - msg["updated_at"] < _UPDATE_INTERVAL:
+            return
+        msg["updated_at"] = now
+        msg["position"] = position
+        if job.status in FINISHED:
+            _messages.pop(job.job_id, None)
+    try:
+        client.chat_update(
+            channel=msg["channel"], ts=msg["ts"],
+            text=format_job_status(job, position), blocks=build_job_status_blocks(job, position),
+        )
+    except Exception as e:
+        print(f"[jobs] could not update status for {job.job_id}: {e}")
+
+
+def refresh_queued_statuses(client) -> None:
+    """
+    Update the queue position on queued jobs' status messages whose position moved.
+
+    Positions change as other jobs progress, start and finish, so this runs
+    on their progress; it does the work at most every few seconds.
+    """
+    global _last_refresh
+    scheduler = get_scheduler()
+    with _lock:
+        now = time.monotonic()
+        if now - _last_refresh < _UPDATE_INTERVAL:
+            return
+        _last_refresh = now
+        shown = {job_id: msg["position"] for job_id, msg in _messages.items()}
+    for job in scheduler.active_jobs():
+        if job.status == QUEUED and job.job_id in shown and shown[job.job_id] != scheduler.position(job):
+            update_job_status(client, job)
@@ -0,0 +1,119 @@
+"""Slack handlers for the promo lookup command and shortcut."""
+import json
+from src.utils.authz import get_requester_user_id, is_authorized_slack_user, unauthorized_text
+from src.slack_ui.modal_views import (
+    build_lookup_modal,
+    build_lookup_message_modal,
+    build_lookup_results_modal,
+    build_access_denied_modal,
+)
+from src.slack_ui.view_state import input_value
+from src.core.lookup import classify_query, lookup_promos
+
+
+def _show_results(client, view_id: str, query: str, page: int = 0) -> None:
+    """Run a lookup and render it into an already-open modal."""
+    try:
+        result = lookup_promos(query, page)
+        view = build_lookup_results_modal(query, result)
+    except Exception as e:
+        print(f"[lookup] lookup failed for {query!r}: {e}")
+        view = build_lookup_message_modal(f":warning: Lookup failed: {e}")
+    try:
+        client.views_update(view_id=view_id, view=view)
+    except Exception as e:
+        print(f"[lookup] views_update failed: {e}")
+
+
+def handle_open_lookup(ack, body, client):
+    """
+    Handle `/promo-lookup [query]` and the lookup shortcut.
+
+    With a query, results are shown straight away; otherwise the search
+    form is opened.
+
+    Args:
+        ack: Slack acknowledgement function
+        body: Request body from Slack
+        client: Slack client
+    """
+    requester_user_id = get_requester_user_id(body)
+    if not is_authorized_slack_user(requester_user_id):
+        if body.get("command"):
+            ack(unauthorized_text(requester_user_id))
+            return
+        ack()
+        try:
+            client.views_open(trigger_id=body["trigger_id"], view=build_access_denied_modal())
+        except Exception as e:
+            print(f"[handle_open_lookup] views_open(access_denied) failed: {e}")
+        return
+
+    query = (body.get("text") or "").strip()
+    if query:
+        try:
+            classify_query(query)
+        except ValueError as e:
+            ack(str(e))
+            return
+
+    ack()
+    try:
+        if not query:
+            client.views_open(trigger_id=body["trigger_id"], view=build_lookup_modal())
+            return
+        # Open a placeholder first: the trigger_id expires long before a slow lookup would
+        resp = client.views_open(
+            trigger_id=body["trigger_id"],
+            view=build_lookup_message_modal(f":mag: Searching for `{query}`…"),
+        )
+    except Exception as e:
+        print(f"[handle_open_lookup] views_open failed: {e}")
+        return
+    _show_results(client, resp["view"]["id"], query)
+
+
+def handle_lookup_submit(ack, body, client, view):
+    """
+    Handle lookup form submission.
+
+    Args:
+        ack: Slack acknowledgement function
+        body: Request body from Slack
+        client: Slack client
+        view: The submitted view
+    """
+    requester_user_id = get_requester_user_id(body)
+    if not is_authorized_slack_user(requester_user_id):
+        ack({"response_action": "update", "view": build_access_denied_modal()})
+        return
+
+    vals = view["state"]["values"]
+    query = input_value(vals, "lookup_query")
+    try:
+        classify_query(query)
+    except ValueError as e:
+        ack({"response_action": "errors", "errors": {"lookup_query": str(e)}})
+        return
+
+    ack({
+        "response_action": "update",
+        "view": build_lookup_message_modal(f":mag: Searching for `{query}`…"),
+    })
+    _show_results(client, view["id"], query)
+
+
+def handle_lookup_page(ack, body, client):
+    """Handle the Previous/Next buttons on the lookup results modal."""
+    ack()
+    requester_user_id = get_requester_user_id(body)
+    if not is_authorized_slack_user(requester_user_id):
+        return
+
+    try:
+        value = json.loads(body["actions"][0]["value"])
+        query, page = value["q"], int(value["p"])
+    except Exception as e:
+        print(f"[lookup] bad pagination payload: {e}")
+        return
+    _show_results(client, body["view"]["id"], query, page)
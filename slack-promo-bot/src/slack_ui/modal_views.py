@@ -1,10 +1,53 @@
 """Slack modal view definitions."""
+import copy
 import json
-from src.config import DEFAULT_PREFIX, DEFAULT_DURATION
+from functools import lru_cache
+from src.config import PROMO_PREFIXES, PROMO_SKIP_EXISTING, PARSE_ENVIRONMENTS, PARSE_DEFAULT_ENVIRONMENT
+from src.live_config import current as current_settings
 
 
 def build_promo_form_modal():
     """Build the initial promo generation form modal."""
+    # Callers may mutate the view (e.g. private_metadata), so hand out a copy
+    settings = current_settings()
+    return copy.deepcopy(_promo_form_template(settings.default_prefix, settings.default_duration, PROMO_SKIP_EXISTING))
+
+
+def prime_templates():
+    """Build static view templates ahead of the first request."""
+    build_promo_form_modal()
+
+
+_SKIP_EXISTING_OPTION = {
+    "text": {"type": "plain_text", "text": "Reuse existing codes"},
+    "description": {"type": "plain_text", "text": "Users with an active code for this prefix get it back, not a new one"},
+    "value": "skip_existing",
+}
+
+
+def _environment_block():
+    """Optional Parse environment picker; only shown when more than one is configured."""
+    return {
+        "type": "input",
+        "block_id": "environment",
+        "optional": True,
+        "label": {"type": "plain_text", "text": "Parse environment (optional)"},
+        "element": {
+            "type": "static_select",
+            "action_id": "value",
+            "placeholder": {"type": "plain_text", "text": "By prefix"},
+            "options": [{"text": {"type": "plain_text", "text": name}, "value": name} for name in PARSE_ENVIRONMENTS],
+        },
+        "hint": {"type": "plain_text", "text": f"Leave empty to pick by prefix (default: {PARSE_DEFAULT_ENVIRONMENT})."},
+    }
+
+
+@lru_cache(maxsize=16)
+def _promo_form_template(default_prefix, default_duration, skip_existing=False):
+    options_element = {"type": "checkboxes", "action_id": "value", "options": [_SKIP_EXISTING_OPTION]}
+    if skip_existing:
+        options_element["initial_options"] = [_SKIP_EXISTING_OPTION]
+    environment_blocks = [_environment_block()] if len(PARSE_ENVIRONMENTS) > 1 else []
     return {
         "type": "modal",
         "callback_id": "promo_gui_submit",
@@ -32,20 +75,9 @@ def build_promo_form_modal():
                 "element": {
                     "type": "static_select",
                     "action_id": "value",
-                    "initial_option": {"text": {"type": "plain_text", "text": DEFAULT_PREFIX}, "value": DEFAULT_PREFIX},
+                    "initial_option": {"text": {"type": "plain_text", "text": default_prefix}, "value": default_prefix},
                     "options": [
-                        {"text": {"type": "plain_text", "text": "AVZ-2DA-"},   "value": "AVZ-2DA-"},
-                        {"text": {"type": "plain_text", "text": "AVZ-ACE-"},   "value": "AVZ-ACE-"},
-                        {"text": {"type": "plain_text", "text": "AVZ-ACE1Y-"}, "value": "AVZ-ACE1Y-"},
-                        {"text": {"type": "plain_text", "text": "AVZ-ACAP-"},  "value": "AVZ-ACAP-"},
-                        {"text": {"type": "plain_text", "text": "AVZ-ARMB-"},  "value": "AVZ-ARMB-"},
-                        {"text": {"type": "plain_text", "text": "AVZ-ACAPEXT-"},  "value": "AVZ-ACAPEXT-"},
-                        {"text": {"type": "plain_text", "text": "AVZ-SPEXT-"},  "value": "AVZ-SPEXT-"},
-                        {"text": {"type": "plain_text", "text": "AVZ-RZPLT-"},  "value": "AVZ-RZPLT-"},
-                        {"text": {"type": "plain_text", "text": "AVZ-STRLT-"},  "value": "AVZ-STRLT-"},
-                        {"text": {"type": "plain_text", "text": "AVZ-LOANER-"},  "value": "AVZ-LOANER-"},
-                        {"text": {"type": "plain_text", "text": "AVZ-MGRT-"},  "value": "AVZ-MGRT-"},
-                        {"text": {"type": "plain_text", "text": "AVZ-LEGACY-"},  "value": "AVZ-LEGACY-"}
+                        {"text": {"type": "plain_text", "text": p}, "value": p} for p in PROMO_PREFIXES
                     ] 
                 }
             },
@@ -60,6 +92,7 @@ def build_promo_form_modal():
                     "placeholder": {"type": "plain_text", "text": "e.g., AVZ-TRIAL-"}
                 }
             },
+            *environment_blocks,
             {
                 "type": "input",
                 "block_id": "duration",
@@ -67,7 +100,7 @@ def build_promo_form_modal():
                 "element": {
                     "type": "static_select",
                     "action_id": "value",
-                    "initial_option": {"text": {"type": "plain_text", "text": DEFAULT_DURATION}, "value": DEFAULT_DURATION},
+                    "initial_option": {"text": {"type": "plain_text", "text": default_duration}, "value": default_duration},
                     "options": [
                         {"text": {"type": "plain_text", "text": "LIFETIME"}, "value": "LIFETIME"},
                         {"text": {"type": "plain_text", "text": "30D"},      "value": "30D"},
@@ -102,12 +135,20 @@ def build_promo_form_modal():
                     "placeholder": {"type": "plain_text", "text": "Why are you creating these promo codes?"}
                 }
             },
+            {
+                "type": "input",
+                "block_id": "options",
+                "optional": True,
+                "label": {"type": "plain_text", "text": "Options"},
+                "element": options_element,
+            },
         ]
     }
 
 
 def build_confirmation_modal(ids: list, prefix: str, duration: str, partner: str, 
-                             notes: str, target_display: str, target_for_results: str):
+                             notes: str, target_display: str, target_for_results: str,
+                             skip_existing: bool = False, environment: str = ""):
     """
     Build the confirmation modal with all generation details.
     
@@ -119,6 +160,8 @@ def build_confirmation_modal(ids: list, prefix: str, duration: str, partner: str
         notes: Reason for generation
         target_display: Display name for results destination
         target_for_results: Actual channel/DM ID for results
+        skip_existing: Reuse codes users already hold with this prefix
+        environment: Parse environment the codes are created in
         
     Returns:
         Modal view dictionary
@@ -141,6 +184,8 @@ def build_confirmation_modal(ids: list, prefix: str, duration: str, partner: str
             "partner": partner,
             "target": target_for_results,
             "notes": notes,
+            "skip_existing": skip_existing,
+            "environment": environment,
         }),
         "blocks": [
             {
@@ -157,7 +202,9 @@ def build_confirmation_modal(ids: list, prefix: str, duration: str, partner: str
                 {"type": "mrkdwn", "text": f"*Duration*\n`{duration}`"},
                 {"type": "mrkdwn", "text": f"*Partner*\n`{partner}`"},
                 {"type": "mrkdwn", "text": f"*Post Results To*\n{target_display}"},
-            ]},
+                {"type": "mrkdwn", "text": "*Existing codes*\n" + (
+                    "Reused (no new code for users who have one)" if skip_existing else "New code for every user")},
+            ] + ([{"type": "mrkdwn", "text": f"*Parse environment*\n`{environment}`"}] if len(PARSE_ENVIRONMENTS) > 1 else [])},
             {"type": "divider"},
             {
                 "type": "section",
@@ -177,6 +224,42 @@ def build_confirmation_modal(ids: list, prefix: str, duration: str, partner: str
     }
 
 
+def build_validating_modal(entry_count: int, external_id: str):
+    """A placeholder pushed while a large submission is validated after the ack."""
+    return {
+        "type": "modal",
+        "callback_id": "promo_gui_validating",
+        "external_id": external_id,
+        "title": {"type": "plain_text", "text": "Generate Promos"},
+        "close": {"type": "plain_text", "text": "Back"},
+        "blocks": [
+            {
+                "type": "section",
+                "text": {"type": "mrkdwn", "text": f":hourglass_flowing_sand: Validating {entry_count} entries…"}
+            }
+        ],
+    }
+
+
+def build_validation_errors_modal(errors: dict):
+    """Shows validation errors for a large submission; "Back" returns to the form."""
+    labels = {"users_text": "Users", "custom_days": "Custom days", "notes": "Notes", "prefix": "Prefix",
+              "environment": "Parse environment"}
+    lines = [f"• *{labels.get(block, block)}:* {message}" for block, message in errors.items()]
+    return {
+        "type": "modal",
+        "callback_id": "promo_gui_validation_errors",
+        "title": {"type": "plain_text", "text": "Please fix the form"},
+        "close": {"type": "plain_text", "text": "Back"},
+        "blocks": [
+            {
+                "type": "section",
+                "text": {"type": "mrkdwn", "text": "\n".join(lines) + "\n\nPress *Back* to edit your entries."}
+            }
+        ],
+    }
+
+
 def build_access_denied_modal():
     """A simple modal shown when a user is not authorized to generate promos."""
     return {
@@ -197,3 +280,294 @@ def build_access_denied_modal():
             }
         ],
     }
+
+
+def build_lookup_modal(initial_query: str = ""):
+    """Build the promo lookup search modal."""
+    element = {
+        "type": "plain_text_input",
+        "action_id": "value",
+        "focus_on_load": True,
+        "placeholder": {"type": "plain_text", "text": "user@x.com, +14155552671 or AVZ-ACE-7K2Q"},
+    }
+    if initial_query:
+        element["initial_value"] = initial_query
+    return {
+        "type": "modal",
+        "callback_id": "promo_lookup_submit",
+        "title": {"type": "plain_text", "text": "Look Up Promos"},
+        "submit": {"type": "plain_text", "text": "Search"},
+        "close": {"type": "plain_text", "text": "Cancel"},
+        "blocks": [
+            {
+                "type": "input",
+                "block_id": "lookup_query",
+                "label": {"type": "plain_text", "text": "User (email/phone) or promo code"},
+                "element": element,
+            },
+        ],
+    }
+
+
+def build_lookup_message_modal(text: str):
+    """A text-only lookup modal (progress placeholder or error message)."""
+    return {
+        "type": "modal",
+        "callback_id": "promo_lookup_results",
+        "title": {"type": "plain_text", "text": "Look Up Promos"},
+        "close": {"type": "plain_text", "text": "Close"},
+        "blocks": [
+            {"type": "section", "text": {"type": "mrkdwn", "text": text}},
+        ],
+    }
+
+
+def build_lookup_results_modal(query: str, result):
+    """
+    Build the lookup results modal for one page of results.
+
+    Args:
+        query: The raw query the user typed (kept for pagination)
+        result: LookupPage from src.core.lookup
+
+    Returns:
+        Modal view dictionary
+    """
+    what = "user" if result.field == "promoCodeUser" else "code"
+    blocks = [
+        {
+            "type": "section",
+            "text": {"type": "mrkdwn", "text": f"*Results for {what}* `{result.value}` · page {result.page + 1}"},
+        },
+        {"type": "divider"},
+    ]
+
+    if not result.rows:
+        blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": "_No promo codes found._"}})
+
+    for row in result.rows:
+        created = (row.get("createdAt") or "")[:10]
+        blocks.append({
+            "type": "section",
+            "text": {
+                "type": "mrkdwn",
+                "text": (
+                    f"`{row.get('promoCodeId', '?')}` → `{row.get('promoCodeUser', '?')}`\n"
+                    f"Duration: `{row.get('promoCodeDuration', '?')}` · "
+                    f"Partner: `{row.get('promoCodeDistributionPartner', '?')}` · Created: {created or '?'}"
+                ),
+            },
+        })
+
+    buttons = []
+    if result.page > 0:
+        buttons.append({
+            "type": "button",
+            "action_id": "promo_lookup_prev",
+            "text": {"type": "plain_text", "text": "◀ Previous"},
+            "value": json.dumps({"q": query, "p": result.page - 1}),
+        })
+    if result.has_more:
+        buttons.append({
+            "type": "button",
+            "action_id": "promo_lookup_next",
+            "text": {"type": "plain_text", "text": "Next ▶"},
+            "value": json.dumps({"q": query, "p": result.page + 1}),
+        })
+    if buttons:
+        blocks.append({"type": "actions", "block_id": "lookup_pages", "elements": buttons})
+
+    return {
+        "type": "modal",
+        "callback_id": "promo_lookup_results",
+        "title": {"type": "plain_text", "text": "Look Up Promos"},
+        "close": {"type": "plain_text", "text": "Done"},
+        "blocks": blocks,
+    }
+
+
+def build_extend_modal():
+    """Build the bulk validity extension form modal."""
+    return {
+        "type": "modal",
+        "callback_id": "promo_extend_submit",
+        "title": {"type": "plain_text", "text": "Extend Validity"},
+        "submit": {"type": "plain_text", "text": "Run"},
+        "close": {"type": "plain_text", "text": "Cancel"},
+        "blocks": [
+            {
+                "type": "input",
+                "block_id": "users_text",
+                "label": {"type": "plain_text", "text": "Users (emails or phone numbers)"},
+                "element": {
+                    "type": "plain_text_input",
+                    "action_id": "value",
+                    "multiline": True,
+                    "focus_on_load": True,
+                    "placeholder": {"type": "plain_text", "text": "abc@gmail.com, +14155552671, xyz@company.com"}
+                },
+                "hint": {"type": "plain_text", "text": "Comma-separated. Every code held by these users is extended."}
+            },
+            {
+                "type": "input",
+                "block_id": "extension",
+                "label": {"type": "plain_text", "text": "Extend by"},
+                "element": {
+                    "type": "static_select",
+                    "action_id": "value",
+                    "initial_option": {"text": {"type": "plain_text", "text": "30D"}, "value": "30D"},
+                    "options": [
+                        {"text": {"type": "plain_text", "text": "30D"},      "value": "30D"},
+                        {"text": {"type": "plain_text", "text": "60D"},      "value": "60D"},
+                        {"text": {"type": "plain_text", "text": "90D"},      "value": "90D"},
+                        {"text": {"type": "plain_text", "text": "6M"},       "value": "6M"},
+                        {"text": {"type": "plain_text", "text": "1Y"},       "value": "1Y"},
+                        {"text": {"type": "plain_text", "text": "LIFETIME"}, "value": "LIFETIME"}
+                    ]
+                }
+            },
+            {
+                "type": "input",
+                "block_id": "custom_days",
+                "optional": True,
+                "label": {"type": "plain_text", "text": "Custom days (number, optional)"},
+                "element": {
+                    "type": "number_input",
+                    "is_decimal_allowed": False,
+                    "min_value": "1",
+                    "action_id": "value",
+                    "placeholder": {"type": "plain_text", "text": "e.g., 45 (overrides Extend by if set)"}
+                }
+            },
+            {
+                "type": "input",
+                "block_id": "prefix_filter",
+                "optional": True,
+                "label": {"type": "plain_text", "text": "Only codes with prefix (optional)"},
+                "element": {
+                    "type": "plain_text_input",
+                    "action_id": "value",
+                    "placeholder": {"type": "plain_text", "text": "e.g., AVZ-2DA-"}
+                }
+            },
+            {
+                "type": "input",
+                "block_id": "notes",
+                "label": {"type": "plain_text", "text": "Notes (reason for extension)"},
+                "element": {
+                    "type": "plain_text_input",
+                    "action_id": "value",
+                    "multiline": True,
+                    "placeholder": {"type": "plain_text", "text": "Why are you extending these codes?"}
+                }
+            },
+            {
+                "type": "input",
+                "block_id": "options",
+                "optional": True,
+                "label": {"type": "plain_text", "text": "Options"},
+                "element": {
+                    "type": "checkboxes",
+                    "action_id": "value",
+                    "initial_options": [
+                        {"text": {"type": "plain_text", "text": "Dry run (preview only, nothing is saved)"}, "value": "dry_run"}
+                    ],
+                    "options": [
+                        {"text": {"type": "plain_text", "text": "Dry run (preview only, nothing is saved)"}, "value": "dry_run"}
+                    ]
+                }
+            },
+        ]
+    }
+
+
+def build_revoke_modal():
+    """Build the bulk revoke form modal."""
+    return {
+        "type": "modal",
+        "callback_id": "promo_revoke_submit",
+        "title": {"type": "plain_text", "text": "Revoke Promos"},
+        "submit": {"type": "plain_text", "text": "Run"},
+        "close": {"type": "plain_text", "text": "Cancel"},
+        "blocks": [
+            {
+                "type": "section",
+                "text": {"type": "mrkdwn", "text": "Select codes by any combination below. Prefix and partner narrow the user/code lists."}
+            },
+            {
+                "type": "input",
+                "block_id": "prefix_filter",
+                "optional": True,
+                "label": {"type": "plain_text", "text": "Prefix"},
+                "element": {
+                    "type": "plain_text_input",
+                    "action_id": "value",
+                    "placeholder": {"type": "plain_text", "text": "e.g., AVZ-TRIAL-"}
+                }
+            },
+            {
+                "type": "input",
+                "block_id": "partner_filter",
+                "optional": True,
+                "label": {"type": "plain_text", "text": "Partner"},
+                "element": {
+                    "type": "plain_text_input",
+                    "action_id": "value",
+                    "placeholder": {"type": "plain_text", "text": "e.g., EYE-TECH"}
+                }
+            },
+            {
+                "type": "input",
+                "block_id": "users_text",
+                "optional": True,
+                "label": {"type": "plain_text", "text": "Users (emails or phone numbers)"},
+                "element": {
+                    "type": "plain_text_input",
+                    "action_id": "value",
+                    "multiline": True,
+                    "placeholder": {"type": "plain_text", "text": "abc@gmail.com, +14155552671"}
+                },
+                "hint": {"type": "plain_text", "text": "Comma-separated. All of their codes are revoked."}
+            },
+            {
+                "type": "input",
+                "block_id": "codes_text",
+                "optional": True,
+                "label": {"type": "plain_text", "text": "Promo codes"},
+                "element": {
+                    "type": "plain_text_input",
+                    "action_id": "value",
+                    "multiline": True,
+                    "placeholder": {"type": "plain_text", "text": "AVZ-ACE-7K2Q, AVZ-2DA-AB12"}
+                },
+                "hint": {"type": "plain_text", "text": "Comma-separated."}
+            },
+            {
+                "type": "input",
+                "block_id": "notes",
+                "label": {"type": "plain_text", "text": "Reason"},
+                "element": {
+                    "type": "plain_text_input",
+                    "action_id": "value",
+                    "multiline": True,
+                    "placeholder": {"type": "plain_text", "text": "Why are these codes being revoked?"}
+                }
+            },
+            {
+                "type": "input",
+                "block_id": "options",
+                "optional": True,
+                "label": {"type": "plain_text", "text": "Options"},
+                "element": {
+                    "type": "checkboxes",
+                    "action_id": "value",
+                    "initial_options": [
+                        {"text": {"type": "plain_text", "text": "Dry run (count only, nothing is saved)"}, "value": "dry_run"}
+                    ],
+                    "options": [
+                        {"text": {"type": "plain_text", "text": "Dry run (count only, nothing is saved)"}, "value": "dry_run"}
+                    ]
+                }
+            },
+        ]
+    }
@@ -1,11 +1,15 @@
 """Slack notification helpers."""
-import re
-from src.config import ENABLE_CONVERSATIONS_JOIN
+import csv
+import io
+from src.config import PROMO_RESULTS_FILE_ROWS
+from src.live_config import current as current_settings
+from src.slack_ui.conversations import ensure_joined, check_stale, post_dm
+from src.slack_ui.digest import get_digest
 
 
 def notify_channel(client, notify_channel: str, target: str, prefix: str, duration: str, 
                   partner: str, processed_count: int, errors: int, requester_user_id: str, 
-                  notes: str = "", rows: list = None) -> None:
+                  notes: str = "", rows: list = None, permalink: str = "", want_permalink: bool = False) -> str:
     """
     Send a notification to a configured channel about promo generation.
     
@@ -21,18 +25,25 @@ def notify_channel(client, notify_channel: str, target: str, prefix: str, durati
         requester_user_id: ID of user who requested generation
         notes: Optional notes/reason for generation
         rows: Optional list of (user_id, promo_code, duration, partner) tuples
+        permalink: Link to the full results; if set, the codes are not repeated
+        want_permalink: Also look up a permalink to the notification
+
+    Returns:
+        The notification's permalink, or "" if not wanted, not posted or it could not be fetched
     """
     channel = (notify_channel or "").strip()
     if not channel:
-        return
+        return ""
+
+    settings = current_settings()
+    if settings.notify_mode == "digest":
+        # Summarised with other jobs by the digest flusher
+        get_digest().add(requester_user_id, target, prefix, duration, partner, notes=notes, rows=rows)
+        return ""
 
     # Optional join for public channels (C…) — disabled by default to avoid missing_scope logs
-    if ENABLE_CONVERSATIONS_JOIN and re.fullmatch(r"C[A-Z0-9]+", channel):
-        try:
-            client.conversations_join(channel=channel)
-        except Exception as e:
-            # Ignore join failures; we'll attempt to post anyway
-            print(f"[notify] conversations_join failed for {channel}: {e}")
+    if settings.enable_conversations_join:
+        ensure_joined(client, channel)
 
     try:
         requester = f"<@{requester_user_id}>"
@@ -48,34 +59,41 @@ def notify_channel(client, notify_channel: str, target: str, prefix: str, durati
     if notes:
         lines.append(f"Notes: {notes}")
     
-    lines.append(f"Processed: {processed_count} · Errors: {errors}")
+    reused = sum(1 for r in rows or [] if getattr(r, "existing", False))
+    lines.append(f"Processed: {processed_count} · Errors: {errors}" + (f" · Existing (reused): {reused}" if reused else ""))
     
-    # Add generated promo codes
-    if rows:
+    # Add generated promo codes (or just link to them)
+    if permalink:
+        lines.append(f"<{permalink}|Full results>")
+    elif rows:
         lines.append("\n*Generated Codes:*")
-        for uid, code_or_err, _, _ in rows:
-            if str(code_or_err).startswith("ERROR:"):
-                lines.append(f"• `{uid}` → _{code_or_err}_")
-            else:
-                lines.append(f"• `{uid}` → `{code_or_err}`")
+        lines.extend(format_result_row(row) for row in rows)
     
     text = "\n".join(lines)
 
     try:
-        client.chat_postMessage(channel=channel, text=text)
+        resp = client.chat_postMessage(channel=channel, text=text)
     except Exception as e:
         # Fall back: DM requester with the error for visibility
         print(f"[notify] chat_postMessage failed for {channel}: {e}")
+        check_stale(channel, e)
         _fallback_dm_requester(client, requester_user_id, channel, e)
+        return ""
+    if not want_permalink:
+        return ""
+    try:
+        return client.chat_getPermalink(channel=resp["channel"], message_ts=resp["ts"])["permalink"]
+    except Exception as e:
+        print(f"[notify] chat_getPermalink failed for {channel}: {e}")
+        return ""
 
 
 def _fallback_dm_requester(client, requester_user_id: str, channel: str, error: Exception):
     """Send a DM to the requester if channel notification fails."""
     try:
-        dm = client.conversations_open(users=requester_user_id)
-        dm_channel = dm["channel"]["id"]
-        client.chat_postMessage(
-            channel=dm_channel,
+        post_dm(
+            client,
+            requester_user_id,
             text=(
                 f"Could not post summary to {channel}. "
                 f"Please invite the bot to that channel (or set a valid channel ID).\n"
@@ -86,8 +104,18 @@ def _fallback_dm_requester(client, requester_user_id: str, channel: str, error:
         print(f"[notify] DM fallback failed: {e2}")
 
 
+def format_result_row(row) -> str:
+    """One results line: a code, a reused existing code, or an error."""
+    uid, code_or_err = row[0], row[1]
+    if str(code_or_err).startswith("ERROR:"):
+        return f"• `{uid}` → _{code_or_err}_"
+    if getattr(row, "existing", False):
+        return f"• `{uid}` → `{code_or_err}` _(existing)_"
+    return f"• `{uid}` → `{code_or_err}`"
+
+
 def format_results_message(prefix: str, duration: str, partner: str, 
-                          notes: str, ids: list, rows: list, errors: int) -> str:
+                          notes: str, ids: list, rows: list, errors: int, include_rows: bool = True) -> str:
     """
     Format the promo generation results message.
     
@@ -99,6 +127,7 @@ def format_results_message(prefix: str, duration: str, partner: str,
         ids: List of user IDs
         rows: List of (user_id, promo_code, duration, partner) tuples
         errors: Number of errors
+        include_rows: False for just the header (e.g. when the rows go in a file)
         
     Returns:
         Formatted message string
@@ -108,12 +137,61 @@ def format_results_message(prefix: str, duration: str, partner: str,
     if notes:
         lines.append(f"Notes: {notes}")
         
-    lines.append(f"Processed: {len(ids)} · Errors: {errors}")
+    reused = sum(1 for r in rows if getattr(r, "existing", False))
+    lines.append(f"Processed: {len(ids)} · Errors: {errors}" + (f" · Existing (reused): {reused}" if reused else ""))
+    if not include_rows:
+        return "\n".join(lines)
     
-    for uid, code_or_err, _, _ in rows:
-        if str(code_or_err).startswith("ERROR:"):
-            lines.append(f"• `{uid}` → _{code_or_err}_")
-        else:
-            lines.append(f"• `{uid}` → `{code_or_err}`")
+    lines.extend(format_result_row(row) for row in rows)
             
     return "\n".join(lines)
+
+
+def format_results_csv(rows: list) -> str:
+    """Results as CSV (user_id, code, error, duration, partner, status), one line per row."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(("user_id", "code", "error", "duration", "partner", "status"))
+    for row in rows:
+        uid, code_or_err, duration, partner = row
+        failed = str(code_or_err).startswith("ERROR:")
+        status = "error" if failed else "existing" if getattr(row, "existing", False) else "created"
+        writer.writerow((uid, "" if failed else code_or_err, code_or_err if failed else "", duration, partner, status))
+    return out.getvalue()
+
+
+def post_results(client, channel: str, message: str, summary: str, rows: list, want_permalink: bool = False) -> str:
+    """
+    Post job results once: as ``message``, or, above PROMO_RESULTS_FILE_ROWS
+    rows, as a CSV file with ``summary`` as its comment.
+
+    Args:
+        client: Slack client instance
+        channel: Channel to post to
+        message: Full results text
+        summary: Results header without the per-user rows
+        rows: List of (user_id, promo_code, duration, partner) tuples
+        want_permalink: Also look up a permalink to the post
+
+    Returns:
+        The permalink, or "" if not wanted or it could not be fetched
+
+    Raises:
+        Whatever the Slack post raises
+    """
+    if PROMO_RESULTS_FILE_ROWS and len(rows) > PROMO_RESULTS_FILE_ROWS:
+        resp = client.files_upload_v2(
+            channel=channel, content=format_results_csv(rows), filename="promo-results.csv",
+            title="Promo results", initial_comment=summary,
+        )
+        shared = resp.get("file") or (resp.get("files") or [{}])[0]
+        return (shared.get("permalink") or "") if want_permalink else ""
+
+    resp = client.chat_postMessage(channel=channel, text=message)
+    if not want_permalink:
+        return ""
+    try:
+        return client.chat_getPermalink(channel=resp["channel"], message_ts=resp["ts"])["permalink"]
+    except Exception as e:
+        print(f"[results] chat_getPermalink failed for {channel}: {e}")
+        return ""
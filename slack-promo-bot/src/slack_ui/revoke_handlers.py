@@ -0,0 +1,91 @@
+"""Slack handlers for bulk promo revocation."""
+import re
+from src.live_config import current as current_settings
+from src.utils.authz import get_requester_user_id, is_authorized_slack_user, unauthorized_text
+from src.utils.validation import parse_user_ids, validate_user_id
+from src.slack_ui.modal_views import build_revoke_modal, build_access_denied_modal
+from src.slack_ui.view_state import input_value, checked_values
+from src.core.bulk_revoke import build_selectors, revoke_codes
+from src.slack_ui.conversations import check_stale, post_dm
+
+
+def handle_open_revoke(ack, body, client):
+    """
+    Handle `/promo-revoke` by opening the revoke modal.
+
+    Args:
+        ack: Slack acknowledgement function
+        body: Request body from Slack
+        client: Slack client
+    """
+    requester_user_id = get_requester_user_id(body)
+    if not is_authorized_slack_user(requester_user_id):
+        ack(unauthorized_text(requester_user_id))
+        return
+
+    ack()
+    try:
+        client.views_open(trigger_id=body["trigger_id"], view=build_revoke_modal())
+    except Exception as e:
+        print(f"[handle_open_revoke] views_open failed: {e}")
+
+
+def handle_revoke_submit(ack, body, client, view):
+    """
+    Validate the revoke form, then run the revoke and post a summary.
+
+    Args:
+        ack: Slack acknowledgement function
+        body: Request body from Slack
+        client: Slack client
+        view: The submitted view
+    """
+    requester_user_id = get_requester_user_id(body)
+    if not is_authorized_slack_user(requester_user_id):
+        ack({"response_action": "update", "view": build_access_denied_modal()})
+        return
+
+    vals = view["state"]["values"]
+    prefix = input_value(vals, "prefix_filter")
+    partner = input_value(vals, "partner_filter")
+    users = parse_user_ids(input_value(vals, "users_text"))
+    codes = [c.upper() for c in re.split(r"\s*,\s*", input_value(vals, "codes_text")) if c]
+    reason = input_value(vals, "notes")
+    dry_run = "dry_run" in checked_values(vals, "options")
+
+    if not (prefix or partner or users or codes):
+        ack({"response_action": "errors", "errors": {"prefix_filter": "Enter a prefix, partner, users or codes."}})
+        return
+    invalid = [x for x in users if not validate_user_id(x)]
+    if invalid:
+        ack({"response_action": "errors", "errors": {"users_text": f"These look invalid: {', '.join(invalid[:5])}"}})
+        return
+    if not reason:
+        ack({"response_action": "errors", "errors": {"notes": "Please provide the reason for revoking."}})
+        return
+
+    ack({"response_action": "clear"})
+
+    selectors = build_selectors(prefix, partner, users=users or None, codes=codes or None)
+    report = revoke_codes(selectors, reason=reason, revoked_by=requester_user_id, dry_run=dry_run)
+
+    scope = ", ".join(filter(None, [
+        f"prefix `{prefix}`" if prefix else "",
+        f"partner `{partner}`" if partner else "",
+        f"{len(users)} users" if users else "",
+        f"{len(codes)} codes" if codes else "",
+    ]))
+    text = f"Revoke of {scope} requested by <@{requester_user_id}>\nReason: {reason}\n{report.format()}"
+
+    try:
+        post_dm(client, requester_user_id, text=text)
+    except Exception as e:
+        print(f"[revoke] DM summary failed: {e}")
+
+    notify = current_settings().notify_channel
+    if not dry_run and notify:
+        try:
+            client.chat_postMessage(channel=notify, text=text)
+        except Exception as e:
+            print(f"[revoke] notify failed for {notify}: {e}")
+            check_stale(notify, e)
@@ -0,0 +1,73 @@
+"""Slack handler for usage statistics from the rollups."""
+import time
+
+from src.utils.authz import get_requester_user_id, is_authorized_slack_user, unauthorized_text
+from src.core.rollups import get_rollups, period_range, BACKFILL_REQUESTER
+
+
+USAGE = (
+    "Usage: `/promo-stats [24h | today | 7d | 30d | month | YYYY-MM | YYYY-MM-DD]` (default `7d`)\n"
+    "Codes handed out by prefix, partner and requester."
+)
+
+# Lines per breakdown; the rest are folded into "… and N more"
+_TOP = 15
+
+
+def _breakdown(title: str, counts: dict, label) -> list:
+    ranked = sorted(counts.items(), key=lambda kv: (-kv[1][0], kv[0]))
+    lines = [f"*{title}*"]
+    for key, (codes, errors) in ranked[:_TOP]:
+        lines.append(f"• {label(key)}: {codes:,}" + (f" (+{errors:,} errors)" if errors else ""))
+    if len(ranked) > _TOP:
+        lines.append(f"• … and {len(ranked) - _TOP} more")
+    return lines
+
+
+def _requester_label(uid: str) -> str:
+    return "_before live stats (backfilled)_" if uid == BACKFILL_REQUESTER else f"<@{uid}>"
+
+
+def format_stats(label: str, totals: dict, elapsed_ms: float) -> str:
+    """Reply text for UsageRollups.totals() over a period."""
+    lines = [
+        f"*Promo stats* · {label} · {totals['codes']:,} codes · {totals['errors']:,} errors "
+        f"({elapsed_ms:.0f} ms)"
+    ]
+    if not totals["codes"] and not totals["errors"]:
+        lines.append("No codes in this period.")
+        return "\n".join(lines)
+    lines += _breakdown("By prefix", totals["by_prefix"], lambda k: f"`{k}`")
+    lines += _breakdown("By partner", totals["by_partner"], lambda k: f"`{k or '—'}`")
+    lines += _breakdown("By requester", totals["by_requester"], _requester_label)
+    return "\n".join(lines)
+
+
+def handle_stats_command(ack, body, client):
+    """
+    Handle `/promo-stats [period]`: answer from the rollups in the ack.
+
+    Args:
+        ack: Slack acknowledgement function
+        body: Request body from Slack
+        client: Slack client
+    """
+    requester_user_id = get_requester_user_id(body)
+    if not is_authorized_slack_user(requester_user_id):
+        ack(unauthorized_text(requester_user_id))
+        return
+
+    rollups = get_rollups()
+    if rollups is None:
+        ack("Usage stats are disabled (set `PROMO_ROLLUPS_PATH`).")
+        return
+    period = (body.get("text") or "").strip().lower() or "7d"
+    try:
+        grain, since, until, label = period_range(period)
+    except ValueError as e:
+        ack(f"{e}\n{USAGE}")
+        return
+
+    started = time.perf_counter()
+    totals = rollups.totals(grain, since, until)
+    ack(format_stats(label, totals, (time.perf_counter() - started) * 1000))
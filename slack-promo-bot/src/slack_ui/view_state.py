@@ -0,0 +1,22 @@
+"""Helpers for reading submitted modal state (view["state"]["values"])."""
+
+
+def input_value(vals: dict, block_id: str) -> str:
+    """Read a plain-text/number input value (action_id "value"), stripped."""
+    block = vals.get(block_id) or {}
+    action = block.get("value") or {}
+    return (action.get("value") or "").strip()
+
+
+def selected_value(vals: dict, block_id: str, default: str = "") -> str:
+    """Read the selected option value of a static select."""
+    block = vals.get(block_id) or {}
+    option = (block.get("value") or {}).get("selected_option") or {}
+    return option.get("value", default)
+
+
+def checked_values(vals: dict, block_id: str) -> set:
+    """Read the set of checked checkbox values."""
+    block = vals.get(block_id) or {}
+    options = (block.get("value") or {}).get("selected_options") or []
+    return {o.get("value") for o in options}
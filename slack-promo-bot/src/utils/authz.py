@@ -4,7 +4,8 @@ from __future__ import annotations
 
 from typing import Any, Mapping
 
-from src.config import PROMO_AUTHORIZED_USER_IDS
+from src.live_config import current as current_settings
+from src.utils.membership import get_membership_index
 
 
 def get_requester_user_id(body: Mapping[str, Any]) -> str:
@@ -41,13 +42,17 @@ def is_authorized_slack_user(user_id: str) -> bool:
     Check whether the given Slack user ID is allowed to generate promos.
 
     Behavior:
-    - If PROMO_AUTHORIZED_USER_IDS is empty/unset: allow everyone (backwards compatible)
-    - Otherwise: allow only users in the allow-list
+    - If no user IDs, user groups or channels are configured: allow everyone (backwards compatible)
+    - Otherwise: allow users in the allow-list or in the cached group/channel membership index
+
+    Never calls Slack: group/channel membership comes from the index that
+    is refreshed in the background (see src/utils/membership.py).
     """
-    allowed = PROMO_AUTHORIZED_USER_IDS
-    if not allowed:
+    allowed = current_settings().authorized_user_ids
+    index = get_membership_index()
+    if not allowed and not index.enabled:
         return True
-    return user_id in allowed
+    return user_id in allowed or index.contains(user_id)
 
 
 def unauthorized_text(user_id: str) -> str:
@@ -0,0 +1,45 @@
+"""Tiny JSON checkpoint files for resumable bulk jobs."""
+import json
+import os
+
+
+class Checkpoint:
+    """
+    A JSON document persisted atomically (write to temp file, then rename).
+
+    A crash mid-write leaves the previous checkpoint intact, so a job can
+    always resume from its last completed step.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> dict:
+        """Return the saved state, or an empty dict if there is none."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f) or {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"[checkpoint] ignoring unreadable checkpoint {self.path}: {e}")
+            return {}
+
+    def save(self, state: dict) -> None:
+        """Atomically replace the saved state."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        """Delete the checkpoint (e.g., after a job completes)."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
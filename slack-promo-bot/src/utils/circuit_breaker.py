@@ -0,0 +1,160 @@
+"""Circuit breaker: fail fast while a dependency keeps failing."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+from src.utils import metrics
+
+
+CLOSED = "closed"        # calls go through; outcomes are counted
+OPEN = "open"            # calls fail fast until the cooldown is over
+HALF_OPEN = "half_open"  # one probe call is let through to test recovery
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the dependency while its breaker is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} is unavailable (circuit open, next check in {retry_in:.0f}s)")
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Sliding-window circuit breaker, safe to share between threads.
+
+    While closed, the outcome of each call is remembered for the last
+    ``window`` calls. Once at least ``min_calls`` are known and
+    ``failure_rate`` of them failed, the breaker opens: allow() refuses
+    every call for ``cooldown`` seconds. Then it is half-open and lets one
+    probe call through. A successful probe closes it again. A failed probe
+    reopens it with twice the cooldown, up to ``max_cooldown``.
+
+    Args:
+        name: Dependency name, for messages and metrics
+        window: Number of recent calls the failure rate is computed over
+        min_calls: Calls needed in the window before the rate is trusted
+        failure_rate: Share of failed calls (0-1) that opens the breaker
+        cooldown: Seconds open before the first probe
+        max_cooldown: Upper bound for the doubled cooldown
+        clock: Monotonic time source (tests)
+    """
+
+    def __init__(self, name: str, window: int = 20, min_calls: int = 8, failure_rate: float = 0.5,
+                 cooldown: float = 15.0, max_cooldown: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.min_calls = max(1, int(min_calls))
+        self.failure_rate = float(failure_rate)
+        self.base_cooldown = float(cooldown)
+        self.max_cooldown = max(float(max_cooldown), self.base_cooldown)
+        self._clock = clock
+        self._outcomes: deque[bool] = deque(maxlen=max(self.min_calls, int(window)))  # True = failed
+        self._state = CLOSED
+        self._cooldown = self.base_cooldown
+        self._opened_at = 0.0
+        self._probing = False
+        self._cond = threading.Condition()
+
+    # --- state ---
+
+    @property
+    def state(self) -> str:
+        """CLOSED, OPEN or HALF_OPEN (OPEN reads as HALF_OPEN once the cooldown is over)."""
+        with self._cond:
+            if self._state == OPEN and self._clock() - self._opened_at >= self._cooldown:
+                return HALF_OPEN
+            return self._state
+
+    @property
+    def closed(self) -> bool:
+        return self.state == CLOSED
+
+    def retry_in(self) -> float:
+        """Seconds until the next probe is allowed (0 if calls are allowed now)."""
+        with self._cond:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self._cooldown - (self._clock() - self._opened_at))
+
+    # --- call protocol ---
+
+    def allow(self) -> bool:
+        """
+        May a call go out now? In the half-open state only one caller gets True
+        (the probe) until its outcome is recorded.
+        """
+        with self._cond:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self._cooldown:
+                    metrics.counter(f"breaker.{self.name}.rejected").inc()
+                    return False
+                self._state = HALF_OPEN
+                self._probing = False
+            if self._probing:
+                metrics.counter(f"breaker.{self.name}.rejected").inc()
+                return False
+            self._probing = True
+            return True
+
+    def check(self) -> None:
+        """
+        Raise unless a call may go out now (see allow()).
+
+        Raises:
+            CircuitOpenError: While the breaker is open
+        """
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_in())
+
+    def record_success(self) -> None:
+        with self._cond:
+            if self._state == CLOSED:
+                self._outcomes.append(False)
+                return
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._outcomes.clear()
+                self._cooldown = self.base_cooldown
+                self._probing = False
+                self._cond.notify_all()
+                metrics.counter(f"breaker.{self.name}.closed").inc()
+                print(f"[breaker] {self.name} recovered; circuit closed")
+            # OPEN: a call from before the breaker opened; the probe decides
+
+    def record_failure(self) -> None:
+        with self._cond:
+            if self._state == CLOSED:
+                self._outcomes.append(True)
+                failed = sum(self._outcomes)
+                if len(self._outcomes) >= self.min_calls and failed >= self.failure_rate * len(self._outcomes):
+                    self._open(f"{failed} of the last {len(self._outcomes)} calls failed")
+            elif self._state == HALF_OPEN:
+                self._cooldown = min(self._cooldown * 2, self.max_cooldown)
+                self._open("probe failed")
+
+    def _open(self, reason: str) -> None:
+        """Call with the lock held."""
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._probing = False
+        metrics.counter(f"breaker.{self.name}.opened").inc()
+        print(f"[breaker] {self.name} circuit open ({reason}); next probe in {self._cooldown:.0f}s")
+
+    def wait_closed(self, timeout: float = None) -> bool:
+        """Block until the breaker closes (or ``timeout``); returns True if it is closed."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._state == CLOSED, timeout)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "state": self._state, "calls": len(self._outcomes), "failed": sum(self._outcomes),
+                "cooldown": self._cooldown,
+            }
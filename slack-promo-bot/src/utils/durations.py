@@ -0,0 +1,103 @@
+"""Promo duration helpers ("LIFETIME", "nD", "nM", "nY")."""
+import calendar
+import re
+from datetime import datetime, timedelta, timezone
+
+
+LIFETIME = "LIFETIME"
+DURATION_RX = re.compile(r"^(\d+)([DMY])$")
+
+# Used only when mixing day-based and month/year-based durations
+_DAYS_PER_UNIT = {"D": 1, "M": 30, "Y": 365}
+
+
+def iso_utc(dt: datetime = None) -> str:
+    """
+    Format ``dt`` (default: now) the way Parse stores dates: UTC, milliseconds, "Z".
+
+    Always includes the milliseconds, even when they are zero.
+    """
+    dt = (dt or datetime.now(timezone.utc)).astimezone(timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+
+def parse_duration(value: str):
+    """
+    Parse a promo duration string.
+
+    Returns:
+        None for LIFETIME, otherwise an (amount, unit) tuple
+
+    Raises:
+        ValueError: If the value is not a recognised duration
+    """
+    v = (value or "").strip().upper()
+    if v == LIFETIME:
+        return None
+    m = DURATION_RX.match(v)
+    if not m or int(m.group(1)) <= 0:
+        raise ValueError(f"Invalid duration: {value!r} (use LIFETIME, nD, nM or nY)")
+    return int(m.group(1)), m.group(2)
+
+
+def add_durations(current: str, extension: str) -> str:
+    """
+    Extend a duration by another one (e.g., "30D" + "15D" -> "45D").
+
+    Same units are summed; months and years are combined as months;
+    anything mixed with days is converted to days. LIFETIME absorbs everything.
+    """
+    cur = parse_duration(current)
+    ext = parse_duration(extension)
+    if cur is None or ext is None:
+        return LIFETIME
+
+    (n1, u1), (n2, u2) = cur, ext
+    if u1 == u2:
+        return f"{n1 + n2}{u1}"
+    if {u1, u2} == {"M", "Y"}:
+        months = sum(n * (12 if u == "Y" else 1) for n, u in (cur, ext))
+        return f"{months}M"
+    days = n1 * _DAYS_PER_UNIT[u1] + n2 * _DAYS_PER_UNIT[u2]
+    return f"{days}D"
+
+
+def _add_months(dt: datetime, months: int) -> datetime:
+    month0 = dt.month - 1 + months
+    year = dt.year + month0 // 12
+    month = month0 % 12 + 1
+    day = min(dt.day, calendar.monthrange(year, month)[1])
+    return dt.replace(year=year, month=month, day=day)
+
+
+def shift_date(dt: datetime, extension: str) -> datetime:
+    """Move a datetime forward by a (non-LIFETIME) duration."""
+    parsed = parse_duration(extension)
+    if parsed is None:
+        raise ValueError("Cannot shift a date by LIFETIME")
+    n, unit = parsed
+    if unit == "D":
+        return dt + timedelta(days=n)
+    return _add_months(dt, n * (12 if unit == "Y" else 1))
+
+
+def extend_end_date(end_date, extension: str):
+    """
+    Extend a stored ``promoCodeEndDate`` by ``extension``, keeping its shape.
+
+    The field may be a Parse Date object ({"__type": "Date", "iso": ...}) or a
+    plain ISO string (as written by the legacy scripts). Returns None when
+    there is no end date or the extension is LIFETIME (the caller should then
+    leave or clear the field).
+    """
+    if not end_date or parse_duration(extension) is None:
+        return None
+
+    is_parse_date = isinstance(end_date, dict)
+    iso = end_date.get("iso") if is_parse_date else str(end_date)
+    dt = datetime.fromisoformat(iso.replace("Z", "+00:00"))
+    new_dt = shift_date(dt, extension)
+
+    if is_parse_date:
+        return {"__type": "Date", "iso": iso_utc(new_dt)}
+    return new_dt.isoformat()
@@ -0,0 +1,110 @@
+"""Incremental decoding of large JSON responses."""
+
+from __future__ import annotations
+
+import codecs
+import json
+from typing import Iterable, Iterator
+
+_WHITESPACE = " \t\n\r"
+
+
+def iter_array(chunks: Iterable[bytes], key: str, rest: dict = None) -> Iterator:
+    """
+    Yield the items of the ``key`` array in a JSON object as its bytes arrive.
+
+    Only the item being decoded is held in memory, never the whole body or
+    the whole array; e.g. Parse's ``{"results": [...]}`` pages are yielded
+    object by object. The rest of the body is read to the end so the
+    connection can be reused.
+
+    Args:
+        chunks: The UTF-8 body in pieces of any size (e.g. Response.iter_content())
+        key: Top-level member holding the array
+        rest: Optional dict that receives the other top-level members (e.g. "count")
+
+    Yields:
+        Decoded array items, in order
+
+    Raises:
+        json.JSONDecodeError: If the body is not a JSON object or is cut short
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buf, pos, eof = "", 0, False
+
+    def more() -> bool:
+        """Append the next chunk to the buffer (dropping what was consumed); False at the end."""
+        nonlocal buf, pos, eof
+        while not eof:
+            chunk = next(chunks, None)
+            if chunk is None:
+                eof = True
+                piece = text.decode(b"", final=True)
+            else:
+                piece = text.decode(chunk)
+            if piece:
+                buf, pos = buf[pos:] + piece, 0
+                return True
+        return False
+
+    def peek() -> str:
+        """The next non-whitespace character ("" at the end of the body)."""
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not more():
+                return ""
+
+    def expect(chars: str) -> str:
+        nonlocal pos
+        c = peek()
+        if not c or c not in chars:
+            raise json.JSONDecodeError(f"Expected one of {chars!r}", buf, pos)
+        pos += 1
+        return c
+
+    def value():
+        nonlocal pos
+        peek()
+        while True:
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(buf) or eof:
+                    pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            if not more():
+                raise json.JSONDecodeError("Unexpected end of data", buf, pos)
+
+    expect("{")
+    if peek() == "}":
+        pos += 1
+    else:
+        while True:
+            name = value()
+            expect(":")
+            if name == key:
+                expect("[")
+                if peek() == "]":
+                    pos += 1
+                else:
+                    while True:
+                        yield value()
+                        if expect(",]") == "]":
+                            break
+            else:
+                member = value()
+                if rest is not None:
+                    rest[name] = member
+            if expect(",}") == "}":
+                break
+    for _ in chunks:  # drain, so the connection goes back to the pool
+        pass
@@ -0,0 +1,48 @@
+"""
+Leader election between the worker processes on one host.
+
+Periodic tasks (capacity alerts, the notify digest, the mirror sync) run
+in every gunicorn worker but must run once per host. The process that
+holds an exclusive lock on PROMO_LEADER_LOCK_PATH is the leader; it keeps
+the lock until it exits, and the OS releases it even if the process
+crashes, so another worker takes over at its next check.
+"""
+import os
+import threading
+
+from src.config import PROMO_LEADER_LOCK_PATH
+
+
+_fd = None
+_lock = threading.Lock()
+
+
+def is_leader(path: str = PROMO_LEADER_LOCK_PATH) -> bool:
+    """
+    True if this process is (or has just become) the leader.
+
+    Cheap enough to call before every periodic post: once the lock is held
+    it is not checked again.
+    """
+    global _fd
+    with _lock:
+        if _fd is not None:
+            return True
+        try:
+            import fcntl  # not available on Windows, where a single process is assumed
+        except ImportError:
+            return True
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        _fd = fd
+        print(f"[leader] process {os.getpid()} runs the periodic tasks")
+        return True
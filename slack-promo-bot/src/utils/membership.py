@@ -0,0 +1,166 @@
+"""Cached index of Slack user group / channel members used for authorization."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Iterable
+
+from src.config import PROMO_AUTHZ_REFRESH_SECONDS, PROMO_AUTHZ_TTL_SECONDS
+from src.live_config import current as current_settings
+
+
+class MembershipIndex:
+    """
+    Members of a fixed set of Slack user groups and channels.
+
+    The index is a frozenset that is rebuilt off the hot path and swapped in
+    with a single assignment, so ``contains()`` is a lock-free set lookup
+    that never calls Slack. Each source is refreshed independently: if one
+    group or channel fails to load, its previous members are kept until
+    they are ``ttl`` seconds old, then left out of the index. Members of
+    the other sources stay authorized.
+    """
+
+    def __init__(self, usergroup_ids: Iterable[str] = (), channel_ids: Iterable[str] = (),
+                 ttl: float = PROMO_AUTHZ_TTL_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.usergroup_ids = tuple(sorted(usergroup_ids))
+        self.channel_ids = tuple(sorted(channel_ids))
+        self.ttl = float(ttl)
+        self._clock = clock
+        self._by_source: dict = {}  # source ID -> (members, loaded_at)
+        self._members: frozenset = frozenset()
+        self._expires_at = None  # when the first source in _members goes stale
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.usergroup_ids or self.channel_ids)
+
+    def contains(self, user_id: str) -> bool:
+        """True if ``user_id`` is in a configured group/channel that loaded within the TTL."""
+        expires_at = self._expires_at
+        if expires_at is not None and self._clock() > expires_at:
+            self._rebuild()  # a source went stale since the last refresh
+        return user_id in self._members
+
+    def age(self):
+        """Seconds since the least recently loaded source loaded, or None before any has."""
+        loaded = [at for _, at in self._by_source.values()]
+        return self._clock() - min(loaded) if loaded else None
+
+    def stale_sources(self) -> list:
+        """Configured sources left out of the index: never loaded, or not loaded within the TTL."""
+        now = self._clock()
+        by_source = self._by_source
+        return [s for s in self.usergroup_ids + self.channel_ids
+                if s not in by_source or now - by_source[s][1] > self.ttl]
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def configure(self, usergroup_ids: Iterable[str], channel_ids: Iterable[str]) -> None:
+        """Change the configured sources; the background thread refreshes right away."""
+        self.usergroup_ids = tuple(sorted(usergroup_ids))
+        self.channel_ids = tuple(sorted(channel_ids))
+        with self._refresh_lock:
+            wanted = set(self.usergroup_ids) | set(self.channel_ids)
+            self._by_source = {k: v for k, v in self._by_source.items() if k in wanted}
+            self._rebuild()
+        self._wake.set()
+
+    def refresh(self, client) -> int:
+        """
+        Re-read every configured source from Slack and swap in the new index.
+
+        Args:
+            client: slack_sdk WebClient
+
+        Returns:
+            Number of distinct members in the new index
+        """
+        with self._refresh_lock:
+            by_source = dict(self._by_source)
+            for group_id in self.usergroup_ids:
+                try:
+                    resp = client.usergroups_users_list(usergroup=group_id)
+                    by_source[group_id] = (frozenset(resp.get("users") or []), self._clock())
+                except Exception as e:
+                    print(f"[authz] could not load user group {group_id}: {e}")
+            for channel_id in self.channel_ids:
+                try:
+                    by_source[channel_id] = (frozenset(_channel_members(client, channel_id)), self._clock())
+                except Exception as e:
+                    print(f"[authz] could not load channel {channel_id}: {e}")
+
+            self._by_source = by_source
+            self._rebuild()
+            stale = self.stale_sources()
+            if stale:
+                print(f"[authz] members of {', '.join(stale)} are not authorized until they load again")
+            return len(self._members)
+
+    def _rebuild(self) -> None:
+        """Swap in the members of the sources that are still fresh."""
+        now = self._clock()
+        fresh = [(members, at) for members, at in self._by_source.values() if now - at <= self.ttl]
+        self._members = frozenset().union(*(members for members, _ in fresh))
+        self._expires_at = min(at for _, at in fresh) + self.ttl if fresh else None
+
+    def start_background_refresh(self, client, interval: float = PROMO_AUTHZ_REFRESH_SECONDS) -> None:
+        """
+        Refresh now and then every ``interval`` seconds from a daemon thread.
+
+        The thread also runs while no sources are configured, so sources
+        added later by configure() are picked up without a restart.
+        """
+        if self._thread and self._thread.is_alive():
+            return
+
+        def loop():
+            while not self._stop.is_set():
+                self._wake.clear()
+                if self.enabled:
+                    started = time.monotonic()
+                    try:
+                        n = self.refresh(client)
+                        print(f"[authz] membership index: {n} users in {time.monotonic() - started:.1f}s")
+                    except Exception as e:
+                        print(f"[authz] membership refresh failed: {e}")
+                self._wake.wait(interval)
+
+        self._thread = threading.Thread(target=loop, name="promo-authz-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+
+def _channel_members(client, channel_id: str) -> list:
+    """All member IDs of a channel, following pagination."""
+    members, cursor = [], None
+    while True:
+        resp = client.conversations_members(channel=channel_id, limit=1000, cursor=cursor)
+        members.extend(resp.get("members") or [])
+        cursor = (resp.get("response_metadata") or {}).get("next_cursor")
+        if not cursor:
+            return members
+
+
+_index = MembershipIndex(current_settings().authorized_usergroup_ids, current_settings().authorized_channel_ids)
+
+
+def get_membership_index() -> MembershipIndex:
+    """Return the process-wide membership index."""
+    return _index
+
+
+def apply_settings(old, new) -> None:
+    """live_config change listener: follow changes to the authorized groups/channels."""
+    if (old.authorized_usergroup_ids, old.authorized_channel_ids) != \
+            (new.authorized_usergroup_ids, new.authorized_channel_ids):
+        _index.configure(new.authorized_usergroup_ids, new.authorized_channel_ids)
@@ -0,0 +1,151 @@
+"""In-process metrics: counters and bucketed histograms."""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import threading
+import time
+
+
+# Millisecond buckets sized around Slack's 3-second acknowledgement limit
+ACK_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2000, 3000)
+
+
+class Histogram:
+    """Cumulative bucketed histogram with count/sum/max."""
+
+    def __init__(self, buckets=ACK_BUCKETS_MS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (0 < q <= 100)."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q / 100.0 * self.count
+            seen = 0
+            for i, n in enumerate(self.counts):
+                seen += n
+                if seen >= rank:
+                    return float(self.buckets[i]) if i < len(self.buckets) else self.max
+            return self.max
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            buckets = {str(b): c for b, c in zip(self.buckets, self.counts)}
+            buckets["+Inf"] = self.counts[-1]
+            count, total, peak = self.count, self.total, self.max
+        return {
+            "count": count,
+            "mean": total / count if count else 0.0,
+            "max": peak,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "buckets": buckets,
+        }
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, n: int = 1) -> None:
+        with self._lock:
+            self.value += n
+
+
+_registry: dict = {}
+_registry_lock = threading.Lock()
+
+
+def histogram(name: str, buckets=ACK_BUCKETS_MS) -> Histogram:
+    """Get or create the histogram called ``name``."""
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = Histogram(buckets)
+        return metric
+
+
+def counter(name: str) -> Counter:
+    """Get or create the counter called ``name``."""
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = Counter()
+        return metric
+
+
+def snapshot() -> dict:
+    """All metrics as plain data (for /metrics and logs)."""
+    with _registry_lock:
+        items = list(_registry.items())
+    return {
+        name: metric.snapshot() if isinstance(metric, Histogram) else metric.value
+        for name, metric in sorted(items)
+    }
+
+
+def format_summary() -> str:
+    """One line per metric, e.g. "ack_ms.promo_gui_submit: n=12 p50≤5 p99≤25 max=17.3"."""
+    lines = []
+    for name, value in snapshot().items():
+        if isinstance(value, dict):
+            lines.append(f"{name}: n={value['count']} p50≤{value['p50']:g} p99≤{value['p99']:g} max={value['max']:.1f}")
+        else:
+            lines.append(f"{name}: {value}")
+    return "\n".join(lines)
+
+
+def measure_ack(listener: str, warn_ms: float = 1000.0):
+    """
+    Decorator for Bolt listeners: records time from listener entry to ack()
+    in the ``ack_ms.<listener>`` histogram and warns on slow acks.
+
+    Uses functools.wraps so Bolt still sees the original argument names.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            ack = kwargs.get("ack")
+            if ack is not None:
+                def timed_ack(*a, **k):
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    histogram(f"ack_ms.{listener}").observe(elapsed_ms)
+                    if elapsed_ms >= warn_ms:
+                        print(f"[metrics] slow ack for {listener}: {elapsed_ms:.0f}ms")
+                    return ack(*a, **k)
+                kwargs["ack"] = timed_ack
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_periodic_log(interval: float) -> None:
+    """Print format_summary() every ``interval`` seconds from a daemon thread."""
+    if interval <= 0:
+        return
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            text = format_summary()
+            if text:
+                print(f"[metrics]\n{text}")
+
+    threading.Thread(target=loop, name="promo-metrics-log", daemon=True).start()
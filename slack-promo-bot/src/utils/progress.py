@@ -0,0 +1,31 @@
+"""Throughput accounting for long-running jobs."""
+import time
+
+
+class Throughput:
+    """Counts named events and reports rates since the meter was created."""
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self.started = clock()
+        self.counts = {}
+
+    def add(self, name: str, n: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def get(self, name: str) -> int:
+        return self.counts.get(name, 0)
+
+    @property
+    def elapsed(self) -> float:
+        return max(self._clock() - self.started, 1e-9)
+
+    def rate(self, name: str) -> float:
+        """Events per second for ``name``."""
+        return self.get(name) / self.elapsed
+
+    def summary(self, *names: str) -> str:
+        """One-line summary, e.g. "rows: 1200 (400.0/s) · 3.0s"."""
+        parts = [f"{n}: {self.get(n)} ({self.rate(n):.1f}/s)" for n in (names or self.counts)]
+        parts.append(f"{self.elapsed:.1f}s")
+        return " · ".join(parts)
@@ -0,0 +1,47 @@
+"""Token-bucket rate limiting for outbound API calls."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable
+
+
+class RateLimiter:
+    """
+    Token bucket allowing ``rate`` calls per second on average and bursts of ``burst``.
+
+    acquire() blocks until a token is available. A rate of 0 (or less)
+    disables limiting. Safe to share between threads.
+    """
+
+    def __init__(self, rate: float, burst: int = 0, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = float(rate)
+        self.burst = float(burst or max(1, round(self.rate)))
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+        self.waited = 0.0  # total seconds callers spent blocked (for metrics)
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def acquire(self) -> float:
+        """Take one token, waiting if necessary; returns the seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token now, even if it is not there yet; callers queue up in order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.waited += wait
+        if wait:
+            self._sleep(wait)
+        return wait
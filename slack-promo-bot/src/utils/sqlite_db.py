@@ -0,0 +1,22 @@
+"""Shared setup for the bot's local SQLite files."""
+import os
+
+
+def connect(path: str):
+    """
+    Open ``path`` for use from several threads and processes (gunicorn workers).
+
+    Creates the parent directory, switches to WAL so readers never block the
+    writer, and waits up to 10 seconds for another process's write lock
+    instead of failing with "database is locked". Statements autocommit;
+    use ``BEGIN IMMEDIATE`` for multi-statement transactions.
+    """
+    import sqlite3  # only needed when a SQLite-backed feature is enabled
+
+    directory = os.path.dirname(path)
+    if directory and path != ":memory:":
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -0,0 +1,57 @@
+"""Startup timeline: named checkpoints measured from process start."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+
+# Set when this module is first imported; app.py imports it before anything heavy
+_T0 = time.perf_counter()
+_marks: list = []
+_lock = threading.Lock()
+
+
+def mark(step: str) -> float:
+    """
+    Record that ``step`` finished now.
+
+    Returns:
+        Milliseconds since startup
+    """
+    elapsed_ms = (time.perf_counter() - _T0) * 1000
+    with _lock:
+        _marks.append((step, elapsed_ms))
+    return elapsed_ms
+
+
+def mark_once(step: str):
+    """Like mark(), but only the first call for ``step`` is recorded (returns None afterwards)."""
+    with _lock:
+        # Check and record under one lock, so concurrent first calls record ``step`` once
+        if any(name == step for name, _ in _marks):
+            return None
+        elapsed_ms = (time.perf_counter() - _T0) * 1000
+        _marks.append((step, elapsed_ms))
+    print(f"[startup] {step} at {elapsed_ms:.0f}ms")
+    return elapsed_ms
+
+
+def timeline() -> list:
+    """All (step, ms_since_start) marks in the order they were recorded."""
+    with _lock:
+        return list(_marks)
+
+
+def format_timeline() -> str:
+    """e.g. "imports 180ms → app_init 420ms (+240) → ready 431ms (+11)"."""
+    parts, previous = [], None
+    for step, ms in timeline():
+        delta = f" (+{ms - previous:.0f})" if previous is not None else ""
+        parts.append(f"{step} {ms:.0f}ms{delta}")
+        previous = ms
+    return " → ".join(parts)
+
+
+def log_timeline() -> None:
+    print(f"[startup] {format_timeline()}")
@@ -15,6 +15,18 @@ def _norm_id(s: str) -> str:
     return re.sub(r"[^\d+]", "", s)  # keep only + and digits
 
 
+def normalize_user_id(s: str) -> str:
+    """Normalize a user ID the same way form input is normalized."""
+    return _norm_id(s or "")
+
+
+def promo_code_prefix(code: str) -> str:
+    """Return the prefix of a promo code, e.g. "AVZ-2DA-" for "AVZ-2DA-7K2Q"."""
+    code = (code or "").strip().upper()
+    cut = code.rfind("-")
+    return code[:cut + 1] if cut >= 0 else ""
+
+
 def parse_user_ids(raw: str):
     """
     Parse comma-separated user IDs from raw input.
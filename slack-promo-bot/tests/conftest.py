@@ -0,0 +1,11 @@
+"""
+Test setup: the settings src/config.py requires at import, with local state
+kept in a throwaway directory. Tests never talk to Slack or Parse.
+"""
+import os
+import tempfile
+
+os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-test")
+os.environ.setdefault("PARSE_APP_ID", "test")
+os.environ.setdefault("PARSE_API_ROOT", "http://127.0.0.1:9/parse")
+os.environ["PROMO_DATA_DIR"] = tempfile.mkdtemp(prefix="promo-tests-")
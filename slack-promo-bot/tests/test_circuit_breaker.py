@@ -0,0 +1,75 @@
+import pytest
+
+from src.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("test", window=10, min_calls=4, failure_rate=0.5, cooldown=10, max_cooldown=40,
+                          clock=clock)
+
+
+def _trip(breaker):
+    for _ in range(4):
+        breaker.record_failure()
+
+
+def test_stays_closed_below_min_calls_and_failure_rate(breaker):
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CLOSED  # 3 calls < min_calls
+    for _ in range(4):
+        breaker.record_success()
+    assert breaker.state == CLOSED  # 3 of 7 failed < 50%
+
+
+def test_opens_and_fails_fast(breaker):
+    _trip(breaker)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    with pytest.raises(CircuitOpenError) as e:
+        breaker.check()
+    assert e.value.retry_in == pytest.approx(10)
+
+
+def test_half_open_lets_one_probe_through_and_closes_on_success(breaker, clock):
+    _trip(breaker)
+    clock.now += 10
+    assert breaker.state == HALF_OPEN and breaker.retry_in() == 0
+    assert breaker.allow()       # the probe
+    assert not breaker.allow()   # everyone else waits for its outcome
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.stats()["calls"] == 0 and breaker.stats()["cooldown"] == 10
+
+
+def test_failed_probe_reopens_with_doubled_cooldown(breaker, clock):
+    _trip(breaker)
+    for cooldown in (20, 40, 40):  # doubles up to max_cooldown
+        clock.now += breaker.stats()["cooldown"]
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == OPEN and breaker.retry_in() == pytest.approx(cooldown)
+    clock.now += 40
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.stats()["cooldown"] == 10
+
+
+def test_success_from_before_opening_does_not_close(breaker):
+    _trip(breaker)
+    breaker.record_success()  # a slow call that started while closed
+    assert breaker.state == OPEN
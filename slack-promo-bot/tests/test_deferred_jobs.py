@@ -0,0 +1,36 @@
+from src.core.deferred import DeferredJobs
+from src.core.jobs import GenerationJob, DEFERRED
+
+
+def _parked_job() -> GenerationJob:
+    job = GenerationJob("U1", ["a", "b"], "T-", "30D", "P")
+    assert job.defer() and job.status == DEFERRED
+    return job
+
+
+def test_orphaned_job_is_adopted_by_exactly_one_worker(tmp_path):
+    path = str(tmp_path / "deferred.sqlite3")
+    crashed, first, second = (DeferredJobs(path, stale_after=60) for _ in range(3))
+    job = _parked_job()
+    crashed.park(job, notify="C1")
+
+    restored = []
+
+    def restore(state, extra):
+        restored.append((state["job_id"], extra))
+        return GenerationJob.restore(state)
+
+    assert first.adopt(restore) == 0  # the owner's heartbeat is fresh
+    crashed._conn.execute("UPDATE deferred SET heartbeat = heartbeat - 120")  # owner stopped heartbeating
+    assert first.adopt(restore) == 1
+    assert second.adopt(restore) == 0
+    assert restored == [(job.job_id, {"notify": "C1"})]
+    assert [j.job_id for j in first.jobs()] == [job.job_id]
+
+
+def test_released_jobs_are_adopted_at_once(tmp_path):
+    path = str(tmp_path / "deferred.sqlite3")
+    leaving, staying = DeferredJobs(path), DeferredJobs(path)
+    leaving.park(_parked_job())
+    leaving.release()
+    assert staying.adopt(lambda state, extra: GenerationJob.restore(state)) == 1
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.utils.durations import add_durations, extend_end_date, iso_utc, parse_duration, shift_date
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("30D", (30, "D")),
+    (" 6m ", (6, "M")),
+    ("1Y", (1, "Y")),
+    ("lifetime", None),
+])
+def test_parse_duration(value, expected):
+    assert parse_duration(value) == expected
+
+
+@pytest.mark.parametrize("value", ["", "0D", "30", "D30", "1W", "-1D", "1.5M"])
+def test_parse_duration_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        parse_duration(value)
+
+
+@pytest.mark.parametrize("current, extension, expected", [
+    ("30D", "15D", "45D"),
+    ("6M", "1Y", "18M"),
+    ("1M", "10D", "40D"),
+    ("LIFETIME", "30D", "LIFETIME"),
+    ("30D", "LIFETIME", "LIFETIME"),
+])
+def test_add_durations(current, extension, expected):
+    assert add_durations(current, extension) == expected
+
+
+def test_shift_date_clamps_to_month_end():
+    assert shift_date(datetime(2025, 1, 31), "1M") == datetime(2025, 2, 28)
+    assert shift_date(datetime(2024, 2, 29), "1Y") == datetime(2025, 2, 28)
+    with pytest.raises(ValueError):
+        shift_date(datetime(2025, 1, 1), "LIFETIME")
+
+
+def test_extend_end_date_keeps_shape():
+    parse_date = {"__type": "Date", "iso": "2025-01-31T12:00:00.000Z"}
+    assert extend_end_date(parse_date, "1M") == {"__type": "Date", "iso": "2025-02-28T12:00:00.000Z"}
+    assert extend_end_date("2025-01-01T00:00:00+00:00", "30D") == \
+        datetime(2025, 1, 31, tzinfo=timezone.utc).isoformat()
+    assert extend_end_date(None, "30D") is None
+    assert extend_end_date(parse_date, "LIFETIME") is None
+
+
+def test_iso_utc_always_has_milliseconds():
+    assert iso_utc(datetime(2025, 1, 1, tzinfo=timezone.utc)) == "2025-01-01T00:00:00.000Z"
+    assert iso_utc(datetime(2025, 1, 1, 2, 30, 0, 123999, tzinfo=timezone(timedelta(hours=2)))) == \
+        "2025-01-01T00:30:00.123Z"
@@ -0,0 +1,85 @@
+from collections import Counter
+
+import pytest
+
+from src.core import jobs as jobs_module
+from src.core.jobs import GenerationJob, QUEUED, RUNNING, PAUSED, DONE, CANCELLED
+from src.core.job_registry import JobRegistry
+
+
+@pytest.fixture
+def minted(monkeypatch):
+    calls = Counter()
+
+    def fake_mint(uid, prefix, duration, partner):
+        calls[uid] += 1
+        return f"{prefix}{uid}"
+
+    monkeypatch.setattr(jobs_module, "create_promo_for_user", fake_mint)
+    return calls
+
+
+def _job(codes: int = 5) -> GenerationJob:
+    return GenerationJob("U1", [f"u{i}" for i in range(codes)], "T-", "30D", "P")
+
+
+def _work(job, index):
+    return job.record(index, job.run(index))
+
+
+def test_pause_stops_claims_and_resume_continues_without_redoing_rows(minted):
+    job = _job(5)
+    first, second = job.claim(), job.claim()
+    assert job.pause() and job.status == PAUSED
+    assert job.claim() is None and not job.claimable()
+    # Rows already claimed finish normally while paused
+    assert not _work(job, first) and not _work(job, second)
+    assert job.completed == 2
+
+    assert job.resume() and job.status == RUNNING
+    while (index := job.claim()) is not None:
+        finished = _work(job, index)
+    assert finished and job.status == DONE
+    assert [r.user_id for r in job.rows] == job.ids
+    assert set(minted.values()) == {1}
+
+
+def test_pause_and_resume_before_start_keep_the_job_queued():
+    job = _job(3)
+    assert job.pause() and not job.pause()
+    assert job.resume() and job.status == QUEUED
+    assert not job.resume()
+
+
+def test_cancel_lets_rows_in_flight_finish(minted):
+    job = _job(5)
+    index = job.claim()
+    assert job.cancel() is False  # a row is in flight; its record() finishes the job
+    assert job.claim() is None
+    assert _work(job, index) is True
+    assert job.status == CANCELLED
+    assert job.unprocessed_ids() == job.ids[1:]
+    assert sum(minted.values()) == 1
+    assert not job.cancel() and not job.resume()
+
+
+def test_cancel_with_nothing_in_flight_finishes_now():
+    job = _job(2)
+    assert job.cancel() is True and job.status == CANCELLED
+
+
+def test_controls_reach_the_worker_running_the_job(tmp_path, minted):
+    path = str(tmp_path / "jobs.sqlite3")
+    owner, other = JobRegistry(path), JobRegistry(path)
+    job = _job(3)
+    assert owner.sync([job]) == []
+
+    row = other.find(job.job_id)
+    assert row["requester"] == "U1" and row["status"] == QUEUED
+    assert other.request(job.job_id, "pause")
+    assert owner.sync([job]) == [(job, "pause")]
+    assert owner.sync([job]) == []  # taken once
+
+    owner.sync([])  # the job finished
+    assert other.find(job.job_id) is None
+    assert not other.request(job.job_id, "cancel")
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from src.utils.json_stream import iter_array
+
+
+BODY = {
+    "results": [
+        {"objectId": "a1", "promoCodeId": "AVZ-ÄÖ12", "n": 12345, "f": -1.5e3, "ok": True, "x": None},
+        {"objectId": "b2", "nested": {"list": [1, [2, {"s": "]},\"["}]]}, "emoji": "🎉"},
+        7,
+        "plain",
+    ],
+    "count": 9876543210,
+}
+
+
+def _chunks(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 10 ** 6])
+def test_items_survive_any_chunk_boundary(size):
+    data = json.dumps(BODY, ensure_ascii=False, indent=1).encode()
+    rest = {}
+    assert list(iter_array(_chunks(data, size), "results", rest)) == BODY["results"]
+    assert rest == {"count": BODY["count"]}
+
+
+def test_number_split_across_chunks_is_not_cut_short():
+    assert list(iter_array([b'{"results": [12', b"34", b"5]}"], "results")) == [12345]
+    assert list(iter_array([b'{"results": [1', b"]}"], "results")) == [1]
+
+
+def test_members_before_the_array_and_empty_arrays():
+    rest = {}
+    assert list(iter_array([b'{"count": 3, "results": []}'], "results", rest)) == []
+    assert rest == {"count": 3}
+    assert list(iter_array([b"{}"], "results")) == []
+
+
+def test_body_is_drained():
+    chunks = iter([b'{"results": [1]', b', "tail": "', b'x"}', b""])
+    assert list(iter_array(chunks, "results")) == [1]
+    assert next(chunks, None) is None
+
+
+@pytest.mark.parametrize("data", [b'{"results": [1, 2', b'[1, 2]', b'{"results": [1 2]}'])
+def test_malformed_bodies_raise(data):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_array(_chunks(data, 3), "results"))
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+from src.core import jobs as jobs_module
+from src.core.jobs import GenerationJob, DONE
+from src.core.scheduler import FairScheduler
+
+
+class FakeMint:
+    """Stands in for create_promo_for_user: records the order and concurrency of mints."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.order = []
+        self.inflight = {}
+        self.max_inflight = {}
+        self.max_total = 0
+        self.gate = threading.Event()
+        self.gate.set()
+        self._lock = threading.Lock()
+
+    def __call__(self, uid, prefix, duration, partner):
+        requester = uid.split("-")[0]
+        with self._lock:
+            self.order.append(uid)
+            self.inflight[requester] = self.inflight.get(requester, 0) + 1
+            self.max_inflight[requester] = max(self.max_inflight.get(requester, 0), self.inflight[requester])
+            self.max_total = max(self.max_total, sum(self.inflight.values()))
+        self.gate.wait(5)
+        time.sleep(self.delay)
+        with self._lock:
+            self.inflight[requester] -= 1
+        return f"{prefix}{uid}"
+
+
+@pytest.fixture
+def mint(monkeypatch):
+    fake = FakeMint()
+    monkeypatch.setattr(jobs_module, "create_promo_for_user", fake)
+    return fake
+
+
+@pytest.fixture
+def make_job():
+    done = {}
+
+    def make(requester: str, codes: int):
+        finished = threading.Event()
+        job = GenerationJob(requester, [f"{requester}-{i}" for i in range(codes)], "T-", "30D", "P",
+                            on_done=lambda j: finished.set())
+        done[job.job_id] = finished
+        return job
+
+    make.wait = lambda job: done[job.job_id].wait(10)
+    return make
+
+
+def _scheduler(**kwargs):
+    kwargs.setdefault("weights", {})
+    return FairScheduler(**kwargs)
+
+
+def test_small_job_overtakes_large_one(mint, make_job):
+    scheduler = _scheduler(budget=1, per_requester_cap=1, quantum=1)
+    mint.gate.clear()  # hold the first code of the large job until both are queued
+    large, small = make_job("A", 40), make_job("B", 3)
+    scheduler.submit(large)
+    scheduler.submit(small)
+    mint.gate.set()
+    try:
+        assert make_job.wait(small) and make_job.wait(large)
+    finally:
+        scheduler.stop()
+    assert large.status == small.status == DONE
+    # Requesters take turns code by code: B's batch finishes long before A's
+    assert mint.order.index("B-2") < 8
+    assert [uid for uid in mint.order if uid.startswith("B")] == ["B-0", "B-1", "B-2"]
+
+
+def test_per_requester_cap_and_budget(monkeypatch, make_job):
+    mint = FakeMint(delay=0.02)
+    monkeypatch.setattr(jobs_module, "create_promo_for_user", mint)
+    scheduler = _scheduler(budget=4, per_requester_cap=2, quantum=1)
+    a, b = make_job("A", 12), make_job("B", 12)
+    scheduler.submit(a)
+    scheduler.submit(b)
+    try:
+        assert make_job.wait(a) and make_job.wait(b)
+    finally:
+        scheduler.stop()
+    assert mint.max_inflight["A"] <= 2 and mint.max_inflight["B"] <= 2
+    assert mint.max_total <= 4
+    assert len(a.rows) == len(b.rows) == 12
+
+
+def test_position_follows_drr_order(mint, make_job):
+    scheduler = _scheduler(budget=1, per_requester_cap=1, quantum=1)
+    mint.gate.clear()  # the only worker stays busy with A's first code
+    running = make_job("A", 2)
+    scheduler.submit(running)
+    deadline = time.monotonic() + 5
+    while running.started_at is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    try:
+        queued_large = make_job("A", 500)
+        queued_small = make_job("B", 5)
+        scheduler.submit(queued_large)
+        scheduler.submit(queued_small)
+        assert scheduler.position(running) == 0
+        # Submitted later, but B's turn comes while A still works through its smaller job first
+        assert scheduler.position(queued_small) == 1
+        assert scheduler.position(queued_large) == 2
+        # A job not submitted yet is placed where submit() would put it
+        assert scheduler.position(make_job("C", 1)) == 2
+    finally:
+        mint.gate.set()
+        scheduler.stop()
@@ -0,0 +1,66 @@
+"""
+Promo Smith - WSGI entry point for HTTP (Events API) mode.
+
+Run with several workers, e.g.:
+    gunicorn --workers 4 --threads 8 --bind 0.0.0.0:$PORT wsgi:application
+(`python app.py` does this for you when PROMO_SERVE_MODE=http.) Keep
+PROMO_HTTP_WORKERS equal to --workers: the Parse budget is split by it.
+
+Routes:
+    POST /slack/events   Slack requests (signature-verified by Bolt)
+    GET  /healthz        Liveness: the worker process is up
+    GET  /readyz         Readiness: the Slack app is built and the worker accepts traffic
+    GET  /metrics        This worker's metrics (ack-latency histograms, ...) as JSON
+"""
+import json
+import os
+import signal
+
+from slack_bolt.adapter.wsgi import SlackRequestHandler
+
+from app import app, start_background_services
+from src.config import PROMO_SERVE_MODE
+from src.utils import metrics, startup
+
+
+slack_handler = SlackRequestHandler(app, path="/slack/events")
+_state = {"ready": False, "draining": False}
+
+
+def _json(start_response, status: str, payload: dict):
+    body = json.dumps(payload).encode()
+    start_response(status, [("Content-Type", "application/json"), ("Content-Length", str(len(body)))])
+    return [body]
+
+
+def _on_sigterm(signum, frame):
+    # Fail readiness first so the load balancer stops routing here, then let gunicorn shut down
+    _state["draining"] = True
+    if callable(_previous_sigterm):
+        _previous_sigterm(signum, frame)
+
+
+def application(environ, start_response):
+    """WSGI app: health endpoints plus Bolt's request handler."""
+    path = environ.get("PATH_INFO", "")
+    if path == "/healthz":
+        return _json(start_response, "200 OK", {"status": "ok", "pid": os.getpid()})
+    if path == "/readyz":
+        if _state["ready"] and not _state["draining"]:
+            return _json(start_response, "200 OK", {"status": "ready", "mode": PROMO_SERVE_MODE, "pid": os.getpid()})
+        return _json(start_response, "503 Service Unavailable", {"status": "draining" if _state["draining"] else "starting"})
+    if path == "/metrics":
+        return _json(start_response, "200 OK", {"pid": os.getpid(), "metrics": metrics.snapshot()})
+    return slack_handler(environ, start_response)
+
+
+_previous_sigterm = signal.getsignal(signal.SIGTERM)
+try:
+    signal.signal(signal.SIGTERM, _on_sigterm)
+except ValueError:
+    pass  # not in the main thread (some servers import apps from a worker thread)
+
+start_background_services()
+_state["ready"] = True
+startup.mark("ready")
+startup.log_timeline()